@@ -26,6 +26,7 @@ class SkinAnalysisAdmin(admin.ModelAdmin):
         'analysis_date',
         'processing_time'
     ]
+    list_select_related = ['user']
 
     def confidence_percentage(self, obj):
         return f"{obj.confidence_percentage}%"
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SkinAnalysisConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'skin_analysis'
+
+    def ready(self):
+        import skin_analysis.signals
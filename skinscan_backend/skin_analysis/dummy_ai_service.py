@@ -1,8 +1,9 @@
-import random
 import time
 from PIL import Image
 import os
 
+from skinscan_backend.fake_inference import get_fake_inference
+
 
 class DummySkinDiseasePredictor:
     """Dummy AI service that returns random predictions for testing"""
@@ -25,6 +26,11 @@ class DummySkinDiseasePredictor:
         time.sleep(1)
         print("Dummy model loaded successfully!")
 
+    @property
+    def random(self):
+        """Seeded random source from settings.DUMMY_AI_SERVICES['predictor']"""
+        return get_fake_inference('predictor').random
+
     def predict(self, image_path):
         """
         Simulate AI prediction with dummy data
@@ -33,9 +39,8 @@ class DummySkinDiseasePredictor:
         start_time = time.time()
 
         try:
-            # Simulate processing time (1-3 seconds)
-            processing_delay = random.uniform(1, 3)
-            time.sleep(processing_delay)
+            # Simulate processing time (settings.DUMMY_AI_SERVICES['predictor'])
+            get_fake_inference('predictor').latency.wait()
 
             # Get image info for more realistic simulation
             image_info = self._get_image_info(image_path)
@@ -88,22 +93,22 @@ class DummySkinDiseasePredictor:
         # Simulate different confidence levels based on image quality
         if image_info.get('width', 0) < 500 or image_info.get('height', 0) < 500:
             # Lower confidence for small images
-            confidence = random.uniform(0.4, 0.7)
+            confidence = self.random.uniform(0.4, 0.7)
         elif image_info.get('file_size', 0) < 100000:  # Less than 100KB
             # Lower confidence for very compressed images
-            confidence = random.uniform(0.5, 0.75)
+            confidence = self.random.uniform(0.5, 0.75)
         else:
             # Higher confidence for good quality images
-            confidence = random.uniform(0.7, 0.95)
+            confidence = self.random.uniform(0.7, 0.95)
 
         # Select random disease
-        disease = random.choice(self.diseases)
+        disease = self.random.choice(self.diseases)
 
         # Adjust confidence based on disease type
         if disease == 'Normal Skin':
-            confidence = random.uniform(0.8, 0.95)
+            confidence = self.random.uniform(0.8, 0.95)
         elif disease in ['Acne', 'Eczema']:
-            confidence = random.uniform(0.75, 0.92)
+            confidence = self.random.uniform(0.75, 0.92)
 
         return {
             'disease': disease,
@@ -0,0 +1,122 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from skin_analysis.models import SkinAnalysis
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete media files that are not referenced by any SkinAnalysis.image '
+        'or User.profile_picture'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report orphaned files without deleting them'
+        )
+        parser.add_argument(
+            '--directory', action='append', dest='directories',
+            help='Media subdirectory to scan (repeatable, default: skin_images and profile_pictures)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of files checked against the database per query'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of threads deleting files in parallel'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Skip files modified within this many seconds (uploads still in flight)'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        directories = options['directories'] or ['skin_images', 'profile_pictures']
+        cutoff = time.time() - options['min_age']
+
+        scanned = orphaned = deleted = 0
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            batch = []
+            for directory in directories:
+                for name in self._scan(directory, cutoff):
+                    batch.append(name)
+                    if len(batch) >= batch_size:
+                        result = self._process_batch(batch, executor, dry_run)
+                        scanned += len(batch)
+                        orphaned += result[0]
+                        deleted += result[1]
+                        batch = []
+                        self._report(scanned, orphaned, deleted)
+
+            if batch:
+                result = self._process_batch(batch, executor, dry_run)
+                scanned += len(batch)
+                orphaned += result[0]
+                deleted += result[1]
+                self._report(scanned, orphaned, deleted)
+
+        action = 'would be deleted' if dry_run else 'deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: scanned {scanned} files, {orphaned} orphaned, '
+            f'{orphaned if dry_run else deleted} {action}'
+        ))
+
+    def _scan(self, directory, cutoff):
+        """Stream media names (relative to MEDIA_ROOT) of files older than cutoff"""
+        root = os.path.join(settings.MEDIA_ROOT, directory)
+        if not os.path.isdir(root):
+            return
+
+        pending = [root]
+        while pending:
+            path = pending.pop()
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                            relative = os.path.relpath(entry.path, settings.MEDIA_ROOT)
+                            yield relative.replace(os.sep, '/')
+
+    def _process_batch(self, names, executor, dry_run):
+        """Return (orphaned, deleted) counts for one batch of media names"""
+        referenced = set(
+            SkinAnalysis.objects.filter(image__in=names).values_list('image', flat=True)
+        )
+        referenced.update(
+            get_user_model().objects.filter(profile_picture__in=names)
+            .values_list('profile_picture', flat=True)
+        )
+
+        orphans = [name for name in names if name not in referenced]
+        if dry_run:
+            for name in orphans:
+                self.stdout.write(f'Orphaned: {name}')
+            return len(orphans), 0
+
+        deleted = sum(executor.map(self._delete, orphans))
+        return len(orphans), deleted
+
+    def _delete(self, name):
+        try:
+            os.remove(os.path.join(settings.MEDIA_ROOT, name))
+            return 1
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            self.stderr.write(f'Could not delete {name}: {e}')
+            return 0
+
+    def _report(self, scanned, orphaned, deleted):
+        self.stdout.write(f'Scanned {scanned} files: {orphaned} orphaned, {deleted} deleted')
@@ -0,0 +1,23 @@
+import logging
+
+from django.core.files.storage import default_storage
+
+from skinscan_backend.tasks import enqueue
+
+logger = logging.getLogger(__name__)
+
+
+def delete_media_files(names):
+    """Delete stored media files, ignoring ones that are already gone"""
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.warning('Could not delete media file %s', name, exc_info=True)
+
+
+def schedule_media_deletion(*names):
+    """Delete media files in the background once the transaction commits"""
+    names = [name for name in names if name]
+    if names:
+        enqueue(delete_media_files, names)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skin_analysis', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='skinanalysis',
+            index=models.Index(fields=['analysis_date'], name='skin_analysis_date_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:04
+
+import skinscan_backend.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skin_analysis', '0002_analysis_date_index'),
+    ]
+
+    # State only: the default is set in Python, the column itself is unchanged
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='skinanalysis',
+                    name='id',
+                    field=models.UUIDField(default=skinscan_backend.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -1,11 +1,12 @@
 from django.db import models
 from django.conf import settings
-import uuid
+
+from skinscan_backend.uuids import uuid7
 
 
 class SkinAnalysis(models.Model):
     # Primary key
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     # User relationship - Updated to use custom user model
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
@@ -29,6 +30,10 @@ class SkinAnalysis(models.Model):
         ordering = ['-analysis_date']
         verbose_name = 'Skin Analysis'
         verbose_name_plural = 'Skin Analyses'
+        indexes = [
+            # Time windows of the analytics rollups
+            models.Index(fields=['analysis_date'], name='skin_analysis_date_idx'),
+        ]
 
     def __str__(self):
         return f"Analysis {self.id} - {self.predicted_disease or 'Pending'}"
@@ -1,8 +1,13 @@
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
+
+from skinscan_backend.serializers import SparseFieldsetMixin, ValuesSerializer
 from .models import SkinAnalysis
+from .upload_handlers import MAX_IMAGE_SIZE, read_image_header, validate_image_header
 
 
-class SkinAnalysisSerializer(serializers.ModelSerializer):
+class SkinAnalysisSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     confidence_percentage = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
 
@@ -20,6 +25,10 @@ class SkinAnalysisSerializer(serializers.ModelSerializer):
             'image_url'
         ]
         read_only_fields = ['id', 'analysis_date']
+        field_sources = {
+            'confidence_percentage': ['confidence_score'],
+            'image_url': ['image'],
+        }
 
     def get_confidence_percentage(self, obj):
         """Return confidence as percentage"""
@@ -35,29 +44,63 @@ class SkinAnalysisSerializer(serializers.ModelSerializer):
         return None
 
 
+class SkinAnalysisValuesSerializer(ValuesSerializer):
+    """values() fast path of SkinAnalysisSerializer for the history list"""
+    serializer_class = SkinAnalysisSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.storage = SkinAnalysis._meta.get_field('image').storage
+        self.request = self.context.get('request')
+        # Absolute media URL prefix, built once instead of per row
+        self.media_base = None
+        if self.request and isinstance(self.storage, FileSystemStorage):
+            self.media_base = self.request.build_absolute_uri(self.storage.base_url)
+
+    def represent_confidence_percentage(self, row):
+        score = row['confidence_score']
+        return round(score * 100, 2) if score else 0
+
+    def represent_image_url(self, row):
+        name = row['image']
+        if not name:
+            return None
+        if self.media_base is not None and './' not in name and ':' not in name:
+            return self.media_base + filepath_to_uri(name).lstrip('/')
+        url = self.storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request else url
+
+
 class ImageUploadSerializer(serializers.Serializer):
-    image = serializers.ImageField()
+    # Plain FileField: the header check below replaces ImageField's full decode
+    image = serializers.FileField()
 
     def validate_image(self, value):
-        """Validate uploaded image"""
+        """Validate uploaded image from its header bytes"""
 
         # Check file size (5MB limit)
-        if value.size > 5 * 1024 * 1024:
+        if value.size > MAX_IMAGE_SIZE:
             raise serializers.ValidationError(
                 "Image file size cannot exceed 5MB."
             )
 
-        # Check file format
-        allowed_formats = ['JPEG', 'JPG', 'PNG']
-        if value.image.format.upper() not in allowed_formats:
+        # Check file format and image dimensions (minimum size)
+        try:
+            header = read_image_header(value)
+        except ValueError:
             raise serializers.ValidationError(
                 "Only JPEG and PNG image formats are allowed."
             )
+        finally:
+            value.seek(0)
 
-        # Check image dimensions (minimum size)
-        if value.image.width < 100 or value.image.height < 100:
+        if header is None:
             raise serializers.ValidationError(
-                "Image dimensions must be at least 100x100 pixels."
+                "Upload a valid image. The file you uploaded was either not an image or a corrupted image."
             )
 
-        return value
\ No newline at end of file
+        error = validate_image_header(header)
+        if error:
+            raise serializers.ValidationError(error)
+
+        return value
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .media import schedule_media_deletion
+from .models import SkinAnalysis
+
+
+@receiver(post_delete, sender=SkinAnalysis)
+def delete_analysis_image(sender, instance, **kwargs):
+    """Remove the image file when a SkinAnalysis row is deleted"""
+    schedule_media_deletion(instance.image.name)
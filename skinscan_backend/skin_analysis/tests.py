@@ -0,0 +1,256 @@
+import io
+import os
+import struct
+import tempfile
+import time
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers, StopUpload
+from django.core.management import call_command
+from django.db import transaction
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from skinscan_authentication.models import User
+from skinscan_backend.testing import AdminChangelistQueryMixin
+from .models import SkinAnalysis
+from .serializers import SkinAnalysisSerializer, SkinAnalysisValuesSerializer
+from .upload_handlers import ImageHeader, ImageHeaderUploadHandler, read_image_header
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AdminChangelistQueryTests(AdminChangelistQueryMixin, TestCase):
+    def _create_rows(self, count):
+        for i in range(count):
+            index = SkinAnalysis.objects.count()
+            user = User.objects.create_user(
+                email=f'user{index}@example.com', username=f'user{index}', password='Us3r-pass!'
+            )
+            SkinAnalysis.objects.create(
+                user=user, image='skin_images/test.jpg',
+                predicted_disease='Acne', confidence_score=0.9
+            )
+
+    def test_skin_analysis_changelist(self):
+        self._assert_bounded('/admin/skin_analysis/skinanalysis/')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SkinAnalysisValuesSerializerTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='values@example.com', username='values', password='Us3r-pass!')
+        SkinAnalysis.objects.create(user=user, image='skin_images/2026/01/01/a b.jpg', predicted_disease='Acne',
+                                    confidence_score=0.91234, processing_time=1.5, image_size='640x480', file_size=1234)
+        SkinAnalysis.objects.create(user=user, image='skin_images/b.png')
+        SkinAnalysis.objects.create(user=user, image='')
+        self.analyses = SkinAnalysis.objects.filter(user=user).order_by('-analysis_date')
+        self.request = Request(RequestFactory().get('/api/v1/analysis/history/'))
+
+    def _assert_identical(self, fields=None):
+        context = {'request': self.request}
+        expected = SkinAnalysisSerializer(self.analyses, many=True, fields=fields, context=context).data
+        serializer = SkinAnalysisValuesSerializer(fields=fields, context=context)
+        actual = serializer.serialize(serializer.values(self.analyses))
+
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_output_matches_model_serializer(self):
+        self._assert_identical()
+
+    def test_sparse_fields(self):
+        self._assert_identical({'id', 'image_url', 'confidence_percentage'})
+
+
+def png_bytes(width, height, padding=64):
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I4sII', 13, b'IHDR', width, height) + b'\x08\x02\x00\x00\x00' + bytes(padding)
+
+
+def jpeg_bytes(width, height, padding=64):
+    app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+    exif = b'Exif\x00\x00' + bytes(40)
+    app1 = b'\xff\xe1' + struct.pack('>H', len(exif) + 2) + exif
+    sof0 = b'\xff\xc0' + struct.pack('>HBHHB', 17, 8, height, width, 3) + bytes(9)
+    return b'\xff\xd8' + app0 + app1 + sof0 + bytes(padding)
+
+
+class ImageHeaderTests(TestCase):
+    def test_png(self):
+        self.assertEqual(read_image_header(io.BytesIO(png_bytes(640, 480))), ImageHeader('PNG', 640, 480))
+
+    def test_jpeg_with_app_segments_before_frame(self):
+        self.assertEqual(read_image_header(io.BytesIO(jpeg_bytes(800, 600))), ImageHeader('JPEG', 800, 600))
+
+    def test_truncated_header_needs_more_data(self):
+        for data in (png_bytes(640, 480)[:5], png_bytes(640, 480)[:20], jpeg_bytes(800, 600)[:30]):
+            self.assertIsNone(read_image_header(io.BytesIO(data)))
+
+    def test_non_image_is_rejected(self):
+        for data in (b'GIF89a' + bytes(32), b'%PDF-1.7 not an image', b'\xff\xd8\xff\xd9'):
+            with self.assertRaises(ValueError):
+                read_image_header(io.BytesIO(data))
+
+
+class ImageHeaderUploadHandlerTests(TestCase):
+    def _start(self, content_length=None):
+        handler = ImageHeaderUploadHandler()
+        # The handler takes the image field for itself
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file('image', 'photo.png', 'image/png', content_length)
+        self.addCleanup(handler.file.close)
+        return handler
+
+    def _upload(self, data, chunk_size=16):
+        handler = self._start()
+        for start in range(0, len(data), chunk_size):
+            handler.receive_data_chunk(data[start:start + chunk_size], start)
+        return handler, handler.file_complete(len(data))
+
+    def test_valid_image_header_across_chunks(self):
+        handler, uploaded = self._upload(jpeg_bytes(800, 600))
+        self.assertEqual(handler.header, ImageHeader('JPEG', 800, 600))
+        self.assertEqual(uploaded.size, len(jpeg_bytes(800, 600)))
+        self.assertIsNone(handler.error)
+
+    def test_small_image_is_rejected(self):
+        with self.assertRaises(StopUpload):
+            self._upload(png_bytes(50, 400))
+
+    def test_non_image_is_rejected(self):
+        handler = self._start()
+        with self.assertRaises(StopUpload):
+            handler.receive_data_chunk(b'plain text, not an image', 0)
+        self.assertEqual(handler.error, 'Only JPEG and PNG image formats are allowed.')
+
+    @mock.patch('skin_analysis.upload_handlers.MAX_IMAGE_SIZE', 1024)
+    def test_oversize_upload_is_rejected(self):
+        with self.assertRaises(StopUpload):
+            self._upload(png_bytes(640, 480, padding=2048), chunk_size=256)
+
+        # A declared length over the limit is rejected before any data arrives
+        handler = ImageHeaderUploadHandler()
+        with self.assertRaises(StopUpload):
+            handler.new_file('image', 'photo.png', 'image/png', 4096)
+        self.addCleanup(handler.file.close)
+        self.assertEqual(handler.error, 'Image file size cannot exceed 5MB.')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImageAnalysisUploadTests(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        settings_override = override_settings(FILE_UPLOAD_TEMP_DIR=self.temp_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user = User.objects.create_user(email='upload@example.com', username='upload', password='Upl0ad-pass!')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def _analyze(self, name, data):
+        return self.client.post(
+            '/api/v1/skin-analysis/analyze/', {'image': SimpleUploadedFile(name, data)}, format='multipart'
+        )
+
+    def _assert_rejected(self, response, message):
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'success': False, 'errors': {'image': [message]}})
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+        self.assertFalse(SkinAnalysis.objects.exists())
+
+    def test_non_image_is_rejected(self):
+        self._assert_rejected(self._analyze('notes.png', b'not an image at all'),
+                              'Only JPEG and PNG image formats are allowed.')
+
+    def test_small_image_is_rejected(self):
+        self._assert_rejected(self._analyze('tiny.jpg', jpeg_bytes(64, 64)),
+                              'Image dimensions must be at least 100x100 pixels.')
+
+    @mock.patch('skin_analysis.upload_handlers.MAX_IMAGE_SIZE', 16 * 1024)
+    def test_oversize_image_is_rejected(self):
+        self._assert_rejected(self._analyze('large.png', png_bytes(640, 480, padding=64 * 1024)),
+                              'Image file size cannot exceed 5MB.')
+
+
+class _Rollback(Exception):
+    pass
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], BACKGROUND_TASKS_EAGER=True)
+class MediaCleanupTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(email='media@example.com', username='media', password='Us3r-pass!')
+
+    def _store(self, name, age=None):
+        name = default_storage.save(name, ContentFile(b'image bytes'))
+        if age is not None:
+            modified = time.time() - age
+            os.utime(default_storage.path(name), (modified, modified))
+        return name
+
+    def test_image_is_deleted_after_commit(self):
+        analysis = SkinAnalysis.objects.create(user=self.user, image=self._store('skin_images/delete.png'))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            analysis.delete()
+            self.assertTrue(default_storage.exists(analysis.image.name))
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+        self.assertFalse(default_storage.exists(analysis.image.name))
+
+    def test_image_is_kept_on_rollback(self):
+        analysis = SkinAnalysis.objects.create(user=self.user, image=self._store('skin_images/keep.png'))
+        pk = analysis.pk
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    analysis.delete()
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertTrue(default_storage.exists(analysis.image.name))
+        self.assertTrue(SkinAnalysis.objects.filter(pk=pk).exists())
+
+    def _orphan_fixture(self):
+        referenced = self._store('skin_images/referenced.png', age=7200)
+        SkinAnalysis.objects.create(user=self.user, image=referenced)
+        picture = self._store('profile_pictures/picture.png', age=7200)
+        User.objects.filter(pk=self.user.pk).update(profile_picture=picture)
+        orphan = self._store('skin_images/2026/01/orphan.png', age=7200)
+        # Younger than the grace period: possibly an upload still in flight
+        fresh = self._store('skin_images/fresh.png', age=60)
+        return [referenced, picture, fresh], orphan
+
+    def test_collect_orphan_media_dry_run_only_lists(self):
+        kept, orphan = self._orphan_fixture()
+
+        out = io.StringIO()
+        call_command('collect_orphan_media', '--dry-run', stdout=out)
+
+        self.assertIn(f'Orphaned: {orphan}', out.getvalue())
+        self.assertEqual(out.getvalue().count('Orphaned:'), 1)
+        self.assertTrue(all(default_storage.exists(name) for name in kept + [orphan]))
+
+    def test_collect_orphan_media_deletes_old_unreferenced_files(self):
+        kept, orphan = self._orphan_fixture()
+
+        out = io.StringIO()
+        call_command('collect_orphan_media', '--batch-size=2', stdout=out)
+
+        self.assertIn('1 orphaned, 1 deleted', out.getvalue())
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertTrue(all(default_storage.exists(name) for name in kept))
@@ -0,0 +1,182 @@
+import struct
+from collections import namedtuple
+
+from django.core.files.uploadhandler import StopFutureHandlers, StopUpload, TemporaryFileUploadHandler
+
+
+# Upload constraints shared by the upload handler and ImageUploadSerializer
+MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
+MIN_IMAGE_DIMENSION = 100
+ALLOWED_IMAGE_FORMATS = ['JPEG', 'PNG']
+
+ImageHeader = namedtuple('ImageHeader', ['format', 'width', 'height'])
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SIGNATURE = b'\xff\xd8\xff'
+
+# JPEG start-of-frame markers carry the image dimensions
+# (0xC4, 0xC8 and 0xCC share the range but are DHT, JPG and DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Markers without a length field
+JPEG_STANDALONE_MARKERS = set(range(0xD0, 0xD8)) | {0x01}
+
+
+def read_image_header(fileobj):
+    """
+    Read format and dimensions from the image header without decoding pixels.
+
+    Returns an ImageHeader, or None if more data is needed to reach the
+    dimensions. Raises ValueError for unsupported or corrupt files.
+    """
+    fileobj.seek(0)
+    signature = fileobj.read(8)
+
+    if signature.startswith(PNG_SIGNATURE[:len(signature)]) and len(signature) < 8:
+        return None
+    if signature == PNG_SIGNATURE:
+        return _read_png_header(fileobj)
+
+    if signature.startswith(JPEG_SIGNATURE[:len(signature)]) and len(signature) < 3:
+        return None
+    if signature.startswith(JPEG_SIGNATURE):
+        return _read_jpeg_header(fileobj)
+
+    raise ValueError('Unsupported image format')
+
+
+def _read_png_header(fileobj):
+    """IHDR is always the first chunk: length, type, width, height"""
+    chunk = fileobj.read(16)
+    if len(chunk) < 16:
+        return None
+    length, chunk_type, width, height = struct.unpack('>I4sII', chunk)
+    if chunk_type != b'IHDR' or length != 13:
+        raise ValueError('Corrupt PNG header')
+    return ImageHeader('PNG', width, height)
+
+
+def _read_jpeg_header(fileobj):
+    """Walk the marker segments until a start-of-frame marker is found"""
+    fileobj.seek(2)
+    while True:
+        byte = fileobj.read(1)
+        if not byte:
+            return None
+        if byte != b'\xff':
+            raise ValueError('Corrupt JPEG header')
+
+        # Skip fill bytes
+        while byte == b'\xff':
+            byte = fileobj.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image or start of scan before any frame header
+            raise ValueError('Corrupt JPEG header')
+
+        length_bytes = fileobj.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if length < 2:
+            raise ValueError('Corrupt JPEG header')
+
+        if marker in JPEG_SOF_MARKERS:
+            frame = fileobj.read(5)
+            if len(frame) < 5:
+                return None
+            _precision, height, width = struct.unpack('>BHH', frame)
+            return ImageHeader('JPEG', width, height)
+
+        fileobj.seek(length - 2, 1)
+
+
+def validate_image_header(header):
+    """Return an error message if the header violates upload constraints"""
+    if header.format not in ALLOWED_IMAGE_FORMATS:
+        return "Only JPEG and PNG image formats are allowed."
+    if header.width < MIN_IMAGE_DIMENSION or header.height < MIN_IMAGE_DIMENSION:
+        return "Image dimensions must be at least 100x100 pixels."
+    return None
+
+
+class ImageHeaderUploadHandler(TemporaryFileUploadHandler):
+    """
+    Validate an image upload from its header bytes while it is streaming.
+
+    Data is spooled to a temporary file in small chunks, so only a few KB are
+    held in memory per upload. Oversize files, unsupported formats and images
+    below the minimum dimensions abort the upload as soon as the offending
+    bytes arrive, without reading the rest of the request body. The rejection
+    reason is kept in ``error`` for the view to report.
+    """
+    chunk_size = 8 * 1024
+
+    def __init__(self, request=None, field_name='image'):
+        super().__init__(request)
+        self.field_name = field_name
+        self.active = False
+        self.header = None
+        self.error = None
+
+    def new_file(self, field_name, *args, **kwargs):
+        if field_name != self.field_name:
+            self.active = False
+            return
+
+        super().new_file(field_name, *args, **kwargs)
+        self.active = True
+        self.header = None
+
+        if self.content_length is not None and self.content_length > MAX_IMAGE_SIZE:
+            self._reject("Image file size cannot exceed 5MB.")
+
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+
+        if start + len(raw_data) > MAX_IMAGE_SIZE:
+            self._reject("Image file size cannot exceed 5MB.")
+
+        self.file.write(raw_data)
+
+        if self.header is None:
+            self._check_header()
+            self.file.seek(0, 2)
+
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+
+        if self.header is None:
+            self._reject("Upload a valid image. The file you uploaded was either not an image or a corrupted image.")
+
+        self.active = False
+        return super().file_complete(file_size)
+
+    def _check_header(self):
+        try:
+            header = read_image_header(self.file)
+        except ValueError:
+            self._reject("Only JPEG and PNG image formats are allowed.")
+
+        if header is None:
+            return
+
+        error = validate_image_header(header)
+        if error:
+            self._reject(error)
+        self.header = header
+
+    def _reject(self, message):
+        self.error = message
+        self.active = False
+        raise StopUpload(connection_reset=True)
@@ -10,9 +10,13 @@ import tempfile
 import uuid
 from PIL import Image
 
+from skinscan_backend.routers import ReplicaReadMixin
+from skinscan_backend.serializers import parse_fields
+
 from .models import SkinAnalysis
-from .serializers import SkinAnalysisSerializer, ImageUploadSerializer
+from .serializers import SkinAnalysisSerializer, SkinAnalysisValuesSerializer, ImageUploadSerializer
 from .dummy_ai_service import dummy_predictor
+from .upload_handlers import ImageHeaderUploadHandler
 
 
 class ImageAnalysisView(APIView):
@@ -26,8 +30,18 @@ class ImageAnalysisView(APIView):
         """Upload image and get AI analysis"""
 
         try:
+            # Validate the image header while the upload is streaming
+            upload_handler = ImageHeaderUploadHandler(request)
+            request.upload_handlers.insert(0, upload_handler)
+
             # Validate input
             serializer = ImageUploadSerializer(data=request.data)
+            if upload_handler.error:
+                return Response({
+                    'success': False,
+                    'errors': {'image': [upload_handler.error]}
+                }, status=status.HTTP_400_BAD_REQUEST)
+
             if not serializer.is_valid():
                 return Response({
                     'success': False,
@@ -117,7 +131,7 @@ class ImageAnalysisView(APIView):
         return analysis
 
 
-class AnalysisHistoryView(APIView):
+class AnalysisHistoryView(ReplicaReadMixin, APIView):
     """
     Get analysis history for authenticated user
     """
@@ -126,19 +140,16 @@ class AnalysisHistoryView(APIView):
     def get(self, request):
         """Get list of user's analyses"""
 
-        # Get only current user's analyses
-        analyses = SkinAnalysis.objects.filter(user=request.user).order_by('-analysis_date')[:20]
+        serializer = SkinAnalysisValuesSerializer(fields=parse_fields(request), context={'request': request})
 
-        serializer = SkinAnalysisSerializer(
-            analyses,
-            many=True,
-            context={'request': request}
-        )
+        # Get only current user's analyses
+        analyses = SkinAnalysis.objects.filter(user=request.user).order_by('-analysis_date')
+        data = serializer.serialize(serializer.values(analyses)[:20])
 
         return Response({
             'success': True,
-            'count': len(serializer.data),
-            'analyses': serializer.data,
+            'count': len(data),
+            'analyses': data,
             'user_info': {
                 'total_analyses': request.user.analysis_count,
                 'user_id': str(request.user.id)
@@ -156,9 +167,12 @@ class AnalysisDetailView(APIView):
         """Get details of specific analysis"""
 
         try:
+            fields = parse_fields(request)
+
             # Ensure user can only access their own analysis
-            analysis = SkinAnalysis.objects.get(id=analysis_id, user=request.user)
-            serializer = SkinAnalysisSerializer(analysis, context={'request': request})
+            analyses = SkinAnalysisSerializer.optimize_queryset(SkinAnalysis.objects.all(), fields)
+            analysis = analyses.get(id=analysis_id, user=request.user)
+            serializer = SkinAnalysisSerializer(analysis, fields=fields, context={'request': request})
 
             return Response({
                 'success': True,
@@ -177,12 +191,7 @@ class AnalysisDetailView(APIView):
         try:
             analysis = SkinAnalysis.objects.get(id=analysis_id, user=request.user)
 
-            # Delete image file if exists
-            if analysis.image:
-                if os.path.exists(analysis.image.path):
-                    os.remove(analysis.image.path)
-
-            # Delete analysis record
+            # Delete analysis record (the image file is removed in the background)
             analysis.delete()
 
             return Response({
@@ -226,7 +235,7 @@ class SystemStatusView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-class UserAnalysisStatsView(APIView):
+class UserAnalysisStatsView(ReplicaReadMixin, APIView):
     """
     Get user's analysis statistics
     """
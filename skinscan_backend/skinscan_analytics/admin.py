@@ -0,0 +1,33 @@
+from django.contrib import admin
+from .models import DailyAnalysisRollup, DailyChatRollup, RollupWatermark
+
+
+class RollupAdmin(admin.ModelAdmin):
+    """Rollups are written by update_analytics_rollups only"""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyAnalysisRollup)
+class DailyAnalysisRollupAdmin(RollupAdmin):
+    list_display = ['date', 'disease', 'analysis_count', 'average_confidence', 'average_processing_time']
+    list_filter = ['disease']
+    date_hierarchy = 'date'
+
+
+@admin.register(DailyChatRollup)
+class DailyChatRollupAdmin(RollupAdmin):
+    list_display = [
+        'date', 'user_messages', 'assistant_messages', 'average_response_time',
+        'sessions_started', 'rating_count', 'average_rating'
+    ]
+    date_hierarchy = 'date'
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(RollupAdmin):
+    list_display = ['source', 'processed_until', 'updated_at']
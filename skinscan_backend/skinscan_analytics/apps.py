@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class SkinscanAnalyticsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'skinscan_analytics'
+    verbose_name = 'SkinScan Analytics'
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from skinscan_analytics.rollups import rebuild_rollups, update_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Add analyses, chat messages, sessions and ratings created since the last run to the '
+        'daily analytics rollups (run periodically, e.g. from cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lag-minutes', type=int, default=settings.ANALYTICS_ROLLUP_LAG_MINUTES,
+            help='Leave rows newer than this many minutes for the next run'
+        )
+        parser.add_argument('--rebuild', action='store_true', help='Drop the rollups and aggregate all rows again')
+
+    def handle(self, *args, **options):
+        lag = timedelta(minutes=options['lag_minutes'])
+        touched = rebuild_rollups(lag) if options['rebuild'] else update_rollups(lag)
+        summary = ', '.join(f'{source}: {count}' for source, count in touched.items())
+        self.stdout.write(self.style.SUCCESS(f'Rollup rows updated ({summary})'))
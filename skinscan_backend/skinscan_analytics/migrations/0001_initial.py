@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyChatRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('user_messages', models.PositiveIntegerField(default=0)),
+                ('assistant_messages', models.PositiveIntegerField(default=0)),
+                ('response_time_count', models.PositiveIntegerField(default=0)),
+                ('response_time_sum', models.FloatField(default=0)),
+                ('sessions_started', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Chat Rollup',
+                'verbose_name_plural': 'Daily Chat Rollups',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, unique=True)),
+                ('processed_until', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Rollup Watermark',
+                'verbose_name_plural': 'Rollup Watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyAnalysisRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('disease', models.CharField(blank=True, max_length=100)),
+                ('analysis_count', models.PositiveIntegerField(default=0)),
+                ('confidence_count', models.PositiveIntegerField(default=0)),
+                ('confidence_sum', models.FloatField(default=0)),
+                ('processing_time_count', models.PositiveIntegerField(default=0)),
+                ('processing_time_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily Analysis Rollup',
+                'verbose_name_plural': 'Daily Analysis Rollups',
+                'ordering': ['-date', 'disease'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'disease'), name='analytics_analysis_date_disease_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+from django.db import models
+
+
+class RollupWatermark(models.Model):
+    """How far the rows of one source have been added to the rollups"""
+    source = models.CharField(max_length=50, unique=True)
+    processed_until = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Rollup Watermark'
+        verbose_name_plural = 'Rollup Watermarks'
+
+    def __str__(self):
+        return f"{self.source} until {self.processed_until.isoformat()}"
+
+
+class DailyAnalysisRollup(models.Model):
+    """Skin analyses per predicted disease per day"""
+    date = models.DateField()
+    disease = models.CharField(max_length=100, blank=True)
+
+    # Sums and counts rather than averages, so new rows can be added exactly
+    analysis_count = models.PositiveIntegerField(default=0)
+    confidence_count = models.PositiveIntegerField(default=0)
+    confidence_sum = models.FloatField(default=0)
+    processing_time_count = models.PositiveIntegerField(default=0)
+    processing_time_sum = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['-date', 'disease']
+        verbose_name = 'Daily Analysis Rollup'
+        verbose_name_plural = 'Daily Analysis Rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'disease'], name='analytics_analysis_date_disease_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.disease or 'Unknown'}: {self.analysis_count}"
+
+    @property
+    def average_confidence(self):
+        return self.confidence_sum / self.confidence_count if self.confidence_count else None
+
+    @property
+    def average_processing_time(self):
+        return self.processing_time_sum / self.processing_time_count if self.processing_time_count else None
+
+
+class DailyChatRollup(models.Model):
+    """Chatbot messages, sessions and satisfaction ratings per day"""
+    date = models.DateField(unique=True)
+
+    user_messages = models.PositiveIntegerField(default=0)
+    assistant_messages = models.PositiveIntegerField(default=0)
+    response_time_count = models.PositiveIntegerField(default=0)
+    response_time_sum = models.FloatField(default=0)
+
+    sessions_started = models.PositiveIntegerField(default=0)
+    # Ratings are counted on the day they were submitted
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name = 'Daily Chat Rollup'
+        verbose_name_plural = 'Daily Chat Rollups'
+
+    def __str__(self):
+        return f"{self.date}: {self.assistant_messages} turns"
+
+    @property
+    def average_response_time(self):
+        return self.response_time_sum / self.response_time_count if self.response_time_count else None
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
@@ -0,0 +1,163 @@
+"""
+Incremental daily rollups of analyses and chatbot activity.
+
+Each source (analyses, messages, sessions, ratings) has a watermark: the
+timestamp up to which its rows have been added to the rollup tables. A run
+aggregates only the rows in [watermark, cutoff) with one GROUP BY query
+per source, adds the results to the rollup rows with F-expressions and
+moves the watermark, all in one transaction, so every row is counted
+exactly once however often the command runs. Ratings can be changed, so
+they are walked per session and the rating already rolled up is replaced.
+
+The cutoff lags behind now (ANALYTICS_ROLLUP_LAG_MINUTES): a row is stamped
+when it is created but only visible once its transaction commits, and a
+row that became visible after the watermark passed its timestamp would be
+missed.
+"""
+import datetime
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from skin_analysis.models import SkinAnalysis
+from skinscan_chatbot.models import ChatbotSession, Message
+
+from .models import DailyAnalysisRollup, DailyChatRollup, RollupWatermark
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+RATING_CHUNK_SIZE = 1000
+
+
+def _analyses(start, end):
+    rows = SkinAnalysis.objects.filter(analysis_date__gte=start, analysis_date__lt=end) \
+        .annotate(date=TruncDate('analysis_date')) \
+        .order_by() \
+        .values('date', 'predicted_disease') \
+        .annotate(
+            analysis_count=Count('id'),
+            confidence_count=Count('confidence_score'),
+            confidence_sum=Sum('confidence_score'),
+            processing_time_count=Count('processing_time'),
+            processing_time_sum=Sum('processing_time'),
+        )
+    for row in rows:
+        yield DailyAnalysisRollup, {'date': row.pop('date'), 'disease': row.pop('predicted_disease')}, row
+
+
+def _messages(start, end):
+    rows = Message.objects.filter(created_at__gte=start, created_at__lt=end, message_type__in=['user', 'assistant']) \
+        .annotate(date=TruncDate('created_at')) \
+        .order_by() \
+        .values('date', 'message_type') \
+        .annotate(count=Count('id'), response_time_count=Count('response_time'), response_time_sum=Sum('response_time'))
+    for row in rows:
+        if row['message_type'] == 'user':
+            yield DailyChatRollup, {'date': row['date']}, {'user_messages': row['count']}
+        else:
+            yield DailyChatRollup, {'date': row['date']}, {
+                'assistant_messages': row['count'],
+                'response_time_count': row['response_time_count'],
+                'response_time_sum': row['response_time_sum'],
+            }
+
+
+def _sessions(start, end):
+    rows = ChatbotSession.objects.filter(session_start__gte=start, session_start__lt=end) \
+        .annotate(date=TruncDate('session_start')) \
+        .order_by() \
+        .values('date') \
+        .annotate(sessions_started=Count('id'))
+    for row in rows:
+        yield DailyChatRollup, {'date': row.pop('date')}, row
+
+
+def _ratings(start, end):
+    """
+    Ratings are counted on the day they were submitted. A session rated
+    again moves to the new day with its new rating: the rating recorded on
+    the session as already rolled up is subtracted from its old day.
+    """
+    sessions = ChatbotSession.objects.filter(rated_at__gte=start, rated_at__lt=end) \
+        .annotate(date=TruncDate('rated_at')) \
+        .only('id', 'satisfaction_rating', 'rollup_rating', 'rollup_rating_date')
+    deltas = defaultdict(lambda: {'rating_count': 0, 'rating_sum': 0})
+    changed = []
+
+    for session in sessions.iterator(chunk_size=RATING_CHUNK_SIZE):
+        if session.rollup_rating is None and session.satisfaction_rating is None:
+            continue
+        if session.rollup_rating is not None:
+            deltas[session.rollup_rating_date]['rating_count'] -= 1
+            deltas[session.rollup_rating_date]['rating_sum'] -= session.rollup_rating
+        if session.satisfaction_rating is not None:
+            deltas[session.date]['rating_count'] += 1
+            deltas[session.date]['rating_sum'] += session.satisfaction_rating
+            session.rollup_rating, session.rollup_rating_date = session.satisfaction_rating, session.date
+        else:
+            session.rollup_rating = session.rollup_rating_date = None
+        changed.append(session)
+
+    # Record what was rolled up in the same transaction as the rollups
+    ChatbotSession.objects.bulk_update(changed, ['rollup_rating', 'rollup_rating_date'], batch_size=RATING_CHUNK_SIZE)
+    for date, increments in deltas.items():
+        if any(increments.values()):
+            yield DailyChatRollup, {'date': date}, increments
+
+
+SOURCES = {
+    'analyses': _analyses,
+    'messages': _messages,
+    'sessions': _sessions,
+    'ratings': _ratings,
+}
+
+
+def _add(model, key, increments):
+    """Add increments to the rollup row at key, creating it if needed"""
+    increments = {name: value or 0 for name, value in increments.items()}
+    updated = model.objects.filter(**key).update(**{name: F(name) + value for name, value in increments.items()})
+    if not updated:
+        model.objects.create(**key, **increments)
+
+
+def update_rollups(lag=None, now=None):
+    """
+    Add the rows created since each source's watermark to the rollups.
+
+    Returns the number of rollup rows touched per source.
+    """
+    if lag is None:
+        lag = timedelta(minutes=settings.ANALYTICS_ROLLUP_LAG_MINUTES)
+    cutoff = (now or timezone.now()) - lag
+    touched = {}
+
+    for source, aggregate in SOURCES.items():
+        with transaction.atomic():
+            watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+                source=source, defaults={'processed_until': EPOCH}
+            )
+            touched[source] = 0
+            if watermark.processed_until >= cutoff:
+                continue
+            for model, key, increments in aggregate(watermark.processed_until, cutoff):
+                _add(model, key, increments)
+                touched[source] += 1
+            watermark.processed_until = cutoff
+            watermark.save(update_fields=['processed_until', 'updated_at'])
+
+    return touched
+
+
+def rebuild_rollups(lag=None, now=None):
+    """Drop the rollups and watermarks and aggregate everything again"""
+    with transaction.atomic():
+        DailyAnalysisRollup.objects.all().delete()
+        DailyChatRollup.objects.all().delete()
+        RollupWatermark.objects.all().delete()
+        ChatbotSession.objects.filter(rollup_rating__isnull=False).update(rollup_rating=None, rollup_rating_date=None)
+        return update_rollups(lag, now)
@@ -0,0 +1,195 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from skin_analysis.models import SkinAnalysis
+from skinscan_authentication.models import User
+from skinscan_chatbot.models import ChatbotSession, Conversation, Message
+from .models import DailyAnalysisRollup, DailyChatRollup
+from .rollups import rebuild_rollups, update_rollups
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='rollups@example.com', username='rollups', password='Us3r-pass!')
+        self.conversation = Conversation.objects.create(user=self.user)
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def _analysis(self, disease, confidence, processing_time, days_ago=0):
+        analysis = SkinAnalysis.objects.create(
+            user=self.user, image='skin_images/rollup.png', predicted_disease=disease,
+            confidence_score=confidence, processing_time=processing_time
+        )
+        SkinAnalysis.objects.filter(pk=analysis.pk).update(
+            analysis_date=analysis.analysis_date - timedelta(days=days_ago)
+        )
+
+    def _turn(self, response_time, days_ago=0):
+        for message_type in ['user', 'assistant']:
+            message = Message.objects.create(
+                conversation=self.conversation, message_type=message_type, content='Itchy rash',
+                response_time=response_time if message_type == 'assistant' else None
+            )
+            Message.objects.filter(pk=message.pk).update(created_at=message.created_at - timedelta(days=days_ago))
+
+    def test_rows_are_aggregated_per_day(self):
+        self._analysis('Eczema', 0.8, 2.0, days_ago=1)
+        self._analysis('Eczema', 0.6, 1.0, days_ago=1)
+        self._analysis('Acne', 0.9, 3.0)
+        self._turn(1.0)
+        self._turn(3.0)
+        ChatbotSession.objects.create(
+            user=self.user, conversation=self.conversation, satisfaction_rating=4, rated_at=timezone.now()
+        )
+
+        update_rollups(lag=timedelta(0))
+
+        eczema = DailyAnalysisRollup.objects.get(date=self.yesterday, disease='Eczema')
+        self.assertEqual(eczema.analysis_count, 2)
+        self.assertAlmostEqual(eczema.average_confidence, 0.7)
+        self.assertAlmostEqual(eczema.average_processing_time, 1.5)
+        self.assertEqual(DailyAnalysisRollup.objects.get(date=self.today, disease='Acne').analysis_count, 1)
+
+        chat = DailyChatRollup.objects.get(date=self.today)
+        self.assertEqual((chat.user_messages, chat.assistant_messages, chat.sessions_started), (2, 2, 1))
+        self.assertAlmostEqual(chat.average_response_time, 2.0)
+        self.assertEqual((chat.rating_count, chat.average_rating), (1, 4))
+
+    def test_runs_only_add_rows_since_the_watermark(self):
+        self._analysis('Acne', 0.9, 3.0)
+        self._turn(1.0)
+        update_rollups(lag=timedelta(0))
+
+        self._analysis('Acne', 0.5, 1.0)
+        self._turn(2.0)
+        with CaptureQueriesContext(connection) as queries:
+            update_rollups(lag=timedelta(0))
+        self.assertEqual(DailyAnalysisRollup.objects.get(disease='Acne').analysis_count, 2)
+        self.assertEqual(DailyChatRollup.objects.get().assistant_messages, 2)
+        # Every source query is bounded below by its watermark; ratings are read per session
+        aggregates = [
+            q['sql'] for q in queries.captured_queries
+            if 'GROUP BY' in q['sql'] or q['sql'].startswith('SELECT') and '"rated_at" >=' in q['sql']
+        ]
+        self.assertEqual(len(aggregates), 4)
+        self.assertTrue(all('>=' in sql for sql in aggregates))
+
+        self.assertEqual(update_rollups(lag=timedelta(0)), {'analyses': 0, 'messages': 0, 'sessions': 0, 'ratings': 0})
+        self.assertEqual(DailyAnalysisRollup.objects.get(disease='Acne').analysis_count, 2)
+
+    def test_rows_inside_the_lag_wait_for_the_next_run(self):
+        self._analysis('Acne', 0.9, 3.0)
+        update_rollups(lag=timedelta(minutes=5))
+        self.assertFalse(DailyAnalysisRollup.objects.exists())
+
+        update_rollups(lag=timedelta(0), now=timezone.now() + timedelta(minutes=10))
+        self.assertEqual(DailyAnalysisRollup.objects.get().analysis_count, 1)
+
+    def test_rerated_session_replaces_its_rating(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        def rate(rating):
+            response = client.post('/api/v1/chatbot/feedback/', {
+                'conversation_id': str(self.conversation.id), 'satisfaction_rating': rating
+            }, format='json')
+            self.assertEqual(response.status_code, 200)
+
+        rate(2)
+        session = ChatbotSession.objects.get()
+        ChatbotSession.objects.filter(pk=session.pk).update(rated_at=session.rated_at - timedelta(days=1))
+        update_rollups(lag=timedelta(0))
+        self.assertEqual(DailyChatRollup.objects.get(date=self.yesterday).rating_sum, 2)
+
+        # Rated again today: the rating moves from yesterday to today
+        rate(5)
+        update_rollups(lag=timedelta(0))
+        yesterday = DailyChatRollup.objects.get(date=self.yesterday)
+        today = DailyChatRollup.objects.get(date=self.today)
+        self.assertEqual((yesterday.rating_count, yesterday.rating_sum), (0, 0))
+        self.assertEqual((today.rating_count, today.rating_sum), (1, 5))
+
+        # Same day again, then a run with nothing new
+        rate(3)
+        update_rollups(lag=timedelta(0))
+        update_rollups(lag=timedelta(0))
+        today.refresh_from_db()
+        self.assertEqual((today.rating_count, today.rating_sum), (1, 3))
+
+        rebuild_rollups(lag=timedelta(0))
+        self.assertEqual(DailyChatRollup.objects.get(date=self.today).rating_sum, 3)
+        self.assertFalse(DailyChatRollup.objects.filter(date=self.yesterday, rating_count__gt=0).exists())
+
+    def test_rebuild_matches_incremental_runs(self):
+        self._analysis('Eczema', 0.8, 2.0, days_ago=2)
+        update_rollups(lag=timedelta(0))
+        self._analysis('Eczema', 0.6, 1.0)
+        self._analysis('Acne', 0.9, 3.0)
+        update_rollups(lag=timedelta(0))
+        incremental = list(DailyAnalysisRollup.objects.values_list('date', 'disease', 'analysis_count', 'confidence_sum'))
+
+        out = io.StringIO()
+        call_command('update_analytics_rollups', '--rebuild', '--lag-minutes=0', stdout=out)
+        self.assertIn('analyses: 3', out.getvalue())
+        rebuilt = list(DailyAnalysisRollup.objects.values_list('date', 'disease', 'analysis_count', 'confidence_sum'))
+        self.assertEqual(rebuilt, incremental)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class DailyStatsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='St4ff-pass!', is_staff=True
+        )
+        cls.user = User.objects.create_user(email='member@example.com', username='member', password='Us3r-pass!')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _queries(self):
+        self.client.force_authenticate(self.staff)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/analytics/daily/?days=7')
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries.captured_queries)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/v1/analytics/daily/').status_code, 403)
+
+    def test_serves_rollups_without_touching_raw_tables(self):
+        for _ in range(3):
+            SkinAnalysis.objects.create(
+                user=self.user, image='skin_images/rollup.png', predicted_disease='Acne',
+                confidence_score=0.9, processing_time=2.0
+            )
+        update_rollups(lag=timedelta(0))
+        response, small = self._queries()
+
+        day = response.data['days'][0]
+        self.assertEqual(day['date'], timezone.localdate().isoformat())
+        self.assertEqual(day['analyses']['total'], 3)
+        self.assertEqual(day['analyses']['by_disease']['Acne']['average_confidence'], 0.9)
+        self.assertEqual(set(response.data['processed_until']), {'analyses', 'messages', 'sessions', 'ratings'})
+
+        SkinAnalysis.objects.bulk_create([
+            SkinAnalysis(user=self.user, image='skin_images/rollup.png', predicted_disease='Acne') for _ in range(50)
+        ])
+        update_rollups(lag=timedelta(0))
+        response, large = self._queries()
+        self.assertEqual(response.data['days'][0]['analyses']['total'], 53)
+        self.assertEqual(small, large)
+
+    def test_invalid_days(self):
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get('/api/v1/analytics/daily/?days=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/analytics/daily/?days=x').status_code, 400)
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import DailyStatsView
+
+app_name = 'skinscan_analytics'
+
+urlpatterns = [
+    path('daily/', DailyStatsView.as_view(), name='daily-stats'),
+]
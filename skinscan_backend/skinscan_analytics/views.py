@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.utils import timezone
+
+from skinscan_backend.routers import ReplicaReadMixin
+
+from .models import DailyAnalysisRollup, DailyChatRollup, RollupWatermark
+
+
+def _round(value, digits=4):
+    return None if value is None else round(value, digits)
+
+
+class DailyStatsView(ReplicaReadMixin, APIView):
+    """Platform-wide daily usage from the rollup tables (staff only)"""
+    permission_classes = [IsAdminUser]
+    default_days = 30
+    max_days = 366
+
+    def get(self, request):
+        """Get daily analysis and chatbot statistics for the last ?days= days"""
+        try:
+            days = int(request.query_params.get('days', self.default_days))
+        except ValueError:
+            days = 0
+        if not 1 <= days <= self.max_days:
+            return Response({
+                'success': False,
+                'error': f'days must be between 1 and {self.max_days}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        since = timezone.localdate() - timedelta(days=days - 1)
+        report = {}
+
+        def day(date):
+            return report.setdefault(date, {
+                'date': date.isoformat(),
+                'analyses': {'total': 0, 'by_disease': {}},
+                'chat': None,
+            })
+
+        for rollup in DailyAnalysisRollup.objects.filter(date__gte=since):
+            analyses = day(rollup.date)['analyses']
+            analyses['total'] += rollup.analysis_count
+            analyses['by_disease'][rollup.disease or 'Unknown'] = {
+                'count': rollup.analysis_count,
+                'average_confidence': _round(rollup.average_confidence),
+                'average_processing_time': _round(rollup.average_processing_time),
+            }
+
+        for rollup in DailyChatRollup.objects.filter(date__gte=since):
+            day(rollup.date)['chat'] = {
+                'user_messages': rollup.user_messages,
+                'chat_turns': rollup.assistant_messages,
+                'average_response_time': _round(rollup.average_response_time),
+                'sessions_started': rollup.sessions_started,
+                'ratings': rollup.rating_count,
+                'average_rating': _round(rollup.average_rating, 2),
+            }
+
+        return Response({
+            'success': True,
+            'days': [report[date] for date in sorted(report, reverse=True)],
+            'processed_until': {
+                watermark.source: watermark.processed_until
+                for watermark in RollupWatermark.objects.all()
+            }
+        }, status=status.HTTP_200_OK)
@@ -1,9 +1,23 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from skin_analysis.models import SkinAnalysis
+from skinscan_chatbot.models import Conversation
 from .models import User, UserProfile
 
 
+def _count_subquery(model, field):
+    """Correlated COUNT of model rows pointing at the outer row through field"""
+    counts = model.objects.filter(**{field: OuterRef('pk')}) \
+        .order_by() \
+        .values(field) \
+        .annotate(count=Count('pk')) \
+        .values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = [
@@ -46,8 +60,15 @@ class UserAdmin(BaseUserAdmin):
 
     readonly_fields = ['created_at', 'updated_at', 'last_login', 'date_joined']
 
+    def get_queryset(self, request):
+        # Count related rows in the changelist query instead of once per row
+        return super().get_queryset(request).annotate(
+            _analysis_count=_count_subquery(SkinAnalysis, 'user'),
+            _conversation_count=_count_subquery(Conversation, 'user'),
+        )
+
     def analysis_count(self, obj):
-        count = obj.analysis_count
+        count = obj._analysis_count
         if count > 0:
             return format_html(
                 '<span style="color: green; font-weight: bold;">{}</span>',
@@ -56,9 +77,10 @@ class UserAdmin(BaseUserAdmin):
         return count
 
     analysis_count.short_description = 'Analyses'
+    analysis_count.admin_order_field = '_analysis_count'
 
     def conversation_count(self, obj):  # Add this method
-        count = obj.conversation_count
+        count = obj._conversation_count
         if count > 0:
             return format_html(
                 '<span style="color: blue; font-weight: bold;">{}</span>',
@@ -67,6 +89,7 @@ class UserAdmin(BaseUserAdmin):
         return count
 
     conversation_count.short_description = 'Chats'
+    conversation_count.admin_order_field = '_conversation_count'
 
 
 @admin.register(UserProfile)
@@ -81,6 +104,7 @@ class UserProfileAdmin(admin.ModelAdmin):
     ]
     search_fields = ['user__email', 'user__username', 'location']
     raw_id_fields = ['user']
+    list_select_related = ['user']
 
     fieldsets = (
         ('User Information', {
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+def _user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    """Drop the cached principal so the next request reloads the user row"""
+    caches[settings.AUTH_USER_CACHE_ALIAS].delete(_user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that caches the validated user for a short TTL.
+
+    Entries are keyed by user id and tagged with the token version (the
+    password-derived revoke claim), so a token issued before a password
+    change never matches a cached principal. Saving or deleting a user
+    invalidates the entry, which covers password changes, deactivation and
+    account deletion.
+
+    Invalidation has to reach every worker, so a per-process cache
+    (LocMemCache, DummyCache) disables caching and each request loads the
+    user row.
+    """
+
+    def get_user(self, validated_token):
+        cache = caches[settings.AUTH_USER_CACHE_ALIAS]
+        if isinstance(cache, (LocMemCache, DummyCache)):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        key = _user_cache_key(user_id)
+        token_version = validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+
+        cached = cache.get(key)
+        if cached is not None and cached[0] == token_version:
+            return cached[1]
+
+        # Full lookup: existence, is_active and revoke-claim checks
+        user = super().get_user(validated_token)
+        cache.set(key, (token_version, user), settings.AUTH_USER_CACHE_TTL)
+        return user
@@ -0,0 +1,94 @@
+"""
+Chunked account deletion.
+
+Deleting a user through the ORM collector loads every related row into
+memory and fires signals for each one, which does not scale to accounts
+with tens of thousands of messages. delete_user_account() removes the
+user's data children-first in fixed-size raw DELETE batches instead, so
+memory stays flat regardless of how much data the user has.
+"""
+import logging
+
+from django.db import transaction
+
+from skin_analysis.media import schedule_media_deletion
+from skin_analysis.models import SkinAnalysis
+from skinscan_chatbot.models import ChatbotSession, Conversation, ConversationArchive, Message
+from .models import User, UserProfile
+
+logger = logging.getLogger(__name__)
+
+DELETION_BATCH_SIZE = 1000
+
+
+def _log_progress(label, deleted):
+    logger.info('Account deletion: %s rows of %s deleted', deleted, label)
+
+
+def _delete_in_batches(queryset, batch_size, label, progress, before_delete=None):
+    """Delete the rows of queryset in primary-key batches, returning the total"""
+    model = queryset.model
+    pk_queryset = queryset.order_by().values_list('pk', flat=True)
+    total = 0
+
+    while True:
+        ids = list(pk_queryset[:batch_size])
+        if not ids:
+            break
+
+        batch = model.objects.filter(pk__in=ids)
+        if before_delete:
+            before_delete(batch)
+
+        with transaction.atomic():
+            total += batch._raw_delete(batch.db)
+        progress(label, total)
+
+    return total
+
+
+def _schedule_image_deletion(batch):
+    schedule_media_deletion(*batch.values_list('image', flat=True))
+
+
+def delete_user_account(user_id, batch_size=DELETION_BATCH_SIZE, progress=_log_progress):
+    """
+    Delete a user and all of their data in batches, children first.
+
+    progress(label, deleted) is called after every batch. Returns a dict of
+    deleted row counts per model.
+    """
+    return delete_users([user_id], batch_size, progress)
+
+
+def delete_users(user_ids, batch_size=DELETION_BATCH_SIZE, progress=_log_progress):
+    """Like delete_user_account, for a list of users deleted together"""
+    counts = {
+        'chatbot_sessions': _delete_in_batches(
+            ChatbotSession.objects.filter(user_id__in=user_ids), batch_size, 'chatbot_sessions', progress
+        ),
+        'messages': _delete_in_batches(
+            Message.objects.filter(conversation__user_id__in=user_ids), batch_size, 'messages', progress
+        ),
+        'conversation_archives': _delete_in_batches(
+            ConversationArchive.objects.filter(conversation__user_id__in=user_ids), batch_size,
+            'conversation_archives', progress
+        ),
+        'conversations': _delete_in_batches(
+            Conversation.objects.filter(user_id__in=user_ids), batch_size, 'conversations', progress
+        ),
+        'skin_analyses': _delete_in_batches(
+            SkinAnalysis.objects.filter(user_id__in=user_ids), batch_size, 'skin_analyses', progress,
+            before_delete=_schedule_image_deletion
+        ),
+        'profiles': _delete_in_batches(
+            UserProfile.objects.filter(user_id__in=user_ids), batch_size, 'profiles', progress
+        ),
+    }
+
+    # Only a handful of rows remain, so the regular collector is cheap now
+    _, deleted = User.objects.filter(pk__in=user_ids).delete()
+    counts['users'] = deleted.get(User._meta.label, 0)
+    progress('users', counts['users'])
+
+    return counts
@@ -0,0 +1,198 @@
+"""
+Streaming export of a user's data.
+
+Rows are read with values().iterator(chunk_size=...) and written to the
+response as they arrive, so neither the queryset nor the output is ever
+held in memory; exporting an account with hundreds of thousands of rows
+uses as much memory as exporting one with ten. Archived messages are
+decoded one conversation at a time.
+
+Formats:
+    ndjson  one JSON object per line, every table, tagged with "type"
+    csv     one table (analyses, conversations, messages or sessions)
+    zip     account.json, a CSV file per table and the original images,
+            written through zipfile to a non-seekable sink so the archive
+            is streamed instead of assembled first
+"""
+import csv
+import io
+import json
+import time
+import zipfile
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+
+from skin_analysis.models import SkinAnalysis
+from skinscan_backend.renderers import ORJSONRenderer
+from skinscan_chatbot.archive import load_archived_messages
+from skinscan_chatbot.models import ChatbotSession, Conversation, Message
+
+EXPORT_CHUNK_SIZE = 2000
+IMAGE_CHUNK_SIZE = 64 * 1024
+
+ACCOUNT_FIELDS = ['id', 'email', 'username', 'first_name', 'last_name', 'phone_number', 'date_of_birth', 'created_at']
+PROFILE_FIELDS = [
+    'bio', 'location', 'website', 'skin_type', 'medical_conditions', 'profile_visibility',
+    'email_notifications', 'analysis_reminders'
+]
+
+TABLES = {
+    'analyses': [
+        'id', 'analysis_date', 'predicted_disease', 'confidence_score', 'processing_time',
+        'image', 'image_size', 'file_size'
+    ],
+    'conversations': [
+        'id', 'title', 'is_active', 'related_analysis_id', 'created_at', 'last_message_at', 'archived_message_count'
+    ],
+    'messages': [
+        'id', 'conversation_id', 'message_type', 'content', 'response_time', 'confidence_score',
+        'is_flagged', 'created_at', 'user_context'
+    ],
+    'sessions': [
+        'id', 'conversation_id', 'session_start', 'session_end', 'total_messages', 'average_response_time',
+        'max_response_time', 'satisfaction_rating', 'feedback_comment'
+    ],
+}
+
+_render_json = ORJSONRenderer().render
+_user_context_field = Message._meta.get_field('user_context')
+
+
+def account_record(user):
+    record = {name: getattr(user, name) for name in ACCOUNT_FIELDS}
+    profile = getattr(user, 'profile', None)
+    record['profile'] = {name: getattr(profile, name) for name in PROFILE_FIELDS} if profile else None
+    return record
+
+
+def _messages(user, chunk_size):
+    fields = TABLES['messages']
+    # Archived messages are older than the live ones of their conversation
+    archived = Conversation.objects.filter(user=user, archived_message_count__gt=0).order_by('created_at', 'id')
+    for conversation in archived.iterator(chunk_size=100):
+        for message in load_archived_messages(conversation):
+            yield {name: getattr(message, name) for name in fields}
+
+    live = Message.objects.filter(conversation__user=user) \
+        .order_by('conversation__created_at', 'conversation_id', 'created_at', 'id') \
+        .values(*fields)
+    for row in live.iterator(chunk_size=chunk_size):
+        if row['user_context'] is not None:
+            row['user_context'] = _user_context_field.decompress(row['user_context'])
+        yield row
+
+
+def iter_table(user, table, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the rows of one exported table as dicts, oldest first"""
+    fields = TABLES[table]
+    if table == 'messages':
+        return _messages(user, chunk_size)
+    if table == 'analyses':
+        queryset = SkinAnalysis.objects.filter(user=user).order_by('analysis_date', 'id')
+    elif table == 'conversations':
+        queryset = Conversation.objects.filter(user=user).order_by('created_at', 'id')
+    else:
+        queryset = ChatbotSession.objects.filter(user=user).order_by('session_start', 'id')
+    return queryset.values(*fields).iterator(chunk_size=chunk_size)
+
+
+def stream_ndjson(user, chunk_size=EXPORT_CHUNK_SIZE):
+    yield _render_json({'type': 'account', **account_record(user)}) + b'\n'
+    for table in TABLES:
+        record_type = table[:-1] if table != 'analyses' else 'analysis'
+        lines = []
+        for row in iter_table(user, table, chunk_size):
+            lines.append(_render_json({'type': record_type, **row}))
+            if len(lines) == chunk_size:
+                yield b'\n'.join(lines) + b'\n'
+                lines = []
+        if lines:
+            yield b'\n'.join(lines) + b'\n'
+
+
+class _Echo:
+    """File-like object whose write() returns what it was given"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return value
+
+
+def stream_csv(user, table, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    fields = TABLES[table]
+    yield writer.writerow(fields)
+    rows = []
+    for row in iter_table(user, table, chunk_size):
+        rows.append(writer.writerow([_csv_value(row[name]) for name in fields]))
+        if len(rows) == chunk_size:
+            yield ''.join(rows)
+            rows = []
+    if rows:
+        yield ''.join(rows)
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable stream collecting what zipfile writes"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(user, include_images=True, chunk_size=EXPORT_CHUNK_SIZE):
+    return (chunk for chunk in _zip_chunks(user, include_images, chunk_size) if chunk)
+
+
+def _zip_chunks(user, include_images, chunk_size):
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('account.json', _render_json(account_record(user)))
+        yield sink.drain()
+
+        for table in TABLES:
+            with archive.open(f'{table}.csv', 'w', force_zip64=True) as entry:
+                for chunk in stream_csv(user, table, chunk_size):
+                    entry.write(chunk.encode('utf-8'))
+                    yield sink.drain()
+            yield sink.drain()
+
+        if include_images:
+            images = SkinAnalysis.objects.filter(user=user).exclude(image='') \
+                .order_by('analysis_date', 'id').values_list('image', flat=True)
+            for name in images.iterator(chunk_size=chunk_size):
+                yield from _zip_image(archive, sink, name)
+    yield sink.drain()
+
+
+def _zip_image(archive, sink, name):
+    try:
+        source = default_storage.open(name, 'rb')
+    except (OSError, ValueError):
+        # Deleted or never stored; the analyses table still lists the name
+        return
+    # Images are already compressed
+    info = zipfile.ZipInfo(f'images/{name}', time.localtime()[:6])
+    info.compress_type = zipfile.ZIP_STORED
+    with source, archive.open(info, 'w', force_zip64=True) as entry:
+        while chunk := source.read(IMAGE_CHUNK_SIZE):
+            entry.write(chunk)
+            yield sink.drain()
+    yield sink.drain()
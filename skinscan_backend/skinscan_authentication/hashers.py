@@ -0,0 +1,101 @@
+"""
+Password hashers with settings-driven cost parameters.
+
+PASSWORD_HASHER picks the preferred algorithm; the other hashers stay
+registered so existing hashes still verify and are transparently rehashed
+with the preferred one on the next successful login (Django's
+check_password does this through its setter). All hash computations run
+on a small bounded thread pool, so a login burst can only occupy
+PASSWORD_HASHING_WORKERS cores and other endpoints keep being served.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+    get_hashers,
+    get_hashers_by_algorithm,
+)
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+_executor = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHING_WORKERS,
+                    thread_name_prefix='skinscan-hasher'
+                )
+    return _executor
+
+
+def _call_in_pool(func, args):
+    _local.in_pool = True
+    try:
+        return func(*args)
+    finally:
+        _local.in_pool = False
+
+
+def run_in_hashing_pool(func, *args):
+    """Run a hash computation on the bounded hashing pool and wait for it"""
+    # verify() calls encode() internally; don't queue behind ourselves
+    if getattr(_local, 'in_pool', False):
+        return func(*args)
+    return _get_executor().submit(_call_in_pool, func, args).result()
+
+
+class BoundedHashingMixin:
+    """Route encode/verify through the bounded hashing pool"""
+
+    def encode(self, *args, **kwargs):
+        return run_in_hashing_pool(partial(super().encode, *args, **kwargs))
+
+    def verify(self, password, encoded):
+        return run_in_hashing_pool(super().verify, password, encoded)
+
+
+class TunedPBKDF2PasswordHasher(BoundedHashingMixin, PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with the iteration count taken from settings"""
+
+    def __init__(self):
+        self.iterations = settings.PASSWORD_HASHER_PARAMS['pbkdf2']['iterations']
+
+
+class TunedScryptPasswordHasher(BoundedHashingMixin, ScryptPasswordHasher):
+    """Scrypt with work factor, block size and parallelism taken from settings"""
+
+    def __init__(self):
+        params = settings.PASSWORD_HASHER_PARAMS['scrypt']
+        self.work_factor = params['work_factor']
+        self.block_size = params['block_size']
+        self.parallelism = params['parallelism']
+
+
+class TunedArgon2PasswordHasher(BoundedHashingMixin, Argon2PasswordHasher):
+    """Argon2id with time cost, memory cost and parallelism taken from settings (needs argon2-cffi)"""
+
+    def __init__(self):
+        params = settings.PASSWORD_HASHER_PARAMS['argon2']
+        self.time_cost = params['time_cost']
+        self.memory_cost = params['memory_cost']
+        self.parallelism = params['parallelism']
+
+
+@receiver(setting_changed)
+def reset_tuned_hashers(setting, **kwargs):
+    """Hasher instances are cached by Django; rebuild them with the new parameters"""
+    if setting == 'PASSWORD_HASHER_PARAMS':
+        get_hashers.cache_clear()
+        get_hashers_by_algorithm.cache_clear()
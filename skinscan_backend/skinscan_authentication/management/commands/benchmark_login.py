@@ -0,0 +1,74 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from skinscan_authentication.models import User
+
+BENCHMARK_PASSWORD = 'Benchmark-Passw0rd!'
+
+
+class Command(BaseCommand):
+    help = 'Measure login throughput through the login endpoint for each password hasher'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hasher', action='append', dest='hashers',
+            choices=['pbkdf2', 'scrypt', 'argon2'],
+            help='Hasher to benchmark (repeatable, default: pbkdf2 and scrypt)'
+        )
+        parser.add_argument('--users', type=int, default=20, help='Number of benchmark accounts')
+        parser.add_argument('--logins', type=int, default=100, help='Total number of logins per hasher')
+        parser.add_argument('--concurrency', type=int, default=8, help='Number of concurrent clients')
+
+    def handle(self, *args, **options):
+        for hasher in options['hashers'] or ['pbkdf2', 'scrypt']:
+            hasher_path = settings.PASSWORD_HASHER_CLASSES[hasher]
+            with override_settings(PASSWORD_HASHERS=[hasher_path]):
+                self._benchmark(hasher, options['users'], options['logins'], options['concurrency'])
+
+    def _benchmark(self, hasher, user_count, login_count, concurrency):
+        # One hash shared by all accounts keeps setup cheap
+        password_hash = make_password(BENCHMARK_PASSWORD)
+        emails = [f'bench-login-{i}@example.com' for i in range(user_count)]
+        User.objects.filter(email__in=emails).delete()
+        User.objects.bulk_create([
+            User(email=email, username=email.split('@')[0], password=password_hash)
+            for email in emails
+        ])
+
+        def login(i):
+            client = Client()
+            started = time.perf_counter()
+            response = client.post(
+                '/api/v1/auth/login/',
+                {'email': emails[i % user_count], 'password': BENCHMARK_PASSWORD},
+                content_type='application/json'
+            )
+            elapsed = time.perf_counter() - started
+            close_old_connections()
+            return response.status_code, elapsed
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(login, range(login_count)))
+            wall_time = time.perf_counter() - started
+        finally:
+            User.objects.filter(email__in=emails).delete()
+
+        failures = sum(1 for status_code, _ in results if status_code != 200)
+        latencies = sorted(elapsed for _, elapsed in results)
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+
+        self.stdout.write(
+            f'{hasher}: {login_count / wall_time:.1f} logins/s, '
+            f'p50 {p50:.1f} ms, p95 {p95:.1f} ms, {failures} failures '
+            f'(concurrency {concurrency}, {settings.PASSWORD_HASHING_WORKERS} hashing workers)'
+        )
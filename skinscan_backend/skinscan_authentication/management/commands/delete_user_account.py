@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from skinscan_authentication.deletion import DELETION_BATCH_SIZE, delete_user_account
+from skinscan_authentication.models import User
+
+
+class Command(BaseCommand):
+    help = 'Delete a user account and all of its data in batches, reporting progress'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the account to delete')
+        parser.add_argument(
+            '--batch-size', type=int, default=DELETION_BATCH_SIZE,
+            help='Number of rows deleted per statement'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['email']} does not exist")
+
+        # Block logins while the deletion is in progress
+        if user.is_active:
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+
+        def progress(label, deleted):
+            self.stdout.write(f'{label}: {deleted} deleted')
+
+        counts = delete_user_account(user.pk, batch_size=options['batch_size'], progress=progress)
+
+        summary = ', '.join(f'{label}={count}' for label, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Deleted {options['email']} ({summary})"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from skinscan_authentication.tokens import PRUNE_BATCH_SIZE, prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in batches (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=PRUNE_BATCH_SIZE,
+            help='Number of tokens deleted per transaction'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many tokens have expired')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = OutstandingToken.objects.filter(expires_at__lte=timezone.now()).count()
+            self.stdout.write(f'{count} expired tokens would be deleted')
+            return
+
+        def progress(outstanding, blacklisted):
+            self.stdout.write(f'{outstanding} tokens deleted ({blacklisted} blacklisted)')
+
+        outstanding, blacklisted = prune_expired_tokens(batch_size=options['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {outstanding} expired tokens and {blacklisted} blacklist entries'
+        ))
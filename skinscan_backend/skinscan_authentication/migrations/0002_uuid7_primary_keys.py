@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:04
+
+import skinscan_backend.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skinscan_authentication', '0001_initial'),
+    ]
+
+    # Only the Python-side default changes; the table is left alone
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='user',
+                    name='id',
+                    field=models.UUIDField(default=skinscan_backend.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -1,11 +1,12 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-import uuid
+
+from skinscan_backend.uuids import uuid7
 
 
 class User(AbstractUser):
     """Extended User model for SkinScan"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     email = models.EmailField(unique=True)
     first_name = models.CharField(max_length=30, blank=True)
     last_name = models.CharField(max_length=30, blank=True)
@@ -45,13 +46,17 @@ class User(AbstractUser):
 
     @property
     def total_messages_sent(self):  # Add this property
-        """Return total messages sent by user in chatbot"""
+        """Return total messages sent by user in chatbot, archived ones included"""
         try:
             from skinscan_chatbot.models import Message
-            return Message.objects.filter(
+            live = Message.objects.filter(
                 conversation__user=self,
                 message_type='user'
             ).count()
+            archived = self.conversations.aggregate(
+                archived=models.Sum('archived_user_message_count')
+            )['archived']
+            return live + (archived or 0)
         except:
             return 0
 
@@ -99,6 +104,40 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.email} Profile"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_dirty_fields(self):
+        """Return names of fields changed since the row was loaded, or None if unknown"""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        return [
+            field.name for field in self._meta.concrete_fields
+            if field.attname in loaded and getattr(self, field.attname) != loaded[field.attname]
+        ]
+
+    def save(self, *args, **kwargs):
+        """Write only changed fields, and skip the write if nothing changed"""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            dirty_fields = self.get_dirty_fields()
+            if dirty_fields is not None:
+                if not dirty_fields:
+                    return
+                kwargs['update_fields'] = dirty_fields + ['updated_at']
+
+        super().save(*args, **kwargs)
+
+        deferred_fields = self.get_deferred_fields()
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred_fields
+        }
+
     class Meta:
         verbose_name = 'User Profile'
         verbose_name_plural = 'User Profiles'
\ No newline at end of file
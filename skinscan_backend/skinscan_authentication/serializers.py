@@ -1,7 +1,11 @@
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework.validators import UniqueValidator
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from .models import User, UserProfile
+from .tokens import RefreshToken
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -14,22 +18,30 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             'email', 'username', 'password', 'password_confirm',
             'first_name', 'last_name', 'phone_number', 'date_of_birth'
         ]
+        # Replace the auto-generated unique checks so each runs only once
+        extra_kwargs = {
+            'email': {
+                'validators': [UniqueValidator(
+                    queryset=User.objects.all(),
+                    message="A user with this email already exists."
+                )]
+            },
+            'username': {
+                'validators': [
+                    UnicodeUsernameValidator(),
+                    UniqueValidator(
+                        queryset=User.objects.all(),
+                        message="A user with this username already exists."
+                    )
+                ]
+            },
+        }
 
     def validate(self, attrs):
         if attrs['password'] != attrs['password_confirm']:
             raise serializers.ValidationError("Password fields didn't match.")
         return attrs
 
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
-
-    def validate_username(self, value):
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("A user with this username already exists.")
-        return value
-
     def create(self, validated_data):
         validated_data.pop('password_confirm')
         user = User.objects.create_user(**validated_data)
@@ -104,10 +116,12 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         profile_data = validated_data.pop('profile_data', {})
 
-        # Update user fields
+        # Update user fields; only these columns are written, so a stale
+        # instance (e.g. a cached principal) cannot overwrite other changes
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        if validated_data:
+            instance.save(update_fields=[*validated_data, 'updated_at'])
 
         # Update profile fields
         if profile_data:
@@ -139,7 +153,7 @@ class PasswordChangeSerializer(serializers.Serializer):
     def save(self):
         user = self.context['request'].user
         user.set_password(self.validated_data['new_password'])
-        user.save()
+        user.save(update_fields=['password', 'updated_at'])
         return user
 
 
@@ -160,4 +174,9 @@ class PublicUserProfileSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'username', 'full_name', 'analysis_count', 'created_at'
         ]
-        read_only_fields = fields
\ No newline at end of file
+        read_only_fields = fields
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    # Checks revocation through the in-memory filter first
+    token_class = RefreshToken
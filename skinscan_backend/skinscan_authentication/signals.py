@@ -1,5 +1,7 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from skin_analysis.media import schedule_media_deletion
+from .authentication import invalidate_cached_user
 from .models import User, UserProfile
 
 
@@ -10,8 +12,14 @@ def create_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
 
 
+@receiver(post_delete, sender=User)
+def delete_profile_picture(sender, instance, **kwargs):
+    """Remove the profile picture file when a User is deleted"""
+    schedule_media_deletion(instance.profile_picture.name)
+
+
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Save UserProfile when User is saved"""
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
\ No newline at end of file
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Drop the cached auth principal on password change, deactivation or deletion"""
+    invalidate_cached_user(instance.pk)
@@ -0,0 +1,580 @@
+import csv
+import io
+import json
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from skin_analysis.models import SkinAnalysis
+from skinscan_chatbot.archive import archive_conversation
+from skinscan_backend.testing import AdminChangelistQueryMixin
+from skinscan_chatbot.models import ChatbotSession, Conversation, ConversationArchive, Message
+from . import hashers
+from .authentication import _user_cache_key
+from .deletion import delete_user_account
+from .models import User, UserProfile
+from .tokens import GENERATION_CACHE_KEY, BloomFilter, RefreshToken, prune_expired_tokens, revoked_tokens
+
+PASSWORD = 'Str0ng-Passw0rd!'
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AuthenticationQueryCountTests(TestCase):
+    """Login and registration must not write the profile row"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_registration_query_count(self):
+        # email check, username check, user INSERT, profile INSERT, outstanding token INSERT
+        with self.assertNumQueries(5):
+            response = self.client.post('/api/v1/auth/register/', {
+                'email': 'new@example.com',
+                'username': 'newuser',
+                'password': PASSWORD,
+                'password_confirm': PASSWORD,
+            }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(UserProfile.objects.filter(user__email='new@example.com').exists())
+
+    def test_login_makes_single_update(self):
+        User.objects.create_user(email='login@example.com', username='login', password=PASSWORD)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/v1/auth/login/', {
+                'email': 'login@example.com',
+                'password': PASSWORD,
+            }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        statements = [query['sql'] for query in queries.captured_queries]
+        # user SELECT, last_login UPDATE, outstanding token INSERT
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(sum(sql.startswith('UPDATE') for sql in statements), 1)
+        self.assertFalse(any('userprofile' in sql for sql in statements))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        # The principal cache is only used with a cache shared by all workers
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': cache_dir.name,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(email='jwt@example.com', username='jwt', password=PASSWORD)
+        self.access = str(RefreshToken.for_user(self.user).access_token)
+        self.client = APIClient()
+
+    def _get_profile(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/auth/profile/')
+        user_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'FROM "skinscan_authentication_user"' in query['sql']
+        ]
+        return response, user_queries
+
+    def test_second_request_skips_user_query(self):
+        response, user_queries = self._get_profile(self.access)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(user_queries), 1)
+
+        response, user_queries = self._get_profile(self.access)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_queries, [])
+
+    def test_local_memory_cache_loads_user_every_request(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            for _ in range(2):
+                response, user_queries = self._get_profile(self.access)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(user_queries), 1)
+            self.assertIsNone(cache.get(_user_cache_key(self.user.pk)))
+
+    def test_profile_update_from_stale_principal_keeps_other_columns(self):
+        self._get_profile(self.access)
+        # A change the cached copy has not seen
+        User.objects.filter(pk=self.user.pk).update(is_active=False, password='changed-elsewhere')
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        response = self.client.put('/api/v1/auth/profile/update/', {'first_name': 'Stale'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.first_name, 'Stale')
+        self.assertFalse(user.is_active)
+        self.assertEqual(user.password, 'changed-elsewhere')
+
+    def test_user_changes_drop_cached_entry(self):
+        key = _user_cache_key(self.user.pk)
+        changes = [
+            lambda user: (user.set_password('An0ther-Passw0rd!'), user.save()),
+            lambda user: (setattr(user, 'is_active', False), user.save()),
+            lambda user: user.delete(),
+        ]
+        for change in changes:
+            user = User.objects.get(pk=self.user.pk)
+            self._get_profile(str(RefreshToken.for_user(user).access_token))
+            self.assertIsNotNone(cache.get(key))
+
+            change(user)
+            self.assertIsNone(cache.get(key))
+            # Queryset updates bypass the signal and keep the cache empty
+            User.objects.filter(pk=self.user.pk).update(is_active=True)
+
+    def test_token_from_before_password_change_is_rejected(self):
+        self.assertEqual(self._get_profile(self.access)[0].status_code, 200)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        response = self.client.post('/api/v1/auth/password/change/', {
+            'current_password': PASSWORD,
+            'new_password': 'An0ther-Passw0rd!',
+            'new_password_confirm': 'An0ther-Passw0rd!',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        tokens = response.json()['tokens']
+
+        # The new access token caches the principal again
+        self.assertEqual(self._get_profile(tokens['access'])[0].status_code, 200)
+        self.assertIsNotNone(cache.get(_user_cache_key(self.user.pk)))
+        self.assertEqual(self._get_profile(self.access)[0].status_code, 401)
+
+        refresh = self.client.post('/api/v1/auth/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(refresh.status_code, 200)
+
+
+@override_settings(
+    PASSWORD_HASHERS=[
+        'skinscan_authentication.hashers.TunedPBKDF2PasswordHasher',
+        'skinscan_authentication.hashers.TunedScryptPasswordHasher',
+    ],
+    PASSWORD_HASHER_PARAMS={
+        'pbkdf2': {'iterations': 1000},
+        'scrypt': {'work_factor': 2 ** 4, 'block_size': 8, 'parallelism': 1},
+    },
+)
+class PasswordHasherTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='hasher@example.com', username='hasher', password=PASSWORD)
+
+    def _login(self, password):
+        return APIClient().post('/api/v1/auth/login/', {'email': self.user.email, 'password': password}, format='json')
+
+    def test_login_rehashes_legacy_hash(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password(PASSWORD, hasher='scrypt'))
+
+        self.assertEqual(self._login(PASSWORD).status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertEqual(self._login(PASSWORD).status_code, 200)
+
+    def test_login_upgrades_old_parameters(self):
+        params = {**settings.PASSWORD_HASHER_PARAMS, 'pbkdf2': {'iterations': 2000}}
+        with override_settings(PASSWORD_HASHER_PARAMS=params):
+            self.assertEqual(self._login(PASSWORD).status_code, 200)
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_hashes_run_on_bounded_pool(self):
+        # A fresh pool sized for this test
+        self.addCleanup(setattr, hashers, '_executor', None)
+        hashers._executor = None
+        active, peak, threads = [0], [0], set()
+        lock = threading.Lock()
+        call_in_pool = hashers._call_in_pool
+
+        def tracked(func, args):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+                threads.add(threading.current_thread().name)
+            try:
+                return call_in_pool(func, args)
+            finally:
+                with lock:
+                    active[0] -= 1
+
+        hasher = get_hasher('default')
+        encoded = self.user.password
+        with override_settings(PASSWORD_HASHING_WORKERS=1), mock.patch.object(hashers, '_call_in_pool', tracked):
+            with ThreadPoolExecutor(max_workers=4) as requests:
+                results = list(requests.map(
+                    lambda password: hasher.verify(password, encoded), [PASSWORD, 'wrong'] * 4
+                ))
+            self.assertEqual(self._login('wrong').status_code, 400)
+        hashers._executor.shutdown()
+
+        self.assertEqual(results, [True, False] * 4)
+        self.assertEqual(peak[0], 1)
+        self.assertTrue(threads and all(name.startswith('skinscan-hasher') for name in threads))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UserProfileDirtyTrackingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='profile@example.com', username='profile', password=PASSWORD)
+
+    def test_unchanged_profile_save_skips_write(self):
+        profile = UserProfile.objects.get(user=self.user)
+        with self.assertNumQueries(0):
+            profile.save()
+
+    def test_profile_save_writes_changed_fields_only(self):
+        profile = UserProfile.objects.get(user=self.user)
+        profile.bio = 'Sensitive skin'
+
+        with CaptureQueriesContext(connection) as queries:
+            profile.save()
+
+        self.assertEqual(len(queries.captured_queries), 1)
+        sql = queries.captured_queries[0]['sql']
+        self.assertIn('"bio"', sql)
+        self.assertNotIn('"location"', sql)
+        self.assertEqual(UserProfile.objects.get(user=self.user).bio, 'Sensitive skin')
+
+        # A second save without changes is a no-op
+        with self.assertNumQueries(0):
+            profile.save()
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AdminChangelistQueryTests(AdminChangelistQueryMixin, TestCase):
+    def _create_rows(self, count):
+        for i in range(count):
+            index = User.objects.count()
+            user = User.objects.create_user(
+                email=f'user{index}@example.com', username=f'user{index}', password=PASSWORD
+            )
+            SkinAnalysis.objects.create(user=user, image='skin_images/test.jpg')
+            Conversation.objects.create(user=user)
+
+    def test_user_changelist(self):
+        self._assert_bounded('/admin/skinscan_authentication/user/')
+
+    def test_user_profile_changelist(self):
+        self._assert_bounded('/admin/skinscan_authentication/userprofile/')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], BACKGROUND_TASKS_EAGER=True)
+class AccountDeletionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='delete@example.com', username='delete', password=PASSWORD)
+        self.other = User.objects.create_user(email='keep@example.com', username='keep', password=PASSWORD)
+        self.images = [
+            default_storage.save(f'skin_images/delete-{i}.png', ContentFile(b'image bytes')) for i in range(5)
+        ]
+        for image in self.images:
+            SkinAnalysis.objects.create(user=self.user, image=image, predicted_disease='Acne')
+        for i in range(3):
+            conversation = Conversation.objects.create(user=self.user, title=f'Chat {i}')
+            Message.objects.bulk_create([Message(conversation=conversation, content=str(n)) for n in range(4)])
+            ChatbotSession.objects.start(self.user, conversation)
+        archive_conversation(conversation.pk)
+
+        kept = Conversation.objects.create(user=self.other)
+        Message.objects.create(conversation=kept, content='Kept')
+        SkinAnalysis.objects.create(user=self.other, image='skin_images/keep.png')
+
+    def test_deletes_every_table_in_batches(self):
+        batches = []
+        with self.captureOnCommitCallbacks(execute=True):
+            counts = delete_user_account(self.user.pk, batch_size=2, progress=lambda *batch: batches.append(batch))
+
+        self.assertEqual(counts, {
+            'chatbot_sessions': 3, 'messages': 8, 'conversation_archives': 1, 'conversations': 3,
+            'skin_analyses': 5, 'profiles': 1, 'users': 1,
+        })
+        # Never more than batch_size rows per statement
+        self.assertEqual([deleted for label, deleted in batches if label == 'messages'], [2, 4, 6, 8])
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        for model, lookup in [
+            (SkinAnalysis, 'user'), (Conversation, 'user'), (ChatbotSession, 'user'),
+            (Message, 'conversation__user'), (ConversationArchive, 'conversation__user'),
+        ]:
+            self.assertFalse(model.objects.filter(**{f'{lookup}_id': self.user.pk}).exists(), model)
+        self.assertFalse(any(default_storage.exists(image) for image in self.images))
+
+        self.assertEqual(Message.objects.filter(conversation__user=self.other).count(), 1)
+        self.assertTrue(SkinAnalysis.objects.filter(user=self.other).exists())
+
+    def test_view_deactivates_and_enqueues_deletion(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with mock.patch('skinscan_authentication.views.enqueue') as enqueue:
+            response = client.delete('/api/v1/auth/delete-account/', {'password': PASSWORD}, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        enqueue.assert_called_once_with(delete_user_account, self.user.pk)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+    def test_view_requires_password(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with mock.patch('skinscan_authentication.views.enqueue') as enqueue:
+            response = client.delete('/api/v1/auth/delete-account/', {'password': 'wrong'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        enqueue.assert_not_called()
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class DataExportTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='export@example.com', username='export', password=PASSWORD)
+        self.user.profile.skin_type = 'dry'
+        self.user.profile.save()
+        other = User.objects.create_user(email='other@example.com', username='other', password=PASSWORD)
+        SkinAnalysis.objects.create(user=other, image='skin_images/other.png', predicted_disease='Acne')
+
+        image = default_storage.save('skin_images/export.png', ContentFile(b'\x89PNG image bytes'))
+        SkinAnalysis.objects.create(user=self.user, image=image, predicted_disease='Eczema', confidence_score=0.8)
+        self.conversation = self._conversation(4)
+        archived = self._conversation(2)
+        archive_conversation(archived.pk)
+        ChatbotSession.objects.start(self.user, self.conversation, response_time=1.5)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _conversation(self, count):
+        conversation = Conversation.objects.create(user=self.user, title='Dry skin, "flaky"')
+        for i in range(count):
+            Message.objects.create(
+                conversation=conversation, message_type='user' if i % 2 == 0 else 'assistant',
+                content=f'Message {i}, with a comma', user_context={'turn': i} if i % 2 else None
+            )
+        return conversation
+
+    def _export(self, query):
+        response = self.client.get(f'/api/v1/auth/export/{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        return b''.join(response.streaming_content)
+
+    def test_ndjson_contains_every_table(self):
+        records = [json.loads(line) for line in self._export('?type=ndjson').splitlines()]
+
+        types = [record['type'] for record in records]
+        self.assertEqual(types.count('account'), 1)
+        self.assertEqual(records[0]['profile']['skin_type'], 'dry')
+        self.assertEqual(types.count('analysis'), 1)
+        self.assertEqual(types.count('conversation'), 2)
+        self.assertEqual(types.count('message'), 6)
+        self.assertEqual(types.count('session'), 1)
+        contexts = [record['user_context'] for record in records if record['type'] == 'message']
+        self.assertEqual(contexts.count({'turn': 1}), 2)
+
+    def test_csv_table(self):
+        rows = list(csv.reader(io.StringIO(self._export('?type=csv&table=messages').decode())))
+        self.assertEqual(rows[0][:3], ['id', 'conversation_id', 'message_type'])
+        self.assertEqual(len(rows), 7)
+        self.assertIn('Message 0, with a comma', [row[3] for row in rows])
+
+        response = self.client.get('/api/v1/auth/export/?type=csv&table=users')
+        self.assertEqual(response.status_code, 400)
+
+    def test_zip_includes_tables_and_images(self):
+        archive = zipfile.ZipFile(io.BytesIO(self._export('?type=zip')))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(set(archive.namelist()), {
+            'account.json', 'analyses.csv', 'conversations.csv', 'messages.csv', 'sessions.csv',
+            'images/skin_images/export.png',
+        })
+        self.assertEqual(archive.read('images/skin_images/export.png'), b'\x89PNG image bytes')
+        conversations = list(csv.DictReader(io.StringIO(archive.read('conversations.csv').decode())))
+        self.assertEqual(conversations[0]['title'], 'Dry skin, "flaky"')
+
+        archive = zipfile.ZipFile(io.BytesIO(self._export('?type=zip&images=0')))
+        self.assertNotIn('images/skin_images/export.png', archive.namelist())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def export_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self._export('?type=ndjson')
+            return len(queries.captured_queries)
+
+        small = export_queries()
+        Message.objects.bulk_create([
+            Message(conversation=self.conversation, message_type='user', content='More') for _ in range(50)
+        ])
+        SkinAnalysis.objects.bulk_create([
+            SkinAnalysis(user=self.user, image='skin_images/more.png') for _ in range(20)
+        ])
+        self.assertEqual(export_queries(), small)
+
+    def test_unknown_type(self):
+        self.assertEqual(self.client.get('/api/v1/auth/export/?type=xml').status_code, 400)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        # The filter is only used with a cache shared between processes
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': cache_dir.name,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        revoked_tokens.reset()
+        self.addCleanup(revoked_tokens.reset)
+        self.user = User.objects.create_user(email='tokens@example.com', username='tokens', password=PASSWORD)
+        self.client = APIClient()
+
+    def _refresh(self, token):
+        return self.client.post('/api/v1/auth/token/refresh/', {'refresh': str(token)}, format='json')
+
+    def test_logout_revokes_refresh_token(self):
+        token = RefreshToken.for_user(self.user)
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/auth/logout/', {'refresh_token': str(token)}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self._refresh(token).status_code, 401)
+
+    def test_issued_tokens_are_outstanding(self):
+        token = RefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            rotated = self._refresh(token).json()['refresh']
+
+        jtis = set(OutstandingToken.objects.filter(user=self.user).values_list('jti', flat=True))
+        self.assertEqual(jtis, {token['jti'], RefreshToken(rotated)['jti']})
+
+    def test_rotation_revokes_previous_token(self):
+        token = RefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._refresh(token)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self._refresh(token).status_code, 401)
+        self.assertEqual(self._refresh(response.json()['refresh']).status_code, 200)
+
+    def test_refresh_after_rotation_skips_blacklist_reads(self):
+        token = str(RefreshToken.for_user(self.user))
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+                response = self._refresh(token)
+            self.assertEqual(response.status_code, 200)
+            token = response.json()['refresh']
+
+        # Only this process revoked tokens, so the filter needs no resync or
+        # EXISTS check; the queries left are the user check and the blacklist writes
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertFalse([sql for sql in statements if 'COUNT(' in sql or 'INNER JOIN' in sql])
+
+    def test_revocation_by_other_process_is_seen_on_next_check(self):
+        token = RefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._refresh(RefreshToken.for_user(self.user))
+
+        outstanding = OutstandingToken.objects.get(jti=token['jti'])
+        BlacklistedToken.objects.create(token=outstanding)
+        # Another process bumps the counter after this one's own bump
+        cache.incr(GENERATION_CACHE_KEY)
+
+        self.assertEqual(self._refresh(token).status_code, 401)
+
+    def test_local_memory_cache_always_checks_database(self):
+        token = RefreshToken.for_user(self.user)
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertFalse(revoked_tokens.is_enabled())
+            RefreshToken(str(token))
+
+            # Revoked elsewhere; no counter reaches this process
+            outstanding = OutstandingToken.objects.get(jti=token['jti'])
+            BlacklistedToken.objects.create(token=outstanding)
+
+            with self.assertRaises(TokenError):
+                RefreshToken(str(token))
+
+    def test_unrevoked_token_is_checked_without_queries(self):
+        RefreshToken.for_user(self.user).blacklist()
+        RefreshToken(str(RefreshToken.for_user(self.user)))  # loads the filter
+
+        token = str(RefreshToken.for_user(self.user))
+        with self.assertNumQueries(0):
+            RefreshToken(token)
+
+    def test_revocation_by_another_process_is_seen(self):
+        token = RefreshToken.for_user(self.user)
+        RefreshToken(str(token))
+
+        # Rows written by another process, which then bumps the shared counter
+        outstanding = OutstandingToken.objects.get(jti=token['jti'])
+        BlacklistedToken.objects.create(token=outstanding)
+        cache.add(GENERATION_CACHE_KEY, 1)
+
+        with self.assertRaises(TokenError):
+            RefreshToken(str(token))
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        members = [f'member-{i}' for i in range(1000)]
+        for member in members:
+            bloom.add(member)
+
+        self.assertTrue(all(member in bloom for member in members))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_prune_deletes_expired_tokens_in_batches(self):
+        now = timezone.now()
+        for i in range(5):
+            outstanding = OutstandingToken.objects.create(
+                user=self.user, jti=f'expired-{i}', token='', expires_at=now - timedelta(minutes=1)
+            )
+            if i % 2:
+                BlacklistedToken.objects.create(token=outstanding)
+        live = OutstandingToken.objects.create(user=self.user, jti='live', token='', expires_at=now + timedelta(days=1))
+        BlacklistedToken.objects.create(token=live)
+
+        batches = []
+        counts = prune_expired_tokens(batch_size=2, now=now, progress=lambda *counts: batches.append(counts))
+
+        self.assertEqual(counts, (5, 2))
+        self.assertEqual(batches, [(2, 1), (4, 2), (5, 2)])
+        self.assertQuerySetEqual(OutstandingToken.objects.values_list('jti', flat=True), ['live'])
+        self.assertEqual(BlacklistedToken.objects.get().token_id, live.pk)
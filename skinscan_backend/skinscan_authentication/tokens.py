@@ -0,0 +1,188 @@
+"""
+Refresh tokens with an in-memory revocation filter, and blacklist pruning.
+
+simplejwt checks every refresh against the blacklist with a join over
+BlacklistedToken and OutstandingToken, and both tables grow with every
+rotation. Here each process keeps a Bloom filter of the blacklisted token
+ids (jti): a token the filter has never seen is definitely not revoked and
+is accepted without a query; only possible matches (real ones or ~1% false
+positives) go to the database.
+
+Blacklisting a token adds it to the local filter and, once committed, bumps
+a generation counter in the TOKEN_BLACKLIST_CACHE_ALIAS cache; other
+processes see the new generation on their next check and load the rows
+added since their last sync. A process whose own bump is the only change
+already has the token in its filter and skips the resync, so rotating
+refresh tokens does not cost a blacklist read per refresh. The filter also
+resyncs every TOKEN_BLACKLIST_FILTER_SYNC_SECONDS in case the counter is
+evicted.
+
+The counter only reaches other processes through a shared cache. With a
+per-process backend (locmem, dummy) a revocation would go unnoticed
+elsewhere until the next timed resync, so the filter is not used and every
+check goes to the database. The default CACHE_BACKEND is LocMemCache, so
+the filter only takes effect once a shared backend (Redis, Memcached, file)
+is configured.
+
+Every issued refresh token is still recorded as an OutstandingToken, so a
+user's sessions can be listed and revoked. Expired rows of both tables are
+removed in batches by prune_expired_tokens(), which bounds their growth.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+GENERATION_CACHE_KEY = 'auth:token-blacklist:generation'
+MIN_FILTER_CAPACITY = 1024
+PRUNE_BATCH_SIZE = 1000
+
+
+class BloomFilter:
+    """Set membership with no false negatives and a bounded false positive rate"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevokedTokenFilter:
+    """Per-process Bloom filter over the jtis of blacklisted tokens"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._filter = None
+        self._last_id = 0
+        self._generation = None
+        self._synced_at = 0.0
+
+    def _cache(self):
+        return caches[settings.TOKEN_BLACKLIST_CACHE_ALIAS]
+
+    def is_enabled(self):
+        """Whether revocations in other processes can reach this one"""
+        return not isinstance(self._cache(), (LocMemCache, DummyCache))
+
+    def might_be_revoked(self, jti):
+        """False if jti is definitely not blacklisted"""
+        if not self.is_enabled():
+            return True
+        self._sync()
+        return jti in self._filter
+
+    def add(self, jti):
+        """Record a token blacklisted by this process and tell the others"""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+        transaction.on_commit(self._bump_generation)
+
+    def _bump_generation(self):
+        cache = self._cache()
+        try:
+            generation = cache.incr(GENERATION_CACHE_KEY)
+        except ValueError:
+            generation = 1 if cache.add(GENERATION_CACHE_KEY, 1, None) else cache.incr(GENERATION_CACHE_KEY)
+
+        with self._lock:
+            # Nobody else revoked anything since our last sync: the filter
+            # already has this process's token, so there is nothing to load
+            if self._filter is not None and generation == (self._generation or 0) + 1:
+                self._generation = generation
+
+    def _sync(self):
+        generation = self._cache().get(GENERATION_CACHE_KEY)
+        stale = time.monotonic() - self._synced_at >= settings.TOKEN_BLACKLIST_FILTER_SYNC_SECONDS
+        if self._filter is not None and generation == self._generation and not stale:
+            return
+
+        with self._lock:
+            rows = BlacklistedToken.objects.filter(id__gt=self._last_id).order_by('id') \
+                .values_list('id', 'token__jti')
+            if self._filter is None or self._filter.count + rows.count() > self._filter.capacity:
+                # (Re)build at twice the current size; pruned tokens drop out here
+                rows = BlacklistedToken.objects.order_by('id').values_list('id', 'token__jti')
+                self._filter = BloomFilter(
+                    max(MIN_FILTER_CAPACITY, 2 * rows.count()), settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE
+                )
+            for row_id, jti in rows.iterator(chunk_size=10000):
+                self._filter.add(jti)
+                self._last_id = max(self._last_id, row_id)
+            self._generation = generation
+            self._synced_at = time.monotonic()
+
+
+revoked_tokens = RevokedTokenFilter()
+
+
+class RefreshToken(tokens.RefreshToken):
+    """RefreshToken checked against revoked_tokens before the blacklist table"""
+
+    def check_blacklist(self):
+        if revoked_tokens.might_be_revoked(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        revoked_tokens.add(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+
+def prune_expired_tokens(batch_size=PRUNE_BATCH_SIZE, now=None, progress=None):
+    """
+    Delete expired outstanding tokens and their blacklist entries.
+
+    Expired tokens fail signature validation anyway, so their rows are dead.
+    Rows are deleted batch_size at a time in primary key order, each batch in
+    its own transaction. Returns (outstanding, blacklisted) deleted counts.
+    """
+    expired = OutstandingToken.objects.filter(expires_at__lte=now or timezone.now()) \
+        .order_by('pk').values_list('pk', flat=True)
+    last_pk = 0
+    counts = [0, 0]
+
+    while True:
+        ids = list(expired.filter(pk__gt=last_pk)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            blacklisted = BlacklistedToken.objects.filter(token_id__in=ids)
+            counts[1] += blacklisted._raw_delete(blacklisted.db)
+            outstanding = OutstandingToken.objects.filter(pk__in=ids)
+            counts[0] += outstanding._raw_delete(outstanding.db)
+        last_pk = ids[-1]
+        if progress:
+            progress(*counts)
+
+    return tuple(counts)
@@ -9,6 +9,7 @@ from .views import (
     PasswordChangeView,
     UserAnalysisHistoryView,
     UserDashboardView,
+    DataExportView,
     DeleteAccountView
 )
 
@@ -29,6 +30,7 @@ urlpatterns = [
     # User data and history
     path('dashboard/', UserDashboardView.as_view(), name='user-dashboard'),
     path('history/', UserAnalysisHistoryView.as_view(), name='user-analysis-history'),
+    path('export/', DataExportView.as_view(), name='data-export'),
 
     # Account management
     path('delete-account/', DeleteAccountView.as_view(), name='delete-account'),
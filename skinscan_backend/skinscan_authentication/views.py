@@ -2,14 +2,20 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.contrib.auth import login, logout
 from django.db.models import Count, Q, Avg
 from django.db import models
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from datetime import datetime, timedelta
 
+from skinscan_backend.routers import ReplicaReadMixin
+from skinscan_backend.tasks import enqueue
+from . import export
+from .deletion import delete_user_account
 from .models import User, UserProfile
+from .tokens import RefreshToken
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
@@ -71,8 +77,8 @@ class UserLoginView(APIView):
             refresh = RefreshToken.for_user(user)
             access_token = refresh.access_token
 
-            # Update last login
-            user.last_login = datetime.now()
+            # Update last login (the profile row is not touched)
+            user.last_login = timezone.now()
             user.save(update_fields=['last_login'])
 
             return Response({
@@ -172,10 +178,18 @@ class PasswordChangeView(APIView):
         )
 
         if serializer.is_valid():
-            serializer.save()
+            user = serializer.save()
+
+            # Tokens issued before the change are revoked, so issue new ones
+            refresh = RefreshToken.for_user(user)
+
             return Response({
                 'success': True,
-                'message': 'Password changed successfully'
+                'message': 'Password changed successfully',
+                'tokens': {
+                    'access': str(refresh.access_token),
+                    'refresh': str(refresh),
+                }
             }, status=status.HTTP_200_OK)
 
         return Response({
@@ -271,7 +285,7 @@ class UserAnalysisHistoryView(APIView):
         }
 
 
-class UserDashboardView(APIView):
+class UserDashboardView(ReplicaReadMixin, APIView):
     """User dashboard with overview information"""
     permission_classes = [IsAuthenticated]
 
@@ -364,10 +378,10 @@ class UserDashboardView(APIView):
     def _get_chatbot_statistics(self, user):
         """Get chatbot statistics for dashboard"""
         try:
-            from skinscan_chatbot.models import Conversation, Message
+            from skinscan_chatbot.models import Conversation
 
             total_conversations = Conversation.objects.filter(user=user).count()
-            total_messages = Message.objects.filter(conversation__user=user, message_type='user').count()
+            total_messages = user.total_messages_sent
 
             # Recent activity (last 7 days)
             week_ago = datetime.now() - timedelta(days=7)
@@ -390,6 +404,42 @@ class UserDashboardView(APIView):
             }
 
 
+class DataExportView(APIView):
+    """Download all of the user's data as a stream"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        # ?format= is taken by DRF's renderer selection
+        export_type = request.GET.get('type', 'ndjson')
+        filename = f"skinscan-export-{timezone.localdate().isoformat()}"
+
+        if export_type == 'ndjson':
+            response = StreamingHttpResponse(export.stream_ndjson(user), content_type='application/x-ndjson')
+            filename += '.ndjson'
+        elif export_type == 'csv':
+            table = request.GET.get('table', 'analyses')
+            if table not in export.TABLES:
+                return Response({
+                    'success': False,
+                    'error': f"table must be one of {', '.join(export.TABLES)}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+            response = StreamingHttpResponse(export.stream_csv(user, table), content_type='text/csv; charset=utf-8')
+            filename += f'-{table}.csv'
+        elif export_type == 'zip':
+            include_images = request.GET.get('images', '1') not in ('0', 'false')
+            response = StreamingHttpResponse(export.stream_zip(user, include_images), content_type='application/zip')
+            filename += '.zip'
+        else:
+            return Response({
+                'success': False,
+                'error': 'type must be ndjson, csv or zip'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
 class DeleteAccountView(APIView):
     """Delete user account"""
     permission_classes = [IsAuthenticated]
@@ -405,11 +455,13 @@ class DeleteAccountView(APIView):
                 'error': 'Password confirmation required'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Delete user (this will cascade to related objects)
-        user_email = user.email
-        user.delete()
+        # Deactivate now and delete the data in the background, so the
+        # request does not scale with how much data the user has
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        enqueue(delete_user_account, user.pk)
 
         return Response({
             'success': True,
-            'message': f'Account {user_email} has been permanently deleted'
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+            'message': f'Account {user.email} has been scheduled for permanent deletion'
+        }, status=status.HTTP_202_ACCEPTED)
\ No newline at end of file
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class SkinscanBackendConfig(AppConfig):
+    name = 'skinscan_backend'
+    verbose_name = 'SkinScan Backend'
+
+    def ready(self):
+        import skinscan_backend.db
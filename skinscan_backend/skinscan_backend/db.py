@@ -0,0 +1,21 @@
+"""
+Per-connection database setup.
+
+SQLite settings such as synchronous, busy_timeout and cache_size only last
+for the connection that set them, so they are applied from the
+connection_created signal every time Django opens a connection.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS to each new SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,137 @@
+"""
+Reproducible randomness and simulated latency for the dummy AI services.
+
+Each service (settings.DUMMY_AI_SERVICES['predictor'] / ['chatbot']) gets a
+random.Random for its outputs and a LatencyModel for its inference time.
+With a seed, a single-threaded sequence of calls gives the same predictions,
+responses and delays on every run; under concurrency the draws are handed
+out in request order.
+
+Latency distributions:
+    zero       no delay
+    fixed      latency_seconds
+    uniform    latency_low to latency_high (the original 1-3 s)
+    lognormal  exp(N(lognormal_mu, lognormal_sigma)), a long-tailed
+               model-serving latency; the median is exp(mu)
+
+mode 'sleep' releases the GIL while waiting, like a call to a remote model
+server. mode 'cpu' burns the time in a pure-Python loop that holds the GIL,
+like in-process compute-bound inference, so load tests show the contention
+real models would cause.
+"""
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+LATENCY_DISTRIBUTIONS = ('zero', 'fixed', 'uniform', 'lognormal')
+LATENCY_MODES = ('sleep', 'cpu')
+
+_services = {}
+_lock = threading.Lock()
+
+
+def burn_cpu(seconds):
+    """Keep the interpreter busy (and the GIL held) for about seconds"""
+    deadline = time.perf_counter() + seconds
+    x = 1
+    while time.perf_counter() < deadline:
+        for _ in range(1000):
+            x = (x * 1103515245 + 12345) & 0x7fffffff
+    return x
+
+
+class LatencyModel:
+    """Samples inference latencies and waits for them"""
+
+    def __init__(self, distribution='uniform', seconds=1.0, low=1.0, high=3.0, mu=0.5, sigma=0.4,
+                 mode='sleep', rng=None):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ImproperlyConfigured(
+                f"Unknown dummy AI latency '{distribution}'; use one of {', '.join(LATENCY_DISTRIBUTIONS)}"
+            )
+        if mode not in LATENCY_MODES:
+            raise ImproperlyConfigured(f"Unknown dummy AI mode '{mode}'; use one of {', '.join(LATENCY_MODES)}")
+        self.distribution = distribution
+        self.seconds = seconds
+        self.low = low
+        self.high = high
+        self.mu = mu
+        self.sigma = sigma
+        self.mode = mode
+        self.random = rng or random.Random()
+
+    def sample(self):
+        """Draw one latency in seconds"""
+        if self.distribution == 'zero':
+            return 0.0
+        if self.distribution == 'fixed':
+            return self.seconds
+        if self.distribution == 'uniform':
+            return self.random.uniform(self.low, self.high)
+        return self.random.lognormvariate(self.mu, self.sigma)
+
+    def wait(self):
+        """Sample a latency and spend it; returns the sampled seconds"""
+        seconds = self.sample()
+        if seconds > 0:
+            if self.mode == 'cpu':
+                burn_cpu(seconds)
+            else:
+                time.sleep(seconds)
+        return seconds
+
+    def median(self):
+        if self.distribution == 'zero':
+            return 0.0
+        if self.distribution == 'fixed':
+            return self.seconds
+        if self.distribution == 'uniform':
+            return (self.low + self.high) / 2
+        return math.exp(self.mu)
+
+
+class FakeInference:
+    """The random source and latency model of one dummy AI service"""
+
+    def __init__(self, seed=None, latency='uniform', latency_seconds=1.0, latency_low=1.0, latency_high=3.0,
+                 lognormal_mu=0.5, lognormal_sigma=0.4, mode='sleep'):
+        self.seed = seed
+        # Separate streams, so changing the latency settings does not change the outputs
+        self.random = random.Random(seed)
+        self.latency = LatencyModel(
+            latency, latency_seconds, latency_low, latency_high, lognormal_mu, lognormal_sigma, mode,
+            rng=random.Random(None if seed is None else f'latency-{seed}'),
+        )
+
+
+def get_fake_inference(service):
+    """FakeInference for service, built from settings.DUMMY_AI_SERVICES on first use"""
+    inference = _services.get(service)
+    if inference is None:
+        with _lock:
+            inference = _services.get(service)
+            if inference is None:
+                inference = _services[service] = FakeInference(**settings.DUMMY_AI_SERVICES[service])
+    return inference
+
+
+def latency_settings(latency, **options):
+    """DUMMY_AI_SERVICES with every service switched to latency, for override_settings"""
+    return {
+        service: {**config, 'latency': latency, **options}
+        for service, config in settings.DUMMY_AI_SERVICES.items()
+    }
+
+
+@receiver(setting_changed)
+def reset_fake_inference(setting, **kwargs):
+    """Rebuild (and reseed) the services when the settings are overridden"""
+    if setting == 'DUMMY_AI_SERVICES':
+        with _lock:
+            _services.clear()
@@ -0,0 +1,108 @@
+"""
+Model fields shared across apps.
+"""
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+from django.utils.functional import cached_property
+
+# FDICT bit of the zlib header: the stream needs a preset dictionary
+_ZLIB_FDICT = 0x20
+
+
+class CompressedPayload(bytes):
+    """Column value loaded from the database and not decoded yet"""
+
+
+class CompressedJSONDescriptor(DeferredAttribute):
+    """Decode the stored payload on first access and keep the result"""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedPayload):
+            value = self.field.decompress(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        # A data descriptor, so reads are not short-circuited by instance.__dict__
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedJSONField(models.BinaryField):
+    """
+    JSON value stored as zlib-compressed binary.
+
+    Rows are only decompressed when the attribute is read, so querysets that
+    load the column but never touch it pay no decoding cost, and saving an
+    instance whose value was not read writes the stored bytes back as-is.
+    ``dictionary`` is a callable returning a preset zlib dictionary of
+    strings common to the stored documents, which makes small values
+    compress well. Rows written with a different dictionary cannot be read,
+    so it may only be extended by adding a new field and converting.
+    """
+    descriptor_class = CompressedJSONDescriptor
+    description = 'JSON stored as compressed binary'
+
+    def __init__(self, *args, dictionary=None, level=6, **kwargs):
+        self.dictionary = dictionary
+        self.level = level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.dictionary is not None:
+            kwargs['dictionary'] = self.dictionary
+        if self.level != 6:
+            kwargs['level'] = self.level
+        return name, path, args, kwargs
+
+    @cached_property
+    def zdict(self):
+        return self.dictionary() if self.dictionary is not None else None
+
+    def compress(self, value):
+        payload = json.dumps(
+            value, cls=DjangoJSONEncoder, separators=(',', ':'), ensure_ascii=False
+        ).encode('utf-8')
+        if self.zdict:
+            compressor = zlib.compressobj(self.level, zdict=self.zdict)
+        else:
+            compressor = zlib.compressobj(self.level)
+        return compressor.compress(payload) + compressor.flush()
+
+    def decompress(self, data):
+        data = bytes(data)
+        if data[1] & _ZLIB_FDICT:
+            decompressor = zlib.decompressobj(zdict=self.zdict)
+        else:
+            decompressor = zlib.decompressobj()
+        return json.loads(decompressor.decompress(data) + decompressor.flush())
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return CompressedPayload(value)
+
+    def pre_save(self, model_instance, add):
+        # Bypass the descriptor so an unread payload is written back without decoding
+        return model_instance.__dict__.get(self.attname)
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        if isinstance(value, CompressedPayload):
+            return bytes(value)
+        return self.compress(value)
+
+    def to_python(self, value):
+        # Values are JSON documents, not raw bytes
+        return value
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
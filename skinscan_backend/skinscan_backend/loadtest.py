@@ -0,0 +1,319 @@
+"""
+Synthetic data and concurrent user flows for load testing.
+
+seed_load_data fills the database with synthetic users, analyses,
+conversations and messages in bulk; run_load_test drives the
+register -> login -> analyze -> history -> start-chat -> send-message ->
+dashboard flow from concurrent virtual users, against a running server or
+in process, and reports throughput and latency percentiles per endpoint.
+
+Run the server with a DUMMY_AI_SEED and a fixed or seeded latency
+(DUMMY_AI_LATENCY, see settings.DUMMY_AI_SERVICES) so the fake inference
+behaves the same on every run and results can be compared across commits.
+"""
+import http.client
+import io
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import close_old_connections, transaction
+from django.test import Client
+from PIL import Image
+
+from skin_analysis.models import SkinAnalysis
+from skinscan_authentication.deletion import DELETION_BATCH_SIZE, delete_users
+from skinscan_authentication.models import User, UserProfile
+from skinscan_chatbot.models import Conversation, Message
+
+LOAD_TEST_DOMAIN = 'loadtest.example.com'
+LOAD_TEST_PASSWORD = 'Load-Test-Passw0rd!'
+
+FLOW_STEPS = ['register', 'login', 'analyze', 'history', 'start-chat', 'send-message', 'dashboard']
+
+DISEASES = ['Acne', 'Eczema', 'Psoriasis', 'Dermatitis', 'Rosacea', 'Hives', 'Vitiligo', 'Normal Skin']
+USER_MESSAGES = [
+    'I have a dry, itchy rash on my elbows that gets worse after showering.',
+    'My face gets red and flushed after drinking coffee. Is that rosacea?',
+    'I keep getting breakouts on my chin before exams.',
+    'There are thick silvery patches on my knees.',
+    'How often should I apply sunscreen?',
+]
+ASSISTANT_MESSAGES = [
+    'Dry, itchy patches are common with eczema. Use fragrance-free moisturizers right after showering.',
+    'Rosacea involves facial redness and sensitivity. Identify and avoid triggers like hot drinks.',
+    'Acne can be managed with gentle cleansers and non-comedogenic products.',
+    'Psoriasis causes thick, scaly patches. Keep the skin moisturized and manage stress.',
+    'Reapply broad-spectrum sunscreen every two hours when outdoors.',
+]
+
+
+def clear_load_data(batch_size=500):
+    """
+    Delete every user created by seeding or by load test flows, with their data.
+
+    Users are deleted batch_size at a time through the chunked account
+    deletion, so the collector never loads a whole load-test data set.
+    Returns the number of rows deleted.
+    """
+    user_ids = User.objects.filter(email__endswith=f'@{LOAD_TEST_DOMAIN}').order_by('pk').values_list('pk', flat=True)
+    deleted = 0
+    while batch := list(user_ids[:batch_size]):
+        counts = delete_users(batch, batch_size=DELETION_BATCH_SIZE, progress=lambda label, count: None)
+        deleted += sum(counts.values())
+    return deleted
+
+
+def seed_load_data(users, analyses_per_user=5, conversations_per_user=2, messages_per_conversation=10,
+                   batch_size=500, seed=0, progress=None):
+    """
+    Bulk-create synthetic users and their analyses, conversations and messages.
+
+    Content is drawn from a random.Random(seed), so equal arguments give
+    equal data. Users are committed batch_size at a time, so large runs
+    (millions of rows) keep memory flat and can be interrupted. Returns the
+    number of rows created per model.
+    """
+    rng = random.Random(seed)
+    # One hash for every account; hashing a million passwords would dominate seeding
+    password = make_password(LOAD_TEST_PASSWORD)
+    first = User.objects.filter(email__startswith='seed-', email__endswith=f'@{LOAD_TEST_DOMAIN}').count()
+    counts = {'users': 0, 'analyses': 0, 'conversations': 0, 'messages': 0}
+
+    for start in range(first, first + users, batch_size):
+        stop = min(start + batch_size, first + users)
+        with transaction.atomic():
+            batch = User.objects.bulk_create([
+                User(email=f'seed-{i}@{LOAD_TEST_DOMAIN}', username=f'loadtest-seed-{i}', password=password)
+                for i in range(start, stop)
+            ])
+            UserProfile.objects.bulk_create([UserProfile(user=user) for user in batch])
+
+            analyses = SkinAnalysis.objects.bulk_create([
+                SkinAnalysis(
+                    user=user,
+                    image='skin_images/loadtest.png',
+                    predicted_disease=rng.choice(DISEASES),
+                    confidence_score=round(rng.uniform(0.4, 0.95), 4),
+                    processing_time=round(rng.uniform(0.5, 3), 3),
+                    image_size='512x512',
+                    file_size=rng.randint(50_000, 5_000_000),
+                )
+                for user in batch for _ in range(analyses_per_user)
+            ], batch_size=batch_size)
+
+            conversations = Conversation.objects.bulk_create([
+                Conversation(user=user, title=rng.choice(['', 'Skin question', 'Follow-up']))
+                for user in batch for _ in range(conversations_per_user)
+            ], batch_size=batch_size)
+
+            messages = Message.objects.bulk_create([
+                Message(
+                    conversation=conversation,
+                    message_type='user' if i % 2 == 0 else 'assistant',
+                    content=rng.choice(USER_MESSAGES if i % 2 == 0 else ASSISTANT_MESSAGES),
+                    response_time=None if i % 2 == 0 else round(rng.uniform(0.5, 3), 3),
+                    confidence_score=None if i % 2 == 0 else round(rng.uniform(0.6, 0.95), 4),
+                )
+                for conversation in conversations for i in range(messages_per_conversation)
+            ], batch_size=batch_size)
+
+        counts['users'] += len(batch)
+        counts['analyses'] += len(analyses)
+        counts['conversations'] += len(conversations)
+        counts['messages'] += len(messages)
+        if progress:
+            progress(counts)
+
+    return counts
+
+
+def _png_bytes(size=256):
+    buffer = io.BytesIO()
+    Image.new('RGB', (size, size), (214, 160, 140)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class InProcessTransport:
+    """Requests through Django's test client, without a server"""
+
+    def request(self, method, path, data=None, files=None, token=None):
+        client = Client(raise_request_exception=False)
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        try:
+            if files:
+                uploads = {
+                    name: SimpleUploadedFile(f'{name}.png', content, 'image/png') for name, content in files.items()
+                }
+                response = client.post(path, {**(data or {}), **uploads}, **headers)
+            elif method == 'GET':
+                response = client.get(path, **headers)
+            else:
+                response = client.post(path, data or {}, content_type='application/json', **headers)
+            return response.status_code, response.content
+        finally:
+            close_old_connections()
+
+
+class HTTPTransport:
+    """Requests to a running server over one keep-alive connection per thread"""
+
+    def __init__(self, base_url, timeout=60):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == 'https'
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        if getattr(self._local, 'connection', None) is None:
+            connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self._local.connection = connection_class(self.host, timeout=self.timeout)
+        return self._local.connection
+
+    def request(self, method, path, data=None, files=None, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        body = None
+        if files:
+            boundary = uuid.uuid4().hex
+            body = _multipart(boundary, data or {}, files)
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        elif data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+
+        connection = self._connection()
+        try:
+            connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._local.connection = None
+            return 0, b''
+
+
+def _multipart(boundary, fields, files):
+    lines = []
+    for name, value in fields.items():
+        lines += [f'--{boundary}', f'Content-Disposition: form-data; name="{name}"', '', str(value)]
+    body = '\r\n'.join(lines).encode() + (b'\r\n' if lines else b'')
+    for name, content in files.items():
+        body += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{name}.png"\r\n'
+            'Content-Type: image/png\r\n\r\n'
+        ).encode() + content + b'\r\n'
+    return body + f'--{boundary}--\r\n'.encode()
+
+
+class LoadTest:
+    """
+    Run flows from concurrent virtual users and collect per-endpoint latencies.
+
+    Each flow registers a fresh account and walks through FLOW_STEPS; a flow
+    stops at its first failed step.
+    """
+
+    def __init__(self, transport, concurrency=8, flows=100, seed=0):
+        self.transport = transport
+        self.concurrency = concurrency
+        self.flows = flows
+        self.seed = seed
+        self.image = _png_bytes()
+        self._lock = threading.Lock()
+        self.samples = {step: [] for step in FLOW_STEPS}
+        self.errors = {step: 0 for step in FLOW_STEPS}
+        self.completed = 0
+
+    def _call(self, step, method, path, **kwargs):
+        started = time.perf_counter()
+        status_code, content = self.transport.request(method, path, **kwargs)
+        elapsed = time.perf_counter() - started
+
+        ok = 200 <= status_code < 300
+        with self._lock:
+            self.samples[step].append(elapsed)
+            if not ok:
+                self.errors[step] += 1
+        if not ok:
+            return None
+        try:
+            return json.loads(content or b'{}')
+        except ValueError:
+            return {}
+
+    def flow(self, index):
+        rng = random.Random(self.seed * 1_000_003 + index)
+        name = f'run-{uuid.uuid4().hex[:16]}'
+        email = f'{name}@{LOAD_TEST_DOMAIN}'
+
+        if self._call('register', 'POST', '/api/v1/auth/register/', data={
+            'email': email, 'username': name,
+            'password': LOAD_TEST_PASSWORD, 'password_confirm': LOAD_TEST_PASSWORD,
+        }) is None:
+            return
+        body = self._call('login', 'POST', '/api/v1/auth/login/', data={'email': email, 'password': LOAD_TEST_PASSWORD})
+        if body is None:
+            return
+        token = body['tokens']['access']
+
+        if self._call('analyze', 'POST', '/api/v1/skin-analysis/analyze/', files={'image': self.image}, token=token) is None:
+            return
+        if self._call('history', 'GET', '/api/v1/skin-analysis/history/', token=token) is None:
+            return
+        body = self._call('start-chat', 'POST', '/api/v1/chatbot/start-chat/', data={
+            'initial_message': rng.choice(USER_MESSAGES),
+        }, token=token)
+        if body is None:
+            return
+        if self._call('send-message', 'POST', '/api/v1/chatbot/send-message/', data={
+            'conversation_id': body['conversation']['id'], 'content': rng.choice(USER_MESSAGES),
+        }, token=token) is None:
+            return
+        if self._call('dashboard', 'GET', '/api/v1/auth/dashboard/', token=token) is None:
+            return
+
+        with self._lock:
+            self.completed += 1
+
+    def run(self):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            list(executor.map(self.flow, range(self.flows)))
+        return self.report(time.perf_counter() - started)
+
+    def report(self, wall_time):
+        endpoints = {}
+        for step in FLOW_STEPS:
+            samples = sorted(self.samples[step])
+            endpoints[step] = {
+                'requests': len(samples),
+                'errors': self.errors[step],
+                'throughput_rps': round(len(samples) / wall_time, 2),
+                **{f'p{p}_ms': _percentile(samples, p) for p in (50, 95, 99)},
+                'max_ms': round(samples[-1] * 1000, 2) if samples else None,
+            }
+        return {
+            'concurrency': self.concurrency,
+            'flows': self.flows,
+            'completed_flows': self.completed,
+            'seed': self.seed,
+            'wall_time_s': round(wall_time, 3),
+            'flows_per_s': round(self.completed / wall_time, 2),
+            'endpoints': endpoints,
+        }
+
+
+def _percentile(samples, percent):
+    """Nearest-rank percentile of sorted samples, in milliseconds"""
+    if not samples:
+        return None
+    return round(samples[max(math.ceil(percent / 100 * len(samples)) - 1, 0)] * 1000, 2)
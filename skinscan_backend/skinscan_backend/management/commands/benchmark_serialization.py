@@ -0,0 +1,165 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from skin_analysis.models import SkinAnalysis
+from skin_analysis.serializers import SkinAnalysisSerializer, SkinAnalysisValuesSerializer
+from skinscan_authentication.models import User
+from skinscan_backend import renderers
+from skinscan_chatbot.models import Conversation, Message
+from skinscan_chatbot.serializers import (
+    ConversationListSerializer,
+    ConversationListValuesSerializer,
+    ConversationSerializer,
+    MessageSerializer,
+    MessageValuesSerializer,
+)
+
+USER_MESSAGE = 'I have had a dry, itchy rash on my elbows for two weeks. It gets worse after showering.'
+ASSISTANT_MESSAGE = (
+    'Dry, itchy patches on the elbows are common with eczema (atopic dermatitis). '
+    'Try fragrance-free moisturizers right after showering, keep showers short and lukewarm, '
+    'and see a dermatologist if it spreads or does not improve within two weeks.'
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure JSON rendering time of ConversationSerializer and SkinAnalysisSerializer '
+        "payloads with DRF's stdlib renderer and the orjson renderer, and per-row "
+        'serialization time of the list ModelSerializers and their values() fast paths'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=60, help='Messages in the conversation payload')
+        parser.add_argument('--analyses', type=int, default=20, help='Analyses in the history payload')
+        parser.add_argument('--iterations', type=int, default=500, help='Renders per payload and renderer')
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stderr.write('orjson is not installed; the orjson renderer falls back to the stdlib')
+
+        # Build payloads from real rows, then roll them back
+        try:
+            with transaction.atomic():
+                user = self._create_rows(options['messages'], options['analyses'])
+                payloads = self._payloads(user)
+                self._benchmark_values_serializers(user, options['iterations'] // 10 or 1)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        stdlib, fast = JSONRenderer(), renderers.ORJSONRenderer()
+        for name, data in payloads.items():
+            expected = stdlib.render(data)
+            identical = fast.render(data) == expected
+            stdlib_time = self._time(stdlib, data, options['iterations'])
+            fast_time = self._time(fast, data, options['iterations'])
+
+            self.stdout.write(
+                f'{name}: {len(expected) / 1024:.1f} KiB, '
+                f'stdlib {stdlib_time * 1e6:.0f} us, orjson {fast_time * 1e6:.0f} us '
+                f'({stdlib_time / fast_time:.1f}x), identical output: {"yes" if identical else "no"}'
+            )
+
+    def _create_rows(self, message_count, analysis_count):
+        user = User.objects.create(email='bench-serialization@example.com', username='bench-serialization', password='!')
+        conversation = Conversation.objects.create(user=user, title='Itchy rash on elbows')
+        Message.objects.bulk_create([
+            Message(
+                conversation=conversation,
+                message_type='user' if i % 2 == 0 else 'assistant',
+                content=USER_MESSAGE if i % 2 == 0 else ASSISTANT_MESSAGE,
+                response_time=None if i % 2 == 0 else 1.84,
+                confidence_score=None if i % 2 == 0 else 0.87,
+            )
+            for i in range(message_count)
+        ])
+        SkinAnalysis.objects.bulk_create([
+            SkinAnalysis(
+                user=user,
+                image=f'skin_images/2026/01/01/bench_{i}.jpg',
+                predicted_disease='Eczema',
+                confidence_score=0.9134,
+                processing_time=2.31,
+                image_size='1920x1080',
+                file_size=482113,
+            )
+            for i in range(analysis_count)
+        ])
+        # Some more conversations for the list endpoint
+        for i in range(9):
+            other = Conversation.objects.create(user=user)
+            Message.objects.create(conversation=other, message_type='user', content=USER_MESSAGE)
+        return user
+
+    def _payloads(self, user):
+        conversation = Conversation.objects.get(user=user, title='Itchy rash on elbows')
+        request = Request(RequestFactory().get('/api/v1/analysis/history/'))
+        analyses = SkinAnalysis.objects.filter(user=user)
+        return {
+            'conversation detail': {
+                'success': True,
+                'conversation': ConversationSerializer(conversation, context={'request': request}).data,
+            },
+            'analysis history': {
+                'success': True,
+                'analyses': SkinAnalysisSerializer(analyses, many=True, context={'request': request}).data,
+            },
+            # What views build by hand: raw UUIDs and datetimes, no serializer
+            'raw values': {
+                'success': True,
+                'messages': list(conversation.messages.values('id', 'message_type', 'created_at', 'confidence_score')),
+            },
+        }
+
+    def _benchmark_values_serializers(self, user, iterations):
+        request = Request(RequestFactory().get('/api/v1/analysis/history/'))
+        context = {'request': request}
+        cases = [
+            ('analysis history', SkinAnalysis.objects.filter(user=user), SkinAnalysisSerializer, SkinAnalysisValuesSerializer),
+            ('conversation list', Conversation.objects.filter(user=user), ConversationListSerializer,
+             ConversationListValuesSerializer),
+            ('messages', Message.objects.filter(conversation__user=user), MessageSerializer, MessageValuesSerializer),
+        ]
+        renderer = JSONRenderer()
+
+        for name, queryset, serializer_class, values_class in cases:
+            # A fresh queryset each time; a reused one would serve its result cache
+            def model_serializer():
+                return serializer_class(queryset.all(), many=True, context=context).data
+
+            def values_serializer():
+                serializer = values_class(context=context)
+                return serializer.serialize(serializer.values(queryset))
+
+            rows = queryset.count()
+            identical = renderer.render(values_serializer()) == renderer.render(model_serializer())
+            model_time = self._time_call(model_serializer, iterations) / rows
+            values_time = self._time_call(values_serializer, iterations) / rows
+
+            self.stdout.write(
+                f'{name} ({rows} rows, queries included): ModelSerializer {model_time * 1e6:.1f} us/row, '
+                f'values() {values_time * 1e6:.1f} us/row ({model_time / values_time:.1f}x), '
+                f'identical output: {"yes" if identical else "no"}'
+            )
+
+    def _time_call(self, func, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - started) / iterations
+
+    def _time(self, renderer, data, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            renderer.render(data)
+        return (time.perf_counter() - started) / iterations
@@ -0,0 +1,110 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections, models, transaction
+from django.utils import timezone
+
+from skinscan_backend.uuids import uuid7
+
+KEY_FUNCTIONS = {'uuid4': uuid.uuid4, 'uuid7': uuid7}
+CONTENT = 'Dry, itchy patches on the elbows are common with eczema. Moisturize right after showering.'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure insert throughput into a message-shaped table keyed by uuid4 and by uuid7 '
+        'on the configured database (SQLite, or PostgreSQL with DB_ENGINE=postgresql). '
+        'Creates and drops its own benchmark_uuid_* tables; run it against a scratch database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Rows inserted per key type')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per transaction')
+        parser.add_argument(
+            '--key', action='append', dest='keys', choices=sorted(KEY_FUNCTIONS),
+            help='Key type to benchmark (repeatable, default: uuid4 and uuid7)'
+        )
+        parser.add_argument('--database', default='default', help='Database alias to benchmark')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark tables for inspection')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Unsupported database vendor {connection.vendor}')
+        self.stdout.write(f"{connection.vendor}: {options['rows']} rows per key, {options['batch_size']} per transaction")
+
+        for key in options['keys'] or ['uuid4', 'uuid7']:
+            table = f'benchmark_uuid_{key}'
+            self._create_table(connection, table)
+            try:
+                self._benchmark(connection, table, KEY_FUNCTIONS[key], options['rows'], options['batch_size'])
+            finally:
+                if not options['keep']:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+    def _create_table(self, connection, table):
+        # Same column types Django uses for Message
+        uuid_type = connection.data_types['UUIDField']
+        datetime_type = connection.data_types['DateTimeField']
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+            cursor.execute(
+                f'CREATE TABLE {table} (id {uuid_type} NOT NULL PRIMARY KEY, conversation_id {uuid_type} NOT NULL, '
+                f'created_at {datetime_type} NOT NULL, content text NOT NULL)'
+            )
+            cursor.execute(f'CREATE INDEX {table}_conversation ON {table} (conversation_id)')
+
+    def _benchmark(self, connection, table, new_key, row_count, batch_size):
+        uuid_field = models.UUIDField()
+        sql = f'INSERT INTO {table} (id, conversation_id, created_at, content) VALUES (%s, %s, %s, %s)'
+        conversations = [uuid_field.get_db_prep_value(uuid.uuid4(), connection) for _ in range(1000)]
+        started_at = timezone.now()
+        report_every = max(row_count // 10, batch_size)
+
+        inserted = interval_rows = 0
+        total_time = interval_time = 0.0
+        while inserted < row_count:
+            count = min(batch_size, row_count - inserted)
+            # Keys and rows are built before the clock starts
+            rows = [
+                (
+                    uuid_field.get_db_prep_value(new_key(), connection),
+                    conversations[(inserted + i) % len(conversations)],
+                    connection.ops.adapt_datetimefield_value(started_at + timedelta(milliseconds=inserted + i)),
+                    CONTENT,
+                )
+                for i in range(count)
+            ]
+            started = time.perf_counter()
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+            elapsed = time.perf_counter() - started
+
+            inserted += count
+            total_time += elapsed
+            interval_rows += count
+            interval_time += elapsed
+            if interval_rows >= report_every or inserted == row_count:
+                self.stdout.write(f'  {table}: {inserted} rows, {interval_rows / interval_time:.0f} rows/s')
+                interval_rows, interval_time = 0, 0.0
+
+        size = self._primary_key_size(connection, table)
+        self.stdout.write(self.style.SUCCESS(
+            f'{table}: {row_count / total_time:.0f} rows/s overall, {total_time:.1f} s'
+            + (f', primary key index {size / 2 ** 20:.1f} MiB' if size is not None else '')
+        ))
+
+    def _primary_key_size(self, connection, table):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT pg_relation_size(%s)', [f'{table}_pkey'])
+            else:
+                # dbstat is an optional SQLite extension
+                try:
+                    cursor.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [f'sqlite_autoindex_{table}_1'])
+                except DatabaseError:
+                    return None
+            return cursor.fetchone()[0]
@@ -0,0 +1,55 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from skinscan_backend.fake_inference import latency_settings
+from skinscan_backend.loadtest import HTTPTransport, InProcessTransport, LoadTest
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive register, login, analyze, history, start-chat, send-message and dashboard '
+        'flows concurrently and report throughput and p50/p95/p99 latency per endpoint as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            help='Server to test, e.g. http://127.0.0.1:8000 (default: run in process without a server)'
+        )
+        parser.add_argument('--flows', type=int, default=100, help='Total number of flows')
+        parser.add_argument('--concurrency', type=int, default=8, help='Number of concurrent virtual users')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the flow content')
+        parser.add_argument(
+            '--ai-latency', type=float,
+            help='Fixed dummy AI latency in seconds for in-process runs (servers use DUMMY_AI_SERVICES)'
+        )
+        parser.add_argument(
+            '--ai-mode', choices=['sleep', 'cpu'],
+            help='Spend the dummy AI latency sleeping or burning CPU, for in-process runs'
+        )
+        parser.add_argument('--output', help='Also write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        base_url = options['base_url']
+        transport = HTTPTransport(base_url) if base_url else InProcessTransport()
+        services = settings.DUMMY_AI_SERVICES
+        if options['ai_latency'] is not None:
+            services = latency_settings('fixed', latency_seconds=options['ai_latency'])
+        if options['ai_mode']:
+            services = {service: {**config, 'mode': options['ai_mode']} for service, config in services.items()}
+
+        load_test = LoadTest(transport, concurrency=options['concurrency'], flows=options['flows'], seed=options['seed'])
+        with override_settings(DUMMY_AI_SERVICES=services):
+            report = load_test.run()
+        report = {'target': base_url or 'in-process', **report}
+        if not base_url:
+            report['dummy_ai'] = services
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        self.stdout.write(output)
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from skinscan_backend.loadtest import clear_load_data, seed_load_data
+
+
+class Command(BaseCommand):
+    help = 'Create synthetic users, analyses, conversations and messages for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Number of users to create')
+        parser.add_argument('--analyses-per-user', type=int, default=5)
+        parser.add_argument('--conversations-per-user', type=int, default=2)
+        parser.add_argument('--messages-per-conversation', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=500, help='Users committed per transaction')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the generated content')
+        parser.add_argument('--clear', action='store_true', help='Delete existing load test data first')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(f'Deleted {clear_load_data()} rows of earlier load test data')
+
+        started = time.perf_counter()
+
+        def progress(counts):
+            self.stdout.write(f"  {counts['users']} users, {sum(counts.values())} rows", ending='\r')
+            self.stdout.flush()
+
+        counts = seed_load_data(
+            options['users'],
+            analyses_per_user=options['analyses_per_user'],
+            conversations_per_user=options['conversations_per_user'],
+            messages_per_conversation=options['messages_per_conversation'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            progress=progress if options['verbosity'] > 1 else None,
+        )
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s): "
+            + ', '.join(f'{count} {name}' for name, count in counts.items())
+        ))
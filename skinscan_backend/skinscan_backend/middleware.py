@@ -0,0 +1,203 @@
+import logging
+import re
+import time
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .routers import SAFE_METHODS, pin_to_primary
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pin users to the primary database after a write request.
+
+    Runs after the view so request.user is the user authenticated by DRF
+    (JWT authentication does not happen in middleware).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            pin_to_primary(getattr(request, 'user', None))
+        return response
+
+
+def _accepted_encodings(header):
+    """Content codings from an Accept-Encoding header that are not refused with q=0"""
+    accepted = set()
+    for part in header.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        try:
+            if match and float(match.group(1)) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip())
+    return accepted
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits 31: gzip container with a zero mtime
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        # Z_SYNC_FLUSH so the client can decode every chunk (SSE event) on arrival
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compress API responses with Brotli or gzip, as negotiated by Accept-Encoding.
+
+    Responses smaller than RESPONSE_COMPRESSION_MIN_SIZE are sent as they
+    are: below roughly one packet, compression costs CPU without saving a
+    round trip. Streaming responses (server-sent events) are flushed after
+    every chunk instead of being buffered until the stream ends. Every
+    compressed response reports its sizes and compression time in a
+    Server-Timing header and in a debug log line.
+
+    Brotli needs the brotli package; without it gzip is used. Endpoints in
+    RESPONSE_COMPRESSION_EXCLUDE_PATHS (those returning tokens) are never
+    compressed, as a BREACH mitigation.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = settings.RESPONSE_COMPRESSION_MIN_SIZE
+        self.gzip_level = settings.RESPONSE_COMPRESSION_GZIP_LEVEL
+        self.brotli_quality = settings.RESPONSE_COMPRESSION_BROTLI_QUALITY
+        self.content_types = set(settings.RESPONSE_COMPRESSION_CONTENT_TYPES)
+        self.exclude_paths = tuple(settings.RESPONSE_COMPRESSION_EXCLUDE_PATHS)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if (
+            content_type not in self.content_types
+            or response.has_header('Content-Encoding')
+            or request.path.startswith(self.exclude_paths)
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self._negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            self._compress_stream(request, response, encoding)
+            return response
+
+        if len(response.content) < self.min_size:
+            return response
+
+        started = time.perf_counter()
+        stream = self._stream(encoding)
+        compressed = stream.compress(response.content) + stream.finish()
+        elapsed = (time.perf_counter() - started) * 1000
+        if len(compressed) >= len(response.content):
+            return response
+
+        self._report(request, response, encoding, len(response.content), len(compressed), elapsed)
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+        self._weaken_etag(response)
+        return response
+
+    def _negotiate(self, header):
+        accepted = _accepted_encodings(header)
+        if brotli is not None and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    def _stream(self, encoding):
+        if encoding == 'br':
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.gzip_level)
+
+    def _compress_stream(self, request, response, encoding):
+        content = response.streaming_content
+        if response.is_async:
+            # Compression happens in the event loop; chunks are small events
+            response.streaming_content = self._compress_async(request, content, encoding)
+        else:
+            response.streaming_content = self._compress_sync(request, content, encoding)
+        del response.headers['Content-Length']
+        response.headers['Content-Encoding'] = encoding
+        self._weaken_etag(response)
+
+    def _compress_sync(self, request, content, encoding):
+        stream, sizes = self._stream(encoding), [0, 0, 0.0]
+        for chunk in content:
+            yield self._compress_chunk(stream, chunk, sizes)
+        yield self._finish_stream(request, stream, encoding, sizes)
+
+    async def _compress_async(self, request, content, encoding):
+        stream, sizes = self._stream(encoding), [0, 0, 0.0]
+        async for chunk in content:
+            yield self._compress_chunk(stream, chunk, sizes)
+        yield self._finish_stream(request, stream, encoding, sizes)
+
+    def _compress_chunk(self, stream, chunk, sizes):
+        started = time.perf_counter()
+        compressed = stream.compress(chunk)
+        sizes[0] += len(chunk)
+        sizes[1] += len(compressed)
+        sizes[2] += (time.perf_counter() - started) * 1000
+        return compressed
+
+    def _finish_stream(self, request, stream, encoding, sizes):
+        tail = stream.finish()
+        sizes[1] += len(tail)
+        # Headers are long gone; streamed responses are only logged
+        self._report(request, None, encoding, *sizes)
+        return tail
+
+    def _report(self, request, response, encoding, original, compressed, elapsed):
+        logger.debug(
+            '%s %s: %s %d -> %d bytes in %.2f ms',
+            request.method, request.path, encoding, original, compressed, elapsed
+        )
+        if response is not None:
+            timing = f'compress;dur={elapsed:.3f};desc="{encoding} {original}>{compressed}"'
+            existing = response.get('Server-Timing')
+            response.headers['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+
+    @staticmethod
+    def _weaken_etag(response):
+        # The compressed body is no longer byte-identical to the strong ETag
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
@@ -0,0 +1,82 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``. Reads go to a replica from
+DATABASE_REPLICAS only inside replica_reads(), which ReplicaReadMixin
+enters for GET requests to read-heavy views. A user whose last write is
+younger than READ_REPLICA_STICKY_SECONDS stays on the primary so they
+see their own changes despite replication lag; writes are recorded by
+ReplicaStickinessMiddleware. The pin lives in the cache, so use a shared
+CACHE_BACKEND when running several processes.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+_use_replica = ContextVar('use_replica', default=False)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _pin_key(user_id):
+    return f'db:pinned:{user_id}'
+
+
+def pin_to_primary(user):
+    """Serve this user's reads from the primary for the stickiness window"""
+    if settings.DATABASE_REPLICAS and user is not None and user.is_authenticated:
+        caches[settings.READ_REPLICA_CACHE_ALIAS].set(
+            _pin_key(user.pk), True, settings.READ_REPLICA_STICKY_SECONDS
+        )
+
+
+def is_pinned_to_primary(user):
+    if user is None or not user.is_authenticated:
+        return False
+    return caches[settings.READ_REPLICA_CACHE_ALIAS].get(_pin_key(user.pk), False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Route reads made inside the block to a replica"""
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive their schema through replication
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    """Serve GET requests of an APIView from a read replica"""
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads(False):
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        # Runs after authentication, so the stickiness check sees the user
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned_to_primary(request.user):
+            _use_replica.set(True)
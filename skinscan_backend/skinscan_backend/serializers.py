@@ -0,0 +1,125 @@
+"""
+Sparse fieldsets and values()-based read serializers for the API.
+
+Clients pass ``?fields=id,title,messages.id,messages.content_preview`` to
+receive only the listed fields; dotted names select fields of a nested
+serializer. The same selection is turned into ``.only()`` on the queryset,
+so columns nobody asked for are never read from the database.
+
+ValuesSerializer renders ``.values()`` rows exactly like a ModelSerializer
+renders instances, for list endpoints where building model instances and
+DRF's per-field attribute lookup dominate the response time.
+"""
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+
+def parse_fields(request, param='fields'):
+    """Return the field names requested with ?fields=, or None for all fields"""
+    value = request.query_params.get(param, '')
+    fields = {name.strip() for name in value.split(',') if name.strip()}
+    return fields or None
+
+
+def nested_fields(fields, name):
+    """Field names selected for the nested serializer at name (None for all)"""
+    if fields is None or name in fields:
+        return None
+    prefix = f'{name}.'
+    return {field[len(prefix):] for field in fields if field.startswith(prefix)} or None
+
+
+class SparseFieldsetMixin:
+    """
+    ModelSerializer mixin that keeps only the requested fields.
+
+    Meta.field_sources maps serializer fields that are not model fields of
+    the same name to the model fields they read, e.g.
+    ``{'is_user_message': ['message_type'], 'image_url': ['image']}``.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested_fields = fields
+        if fields is not None:
+            selected = {name.split('.', 1)[0] for name in fields}
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
+
+    @classmethod
+    def get_source_fields(cls, fields):
+        """Model fields needed to render the requested serializer fields"""
+        model = cls.Meta.model
+        model_fields = {field.name for field in model._meta.concrete_fields}
+        sources = getattr(cls.Meta, 'field_sources', {})
+        selected = {name.split('.', 1)[0] for name in fields} & set(cls.Meta.fields)
+
+        columns = {model._meta.pk.name}
+        for name in selected:
+            if name in sources:
+                columns.update(sources[name])
+            elif name in model_fields:
+                columns.add(name)
+        return columns
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        """Restrict queryset to the columns the requested fields read"""
+        if fields is None:
+            return queryset
+        return queryset.only(*cls.get_source_fields(fields))
+
+
+class ValuesSerializer:
+    """
+    Read-only fast path mirroring serializer_class over queryset.values() rows.
+
+    Model fields reuse the DRF field's to_representation; every other field
+    needs a ``represent_<name>(row)`` method. Output is identical to
+    ``serializer_class(..., many=True).data`` for the same rows.
+    """
+    serializer_class = None
+
+    def __init__(self, fields=None, context=None):
+        self.context = context or {}
+        serializer = self.serializer_class(fields=fields, context=self.context)
+        self.field_names = list(serializer.fields)
+        self.columns = self.serializer_class.get_source_fields(fields or set(self.serializer_class.Meta.fields))
+        self.representers = [
+            (name, getattr(self, f'represent_{name}', None) or self._model_field(name, field))
+            for name, field in serializer.fields.items()
+        ]
+
+    @staticmethod
+    def _model_field(name, field):
+        to_representation = field.to_representation
+
+        if isinstance(field, serializers.DateTimeField) and getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601:
+            # DateTimeField looks the current timezone up for every value; do it once
+            field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+            def represent_datetime(row):
+                value = row[name]
+                if value is None:
+                    return None
+                if field_timezone is None or value.tzinfo is None:
+                    return to_representation(value)
+                value = value.astimezone(field_timezone).isoformat()
+                return value[:-6] + 'Z' if value.endswith('+00:00') else value
+            return represent_datetime
+
+        def represent(row):
+            value = row[name]
+            return None if value is None else to_representation(value)
+        return represent
+
+    def values(self, queryset, *extra):
+        """queryset.values() with the columns the selected fields read"""
+        return queryset.values(*self.columns, *extra)
+
+    def to_representation(self, row):
+        return {name: represent(row) for name, represent in self.representers}
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
@@ -1,6 +1,8 @@
+import copy
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
 from datetime import timedelta
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -20,14 +22,19 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
+    'skinscan_backend',
     'skin_analysis',
     'skinscan_authentication',
-    'skinscan_chatbot'
+    'skinscan_chatbot',
+    'skinscan_analytics'
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Compresses the response after every other middleware is done with it
+    'skinscan_backend.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -35,6 +42,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'skinscan_backend.middleware.ReplicaStickinessMiddleware',
 ]
 
 ROOT_URLCONF = 'skinscan_backend.urls'
@@ -58,31 +66,144 @@ TEMPLATES = [
 WSGI_APPLICATION = 'skinscan_backend.wsgi.application'
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite is the development default; set DB_ENGINE=postgresql in production
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+
+if DB_ENGINE == 'postgresql':
+    # psycopg's built-in pool hands out warm connections per request; Django
+    # requires CONN_MAX_AGE=0 with it, so persistent connections are only
+    # used when the pool is disabled
+    DB_POOL = config('DB_POOL', default=True, cast=bool)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='skinscan'),
+            'USER': config('DB_USER', default='skinscan'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=60, cast=int),  # seconds
+            'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+        }
+    }
+    if DB_POOL:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),  # seconds to wait for a free connection
+        }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {
+                # IMMEDIATE takes the write lock up front so concurrent
+                # writers wait on the busy timeout instead of failing
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
     }
+else:
+    raise ImproperlyConfigured(f"Unsupported DB_ENGINE '{DB_ENGINE}', expected 'sqlite' or 'postgresql'")
+
+# Read replicas: comma-separated SQLite files or PostgreSQL hosts, exposed
+# as replica1, replica2, ... and used by ReplicaReadMixin views
+DATABASE_REPLICAS = []
+for index, replica in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = copy.deepcopy(DATABASES['default'])
+    DATABASES[alias]['HOST' if DB_ENGINE == 'postgresql' else 'NAME'] = replica
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['skinscan_backend.routers.PrimaryReplicaRouter']
+
+# After a write, a user's reads stay on the primary for this long
+READ_REPLICA_STICKY_SECONDS = config('READ_REPLICA_STICKY_SECONDS', default=10, cast=int)
+READ_REPLICA_CACHE_ALIAS = 'default'
+
+# Applied to every new SQLite connection (skinscan_backend.db). WAL lets
+# readers proceed while a write is in progress and, with synchronous=NORMAL,
+# only syncs at checkpoints instead of on every commit.
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=20000, cast=int),  # milliseconds
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-64000, cast=int),  # negative values are KiB
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),  # bytes
+    'temp_store': config('SQLITE_TEMP_STORE', default='MEMORY'),
 }
 
 # Custom User Model
 AUTH_USER_MODEL = 'skinscan_authentication.User'
 
 # REST Framework configuration
+# JSON encoding for the API: 'orjson' (falls back to the stdlib when orjson
+# is not installed) or 'stdlib' for DRF's own renderer and parser
+API_JSON_BACKEND = config('API_JSON_BACKEND', default='orjson')
+if API_JSON_BACKEND not in ('orjson', 'stdlib'):
+    raise ImproperlyConfigured(f"API_JSON_BACKEND must be 'orjson' or 'stdlib', not {API_JSON_BACKEND!r}")
+_JSON_CLASSES = {
+    'orjson': ('skinscan_backend.renderers.ORJSONRenderer', 'skinscan_backend.renderers.ORJSONParser'),
+    'stdlib': ('rest_framework.renderers.JSONRenderer', 'rest_framework.parsers.JSONParser'),
+}[API_JSON_BACKEND]
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'skinscan_authentication.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        _JSON_CLASSES[0],
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        _JSON_CLASSES[1],
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
 }
 
+# Response compression (skinscan_backend.middleware.CompressionMiddleware).
+# Levels favour latency over ratio: past gzip 5 and Brotli 4, JSON payloads
+# barely shrink while compression time keeps growing. Brotli needs the
+# brotli package; without it clients get gzip.
+RESPONSE_COMPRESSION_MIN_SIZE = config('RESPONSE_COMPRESSION_MIN_SIZE', default=1024, cast=int)  # bytes
+RESPONSE_COMPRESSION_GZIP_LEVEL = config('RESPONSE_COMPRESSION_GZIP_LEVEL', default=5, cast=int)
+RESPONSE_COMPRESSION_BROTLI_QUALITY = config('RESPONSE_COMPRESSION_BROTLI_QUALITY', default=4, cast=int)
+RESPONSE_COMPRESSION_CONTENT_TYPES = [
+    'application/json',
+    'text/event-stream',
+    'text/html',
+    'text/plain',
+]
+# Responses carrying tokens are not compressed (BREACH)
+RESPONSE_COMPRESSION_EXCLUDE_PATHS = config(
+    'RESPONSE_COMPRESSION_EXCLUDE_PATHS',
+    default='/api/v1/auth/login/,/api/v1/auth/register/,/api/v1/auth/token/refresh/,/api/v1/auth/password/change/',
+    cast=Csv()
+)
+
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='skinscan'),
+    }
+}
+
+# Authenticated user principals are cached to skip the per-request user query.
+# Only a shared CACHE_BACKEND (Redis, Memcached, file) enables it: the default
+# LocMemCache cannot see invalidations made by other workers.
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30, cast=int)  # seconds
+
 # JWT Configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -90,6 +211,7 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': True,
+    'CHECK_REVOKE_TOKEN': True,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
@@ -109,8 +231,19 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
+    'TOKEN_REFRESH_SERIALIZER': 'skinscan_authentication.serializers.TokenRefreshSerializer',
 }
 
+# Refresh tokens are checked against a per-process Bloom filter of revoked
+# tokens before the blacklist tables; see skinscan_authentication/tokens.py.
+# The cache carries the revocation counter between processes; with a
+# per-process cache (locmem, dummy) the filter is not used and every refresh
+# checks the database. That includes the default LocMemCache: set a shared
+# CACHE_BACKEND to enable the filter.
+TOKEN_BLACKLIST_CACHE_ALIAS = 'default'
+TOKEN_BLACKLIST_FILTER_SYNC_SECONDS = config('TOKEN_BLACKLIST_FILTER_SYNC_SECONDS', default=60, cast=int)
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = 0.01
+
 # File upload settings
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -119,6 +252,54 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5 * 1024 * 1024  # 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5 * 1024 * 1024  # 5MB
 
+# Background tasks
+BACKGROUND_TASK_WORKERS = config('BACKGROUND_TASK_WORKERS', default=4, cast=int)
+BACKGROUND_TASKS_EAGER = config('BACKGROUND_TASKS_EAGER', default=False, cast=bool)
+
+# Conversations idle for this many days (or closed) are moved to the message archive
+MESSAGE_ARCHIVE_AFTER_DAYS = config('MESSAGE_ARCHIVE_AFTER_DAYS', default=90, cast=int)
+
+# Chatbot sessions without a message for this many minutes are closed
+# (close_idle_sessions sweeps them; the next message starts a new session)
+CHATBOT_SESSION_IDLE_MINUTES = config('CHATBOT_SESSION_IDLE_MINUTES', default=30, cast=int)
+
+# update_analytics_rollups leaves rows younger than this for its next run,
+# so rows of transactions still in flight are not skipped
+ANALYTICS_ROLLUP_LAG_MINUTES = config('ANALYTICS_ROLLUP_LAG_MINUTES', default=5, cast=int)
+
+# Dummy AI services (skin analysis predictor and chatbot); see
+# skinscan_backend/fake_inference.py. DUMMY_AI_* applies to both services,
+# DUMMY_PREDICTOR_* and DUMMY_CHATBOT_* override it for one.
+#   SEED              makes outputs and latencies reproducible (unset: random)
+#   LATENCY           zero, fixed, uniform or lognormal (default: uniform, or
+#                     fixed when only LATENCY_SECONDS is set)
+#   LATENCY_SECONDS   fixed latency
+#   LATENCY_LOW/HIGH  uniform bounds (default 1-3 s)
+#   LOGNORMAL_MU/SIGMA  parameters of the underlying normal; median exp(MU)
+#   MODE              sleep, or cpu to burn the time holding the GIL
+def _dummy_ai_service(prefix):
+    def option(name, default, cast=str):
+        value = config(f'DUMMY_{prefix}_{name}', default='') or config(f'DUMMY_AI_{name}', default='')
+        return cast(value) if value != '' else default
+
+    latency_seconds = option('LATENCY_SECONDS', None, float)
+    return {
+        'seed': option('SEED', None, int),
+        'latency': option('LATENCY', 'uniform' if latency_seconds is None else 'fixed'),
+        'latency_seconds': 1.0 if latency_seconds is None else latency_seconds,
+        'latency_low': option('LATENCY_LOW', 1.0, float),
+        'latency_high': option('LATENCY_HIGH', 3.0, float),
+        'lognormal_mu': option('LOGNORMAL_MU', 0.5, float),
+        'lognormal_sigma': option('LOGNORMAL_SIGMA', 0.4, float),
+        'mode': option('MODE', 'sleep'),
+    }
+
+
+DUMMY_AI_SERVICES = {
+    'predictor': _dummy_ai_service('PREDICTOR'),
+    'chatbot': _dummy_ai_service('CHATBOT'),
+}
+
 # Static files
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -154,4 +335,36 @@ AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
     },
-]
\ No newline at end of file
+]
+
+# Password hashing
+# PASSWORD_HASHER selects the preferred algorithm (argon2 needs argon2-cffi).
+# Hashes made with the other algorithms or older parameters are upgraded
+# on the next successful login.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2')
+PASSWORD_HASHER_PARAMS = {
+    'pbkdf2': {
+        'iterations': config('PBKDF2_ITERATIONS', default=1_000_000, cast=int),
+    },
+    'scrypt': {
+        'work_factor': config('SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int),
+        'block_size': config('SCRYPT_BLOCK_SIZE', default=8, cast=int),
+        'parallelism': config('SCRYPT_PARALLELISM', default=1, cast=int),
+    },
+    'argon2': {
+        'time_cost': config('ARGON2_TIME_COST', default=2, cast=int),
+        'memory_cost': config('ARGON2_MEMORY_COST', default=64 * 1024, cast=int),  # KiB
+        'parallelism': config('ARGON2_PARALLELISM', default=2, cast=int),
+    },
+}
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'skinscan_authentication.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'skinscan_authentication.hashers.TunedScryptPasswordHasher',
+    'argon2': 'skinscan_authentication.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
+
+# Maximum number of password hashes computed concurrently per process
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=2, cast=int)
@@ -0,0 +1,51 @@
+"""
+Minimal in-process background task queue.
+
+Tasks run on a bounded thread pool once the surrounding transaction has
+committed, so the request that scheduled them does not wait on slow work
+such as file deletion. Set BACKGROUND_TASKS_EAGER to run tasks inline
+(useful in tests and management commands).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BACKGROUND_TASK_WORKERS,
+                    thread_name_prefix='skinscan-task'
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    """Run a task with a fresh database connection"""
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', getattr(func, '__name__', func))
+    finally:
+        close_old_connections()
+
+
+def enqueue(func, *args, **kwargs):
+    """Schedule func(*args, **kwargs) to run after the current transaction commits"""
+    if settings.BACKGROUND_TASKS_EAGER:
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return
+
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args, kwargs))
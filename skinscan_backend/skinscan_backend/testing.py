@@ -0,0 +1,46 @@
+"""
+Helpers shared by the apps' test modules.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from skinscan_authentication.models import User
+
+
+class AdminChangelistQueryMixin:
+    """
+    Changelist query counts must not grow with the number of rows.
+
+    Mix into a TestCase that defines _create_rows(count) and calls
+    _assert_bounded(url) for each changelist.
+    """
+    max_queries = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser(
+            email='admin@example.com', username='admin', password='Adm1n-pass!'
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def _create_rows(self, count):
+        raise NotImplementedError
+
+    def _changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries)
+
+    def _assert_bounded(self, url):
+        self._create_rows(3)
+        small = self._changelist_queries(url)
+        self._create_rows(20)
+        large = self._changelist_queries(url)
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, self.max_queries)
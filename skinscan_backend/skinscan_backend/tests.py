@@ -0,0 +1,384 @@
+import datetime
+import decimal
+import io
+import os
+import random
+import tempfile
+import time
+import unittest
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, connection, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from skinscan_authentication.models import User
+from skinscan_chatbot.models import Conversation, Message
+from . import middleware, renderers
+from .fake_inference import LatencyModel, get_fake_inference, latency_settings
+from .loadtest import FLOW_STEPS, InProcessTransport, LoadTest, clear_load_data, seed_load_data
+from .routers import PrimaryReplicaRouter, is_pinned_to_primary, pin_to_primary, replica_reads
+from .uuids import uuid7, uuid7_timestamp
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'SQLite settings')
+class SQLiteSettingsTests(TestCase):
+    def _read_pragmas(self, *names):
+        # The test database lives in memory, so open the configured settings on a file
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = SQLiteDatabaseWrapper(
+                {**connection.settings_dict, 'NAME': os.path.join(directory, 'pragmas.sqlite3')},
+                alias='pragma_check'
+            )
+            try:
+                values = {}
+                with wrapper.cursor() as cursor:
+                    for name in names:
+                        cursor.execute(f'PRAGMA {name}')
+                        values[name] = cursor.fetchone()[0]
+                return values
+            finally:
+                wrapper.close()
+
+    def test_new_connections_use_wal_and_tuned_pragmas(self):
+        values = self._read_pragmas('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'temp_store')
+
+        self.assertEqual(values, {
+            'journal_mode': 'wal',
+            'synchronous': 1,  # NORMAL
+            'busy_timeout': 20000,
+            'cache_size': -64000,
+            'temp_store': 2,  # MEMORY
+        })
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'DELETE', 'busy_timeout': 1234})
+    def test_pragmas_follow_settings(self):
+        values = self._read_pragmas('journal_mode', 'busy_timeout', 'synchronous')
+
+        self.assertEqual(values, {'journal_mode': 'delete', 'busy_timeout': 1234, 'synchronous': 2})
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Run with DB_ENGINE=postgresql against a local server')
+class PostgreSQLConnectionTests(TransactionTestCase):
+    def test_requests_reuse_pooled_connections(self):
+        pool_options = connection.settings_dict['OPTIONS'].get('pool')
+        if not pool_options:
+            self.skipTest('DB_POOL is disabled')
+
+        def backend_pid(_):
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_backend_pid()')
+                    return cursor.fetchone()[0]
+            finally:
+                # Returns the connection to the pool, as at the end of a request
+                close_old_connections()
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            pids = set(executor.map(backend_pid, range(40)))
+
+        self.assertLessEqual(len(pids), pool_options['max_size'])
+
+    def test_persistent_connection_survives_request(self):
+        if connection.settings_dict['OPTIONS'].get('pool'):
+            self.skipTest('Persistent connections are disabled while pooling')
+
+        connection.ensure_connection()
+        pid = connection.connection.info.backend_pid
+        close_old_connections()
+        connection.ensure_connection()
+
+        self.assertEqual(connection.connection.info.backend_pid, pid)
+        self.assertTrue(connection.settings_dict['CONN_HEALTH_CHECKS'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_use_primary_outside_replica_block(self):
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(User), 'replica1')
+            self.assertEqual(self.router.db_for_write(User), 'default')
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertTrue(self.router.allow_migrate('default', 'skin_analysis'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'skin_analysis'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(User), 'default')
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica1'],
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+)
+class ReplicaStickinessTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='sticky@example.com', username='sticky', password='Us3r-pass!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_write_request_pins_user_to_primary(self):
+        self.assertFalse(is_pinned_to_primary(self.user))
+
+        self.client.put('/api/v1/auth/profile/update/', {'first_name': 'Sticky'}, format='json')
+
+        self.assertTrue(is_pinned_to_primary(self.user))
+
+    def test_read_request_does_not_pin(self):
+        self.client.get('/api/v1/auth/profile/')
+        self.assertFalse(is_pinned_to_primary(self.user))
+
+
+@unittest.skipUnless(settings.DATABASE_REPLICAS, 'Run with DB_REPLICAS set (e.g. a second SQLite file)')
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ReplicaReadViewTests(TransactionTestCase):
+    databases = '__all__'
+    read_urls = [
+        '/api/v1/skin-analysis/history/',
+        '/api/v1/skin-analysis/stats/',
+        '/api/v1/chatbot/conversations/',
+        '/api/v1/chatbot/stats/',
+        '/api/v1/auth/dashboard/',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='replica@example.com', username='replica', password='Us3r-pass!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _aliases_used(self, url):
+        captures = {alias: CaptureQueriesContext(connections[alias]) for alias in settings.DATABASES}
+        for capture in captures.values():
+            capture.__enter__()
+        try:
+            response = self.client.get(url)
+        finally:
+            for capture in captures.values():
+                capture.__exit__(None, None, None)
+        self.assertEqual(response.status_code, 200)
+        return {alias for alias, capture in captures.items() if capture.captured_queries}
+
+    def test_read_views_use_replicas(self):
+        for url in self.read_urls:
+            with self.subTest(url=url):
+                self.assertTrue(self._aliases_used(url) <= set(settings.DATABASE_REPLICAS))
+
+    def test_reads_after_a_write_use_primary(self):
+        pin_to_primary(self.user)
+        for url in self.read_urls:
+            with self.subTest(url=url):
+                self.assertEqual(self._aliases_used(url), {'default'})
+
+
+@unittest.skipIf(renderers.orjson is None, 'orjson is not installed')
+class ORJSONRendererTests(SimpleTestCase):
+    def test_output_matches_stdlib_renderer(self):
+        data = {
+            'id': uuid.uuid4(),
+            'created_at': datetime.datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2026, 1, 2),
+            'price': decimal.Decimal('1.50'),
+            'text': 'Ekzem \u2028 überall',
+            'nested': [{1: None, 'score': 0.87}],
+        }
+        self.assertEqual(renderers.ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indented_output_uses_stdlib(self):
+        rendered = renderers.ORJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_parser(self):
+        parser = renderers.ORJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"content": "Hautausschlag"}'.encode())), {'content': 'Hautausschlag'})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"content": '))
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTests(TestCase):
+    def test_json_is_gzipped(self):
+        response = self.client.get('/api/v1/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertRegex(response['Server-Timing'], r'compress;dur=[0-9.]+;desc="gzip \d+>\d+"')
+        body = zlib.decompress(response.content, 31)
+        self.assertEqual(body, self.client.get('/api/v1/').content)
+
+    def test_uncompressed_without_accept_encoding_or_below_threshold(self):
+        self.assertFalse(self.client.get('/api/v1/').has_header('Content-Encoding'))
+        self.assertFalse(self.client.get('/api/v1/', HTTP_ACCEPT_ENCODING='gzip;q=0').has_header('Content-Encoding'))
+        with override_settings(RESPONSE_COMPRESSION_MIN_SIZE=100_000):
+            # Middleware reads its settings when the handler is built
+            response = self.client_class().get('/api/v1/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_token_endpoints_are_not_compressed(self):
+        response = self.client.post(
+            '/api/v1/auth/login/', {'email': 'nobody@example.com', 'password': 'x' * 200},
+            HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(
+        PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], RESPONSE_COMPRESSION_MIN_SIZE=0
+    )
+    def test_password_change_tokens_are_not_compressed(self):
+        user = User.objects.create_user(email='breach@example.com', username='breach', password='Old-pass-1!')
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post('/api/v1/auth/password/change/', {
+            'current_password': 'Old-pass-1!',
+            'new_password': 'An0ther-Passw0rd!',
+            'new_password_confirm': 'An0ther-Passw0rd!',
+        }, format='json', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('tokens', response.json())
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_event_stream_is_flushed_per_event(self):
+        events = [f'data: {{"delta": "token {i}"}}\n\n'.encode() for i in range(3)]
+        compressor = middleware.CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(events), content_type='text/event-stream')
+        )
+        response = compressor(RequestFactory().get('/stream/', HTTP_ACCEPT_ENCODING='gzip'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        decompressor = zlib.decompressobj(31)
+        chunks = iter(response.streaming_content)
+        for event in events:
+            # Each event is decodable as soon as its chunk arrives
+            self.assertEqual(decompressor.decompress(next(chunks)), event)
+        decompressor.decompress(b''.join(chunks))
+        self.assertTrue(decompressor.eof)
+
+    @unittest.skipIf(middleware.brotli is None, 'brotli is not installed')
+    def test_brotli_is_preferred(self):
+        response = self.client.get('/api/v1/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], DUMMY_AI_SERVICES=latency_settings('zero')
+)
+class LoadTestSuiteTests(TransactionTestCase):
+    def test_seeding_is_deterministic(self):
+        from skin_analysis.models import SkinAnalysis
+        from skinscan_chatbot.models import Message
+
+        counts = seed_load_data(3, analyses_per_user=2, conversations_per_user=2, messages_per_conversation=4, batch_size=2)
+        self.assertEqual(counts, {'users': 3, 'analyses': 6, 'conversations': 6, 'messages': 24})
+        first = list(SkinAnalysis.objects.order_by('user__email', 'confidence_score').values_list('confidence_score', flat=True))
+
+        # users, profiles, analyses, conversations, messages; two users per batch
+        self.assertEqual(clear_load_data(batch_size=2), 3 + 3 + 6 + 6 + 24)
+        self.assertFalse(Message.objects.exists())
+        self.assertFalse(User.objects.exists())
+        seed_load_data(3, analyses_per_user=2, conversations_per_user=2, messages_per_conversation=4, batch_size=2)
+        second = list(SkinAnalysis.objects.order_by('user__email', 'confidence_score').values_list('confidence_score', flat=True))
+        self.assertEqual(first, second)
+
+    def test_flows_report_every_endpoint(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            report = LoadTest(InProcessTransport(), concurrency=2, flows=2).run()
+
+        self.assertEqual(report['completed_flows'], 2)
+        self.assertEqual(list(report['endpoints']), FLOW_STEPS)
+        for stats in report['endpoints'].values():
+            self.assertEqual((stats['requests'], stats['errors']), (2, 0))
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+
+class FakeInferenceTests(SimpleTestCase):
+    def _responses(self):
+        from skinscan_chatbot.dummy_ai_service import dummy_medical_chatbot
+
+        return [
+            dummy_medical_chatbot.generate_response(message)['response']
+            for message in ['hello', 'my eczema itches', 'how do I care for my skin?', 'what about my knee?']
+        ]
+
+    def test_seed_makes_responses_and_latencies_reproducible(self):
+        services = latency_settings('lognormal', seed=7, lognormal_mu=-9, lognormal_sigma=0.5)
+        with override_settings(DUMMY_AI_SERVICES=services):
+            first = self._responses()
+            latencies = [get_fake_inference('chatbot').latency.sample() for _ in range(5)]
+        with override_settings(DUMMY_AI_SERVICES=services):
+            self.assertEqual(self._responses(), first)
+            self.assertEqual([get_fake_inference('chatbot').latency.sample() for _ in range(5)], latencies)
+        self.assertEqual(len(set(latencies)), 5)
+
+    def test_latency_distributions(self):
+        self.assertEqual(LatencyModel('zero').wait(), 0)
+        self.assertEqual(LatencyModel('fixed', seconds=0.25).sample(), 0.25)
+        uniform = LatencyModel('uniform', low=2, high=4)
+        self.assertTrue(all(2 <= uniform.sample() <= 4 for _ in range(100)))
+        lognormal = LatencyModel('lognormal', mu=0, sigma=0.5, rng=random.Random(0))
+        samples = sorted(lognormal.sample() for _ in range(1001))
+        self.assertAlmostEqual(samples[500], lognormal.median(), delta=0.15)
+
+    def test_cpu_mode_burns_cpu_instead_of_sleeping(self):
+        cpu_started = time.thread_time()
+        LatencyModel('fixed', seconds=0.05, mode='cpu').wait()
+        self.assertGreater(time.thread_time() - cpu_started, 0.03)
+
+        cpu_started = time.thread_time()
+        LatencyModel('fixed', seconds=0.05, mode='sleep').wait()
+        self.assertLess(time.thread_time() - cpu_started, 0.03)
+
+    def test_unknown_distribution_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            LatencyModel('gaussian')
+        with self.assertRaises(ImproperlyConfigured):
+            LatencyModel('fixed', mode='gpu')
+
+
+class UUID7Tests(TestCase):
+    def test_layout_and_timestamp(self):
+        before = time.time()
+        value = uuid7()
+        after = time.time()
+
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+        self.assertGreaterEqual(uuid7_timestamp(value), int(before * 1000) / 1000)
+        self.assertLessEqual(uuid7_timestamp(value), after)
+
+    def test_increasing_within_process(self):
+        values = [uuid7() for _ in range(20000)]
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(len(set(values)), len(values))
+        # Stored as hex on SQLite, which must sort the same way
+        self.assertEqual([value.hex for value in values], sorted(value.hex for value in values))
+
+    def test_new_rows_get_time_ordered_keys(self):
+        user = User.objects.create_user(email='uuid7@example.com', username='uuid7', password='!')
+        conversation = Conversation.objects.create(user=user, title='Keys')
+        messages = [Message.objects.create(conversation=conversation, content=str(i)) for i in range(5)]
+
+        self.assertEqual(user.id.version, 7)
+        self.assertEqual(
+            list(Message.objects.filter(conversation=conversation).order_by('id').values_list('content', flat=True)),
+            [message.content for message in messages]
+        )
@@ -35,6 +35,7 @@ def api_info(request):
             'authentication': '/api/v1/auth/',
             'skin_analysis': '/api/v1/skin-analysis/',
             'chatbot': '/api/v1/chatbot/',
+            'analytics': '/api/v1/analytics/',
             'admin': '/admin/',
         },
         'features': [
@@ -64,6 +65,9 @@ urlpatterns = [
 
     # Chatbot endpoints
     path('api/v1/chatbot/', include('skinscan_chatbot.urls')),
+
+    # Platform analytics (staff)
+    path('api/v1/analytics/', include('skinscan_analytics.urls')),
 ]
 
 # Serve media files in development
@@ -0,0 +1,51 @@
+"""
+Time-ordered UUIDs for primary keys.
+
+uuid4 keys are random, so every insert lands on a random page of the
+primary key index: pages split everywhere and the whole index has to stay
+in cache. A version 7 UUID (RFC 9562) starts with the Unix time in
+milliseconds, so new keys are appended at the right edge of the index like
+an auto-increment id, while the column type, the 36-character API format
+and the unguessability of the remaining 74 random bits stay the same.
+
+Within one millisecond the 12 bits after the version are a counter started
+at a random value, so ids from one process are strictly increasing; ids
+from different processes in the same millisecond interleave randomly.
+"""
+import os
+import threading
+import time
+import uuid
+
+_COUNTER_BITS = 12
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7():
+    """Return a version 7 UUID, increasing within this process"""
+    global _last_ms, _counter
+
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            # Start in the lower half so the counter rarely overflows
+            _counter = int.from_bytes(os.urandom(2), 'big') >> (17 - _COUNTER_BITS)
+        else:
+            # Same millisecond, or the clock went back: keep counting
+            _counter += 1
+            if _counter >> _COUNTER_BITS:
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+
+    random_bits = int.from_bytes(os.urandom(8), 'big') & ((1 << 62) - 1)
+    value = (ms & ((1 << 48) - 1)) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | random_bits
+    return uuid.UUID(int=value)
+
+
+def uuid7_timestamp(value):
+    """Unix time in seconds at which a version 7 UUID was generated"""
+    return (value.int >> 80) / 1000
@@ -1,6 +1,73 @@
+import json
+
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from .models import Conversation, Message, ChatbotSession
+from .search import matching_message_ids
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses the planner's row estimate for large unfiltered tables.
+
+    An exact COUNT(*) over the whole Message table is a full scan; the
+    estimate is only used when no filter or search is applied and the table
+    is big enough for the difference not to matter. Estimates come from the
+    statistics ANALYZE collects (pg_class.reltuples, sqlite_stat1); without
+    statistics the count is exact. Statistics lag behind deletions, so a
+    page past the real end falls back to the exact count instead of
+    showing an empty page.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self._estimate_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.exact_count_threshold:
+                self.count_is_estimate = True
+                return estimate
+        self.count_is_estimate = False
+        return super().count
+
+    def page(self, number):
+        page = super().page(number)
+        if not page.object_list and getattr(self, 'count_is_estimate', False):
+            # Fewer rows than estimated: count them and validate again
+            self.__dict__['count'] = super().count
+            self.__dict__.pop('num_pages', None)
+            self.count_is_estimate = False
+            return super().page(number)
+        return page
+
+    def _estimate_rows(self, model, using):
+        connection = connections[using]
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # -1 until the table has been analyzed
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+            elif connection.vendor == 'sqlite':
+                try:
+                    # The first number of every stat row is the table's row count
+                    cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+                except DatabaseError:
+                    # No sqlite_stat1 before the first ANALYZE
+                    return None
+            else:
+                return None
+            row = cursor.fetchone()
+        if not row or row[0] is None:
+            return None
+        estimate = int(str(row[0]).split()[0])
+        return estimate if estimate >= 0 else None
 
 
 @admin.register(Conversation)
@@ -16,14 +83,17 @@ class ConversationAdmin(admin.ModelAdmin):
         'user__email', 'user__username', 'title'
     ]
     raw_id_fields = ['user', 'related_analysis']
-    readonly_fields = ['id', 'created_at', 'updated_at', 'last_message_at']
+    readonly_fields = [
+        'id', 'created_at', 'updated_at', 'last_message_at', 'archived_message_count', 'archived_user_message_count'
+    ]
+    list_select_related = ['user']
 
     fieldsets = (
         ('Conversation Info', {
             'fields': ('id', 'user', 'title', 'is_active')
         }),
         ('Context', {
-            'fields': ('related_analysis',)
+            'fields': ('related_analysis', 'archived_message_count', 'archived_user_message_count')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at', 'last_message_at'),
@@ -31,14 +101,37 @@ class ConversationAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Message count and last message come from the changelist query
+        messages = Message.objects.filter(conversation=OuterRef('pk')).order_by()
+        return super().get_queryset(request).annotate(
+            _message_count=Coalesce(Subquery(
+                messages.values('conversation').annotate(count=Count('pk')).values('count'),
+                output_field=IntegerField()
+            ), 0) + F('archived_message_count'),
+            _last_message_content=Subquery(
+                messages.order_by('-created_at').values('content')[:1]
+            ),
+        )
+
     def user_email(self, obj):
         return obj.user.email if obj.user else 'No User'
 
     user_email.short_description = 'User Email'
     user_email.admin_order_field = 'user__email'
 
+    def conversation_summary(self, obj):
+        if obj.title:
+            return obj.title
+        content = obj._last_message_content
+        if content:
+            return content[:50] + "..." if len(content) > 50 else content
+        return f"Conversation started {obj.created_at.strftime('%B %d, %Y')}"
+
+    conversation_summary.short_description = 'Conversation summary'
+
     def message_count(self, obj):
-        count = obj.message_count
+        count = obj._message_count
         if count > 10:
             return format_html(
                 '<span style="color: green; font-weight: bold;">{}</span>',
@@ -52,6 +145,7 @@ class ConversationAdmin(admin.ModelAdmin):
         return count
 
     message_count.short_description = 'Messages'
+    message_count.admin_order_field = '_message_count'
 
 
 @admin.register(Message)
@@ -64,17 +158,20 @@ class MessageAdmin(admin.ModelAdmin):
         'message_type', 'is_flagged', 'created_at'
     ]
     search_fields = [
-        'content', 'conversation__user__email'
+        'conversation__user__email'
     ]
+    search_help_text = 'Full-text search over message content, or a user email containing "@".'
     raw_id_fields = ['conversation']
-    readonly_fields = ['id', 'created_at', 'updated_at']
+    readonly_fields = ['id', 'created_at', 'updated_at', 'user_context_display']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         ('Message Info', {
             'fields': ('id', 'conversation', 'message_type', 'content')
         }),
         ('AI Metadata', {
-            'fields': ('response_time', 'confidence_score', 'user_context')
+            'fields': ('response_time', 'confidence_score', 'user_context_display')
         }),
         ('Moderation', {
             'fields': ('is_flagged', 'flagged_reason')
@@ -85,8 +182,19 @@ class MessageAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        # Content goes through the full-text index instead of LIKE '%term%'
+        if not search_term or '@' in search_term:
+            return super().get_search_results(request, queryset, search_term)
+
+        sql, params = matching_message_ids(search_term, using=queryset.db)
+        if sql is None:
+            return queryset.none(), False
+        return queryset.filter(pk__in=RawSQL(sql, params)), False
+
     def conversation_id(self, obj):
-        return str(obj.conversation.id)[:8] + '...'
+        # Foreign key column, no need to load the conversation
+        return str(obj.conversation_id)[:8] + '...'
 
     conversation_id.short_description = 'Conversation'
 
@@ -95,12 +203,20 @@ class MessageAdmin(admin.ModelAdmin):
 
     content_preview.short_description = 'Content Preview'
 
+    def user_context_display(self, obj):
+        # Decompressed only here, on the change form
+        if obj.user_context is None:
+            return '-'
+        return format_html('<pre>{}</pre>', json.dumps(obj.user_context, indent=2, ensure_ascii=False))
+
+    user_context_display.short_description = 'User context'
+
 
 @admin.register(ChatbotSession)
 class ChatbotSessionAdmin(admin.ModelAdmin):
     list_display = [
         'id', 'user_email', 'session_start', 'session_duration_display',
-        'total_messages', 'satisfaction_rating'
+        'total_messages', 'average_response_time', 'satisfaction_rating'
     ]
     list_filter = [
         'satisfaction_rating', 'session_start'
@@ -110,14 +226,15 @@ class ChatbotSessionAdmin(admin.ModelAdmin):
     ]
     raw_id_fields = ['user', 'conversation']
     readonly_fields = ['id', 'session_start', 'session_duration']
+    list_select_related = ['user']
 
     fieldsets = (
         ('Session Info', {
             'fields': ('id', 'user', 'conversation')
         }),
         ('Session Data', {
-            'fields': ('session_start', 'session_end', 'session_duration',
-                       'total_messages', 'average_response_time')
+            'fields': ('session_start', 'last_activity_at', 'session_end', 'session_duration',
+                       'total_messages', 'response_count', 'average_response_time', 'max_response_time')
         }),
         ('Feedback', {
             'fields': ('satisfaction_rating', 'feedback_comment')
@@ -7,5 +7,4 @@ class SkinscanChatbotConfig(AppConfig):
     verbose_name = 'SkinScan Chatbot'
 
     def ready(self):
-        # Import signals if needed in future
-        pass
\ No newline at end of file
+        import skinscan_chatbot.signals
\ No newline at end of file
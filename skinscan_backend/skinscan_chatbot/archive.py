@@ -0,0 +1,132 @@
+"""
+Archival of inactive and old conversations.
+
+Messages of archived conversations are moved out of the Message table into
+a single zlib-compressed JSON blob per conversation (ConversationArchive),
+so the hot table, its indexes and the search index only hold conversations
+that are still in use. Conversation.get_all_messages() merges the archive
+back in, so readers do not need to know where a message lives.
+
+Archived messages are no longer part of message search.
+"""
+import datetime
+import json
+import logging
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .models import Conversation, ConversationArchive, Message
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COMPRESSION_LEVEL = 9
+
+_ARCHIVED_FIELDS = [field for field in Message._meta.concrete_fields if field.name != 'conversation']
+
+
+class ArchiveJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder without its millisecond rounding of datetimes"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _encode(rows):
+    payload = json.dumps(rows, cls=ArchiveJSONEncoder, separators=(',', ':'))
+    return zlib.compress(payload.encode('utf-8'), ARCHIVE_COMPRESSION_LEVEL)
+
+
+def _decode(data):
+    return json.loads(zlib.decompress(bytes(data)).decode('utf-8'))
+
+
+def _message_to_row(message):
+    return {field.attname: getattr(message, field.attname) for field in _ARCHIVED_FIELDS}
+
+
+def _row_to_message(row, conversation):
+    values = {field.attname: field.to_python(row.get(field.attname)) for field in _ARCHIVED_FIELDS}
+    message = Message(conversation_id=conversation.pk, **values)
+    message.conversation = conversation
+    message._state.adding = False
+    return message
+
+
+def load_archived_messages(conversation):
+    """Return the archived messages of conversation as unsaved Message instances"""
+    try:
+        archive = ConversationArchive.objects.get(conversation=conversation)
+    except ConversationArchive.DoesNotExist:
+        return []
+    return [_row_to_message(row, conversation) for row in _decode(archive.data)]
+
+
+def archive_conversation(conversation_id):
+    """
+    Move the live messages of a conversation into its archive.
+
+    Messages archived earlier are kept, so a conversation that was
+    reactivated can be archived again. Returns the number of messages moved.
+    """
+    with transaction.atomic():
+        conversation = Conversation.objects.select_for_update().get(pk=conversation_id)
+        messages = list(Message.objects.filter(conversation=conversation).order_by('created_at'))
+        if not messages:
+            return 0
+
+        archive = ConversationArchive.objects.filter(conversation=conversation).first()
+        rows = _decode(archive.data) if archive else []
+        rows.extend(_message_to_row(message) for message in messages)
+
+        ConversationArchive.objects.update_or_create(
+            conversation=conversation,
+            defaults={'data': _encode(rows), 'message_count': len(rows)}
+        )
+        Conversation.objects.filter(pk=conversation.pk).update(
+            archived_message_count=F('archived_message_count') + len(messages),
+            archived_user_message_count=F('archived_user_message_count') + sum(
+                message.message_type == 'user' for message in messages
+            )
+        )
+        batch = Message.objects.filter(pk__in=[message.pk for message in messages])
+        batch._raw_delete(batch.db)
+
+    return len(messages)
+
+
+def archivable_conversations(older_than_days=None):
+    """Conversations with live messages that are inactive or idle for older_than_days"""
+    if older_than_days is None:
+        older_than_days = settings.MESSAGE_ARCHIVE_AFTER_DAYS
+    cutoff = timezone.now() - datetime.timedelta(days=older_than_days)
+    return Conversation.objects.filter(
+        Q(is_active=False) | Q(last_message_at__lt=cutoff),
+        Exists(Message.objects.filter(conversation=OuterRef('pk')))
+    ).order_by()
+
+
+def archive_conversations(older_than_days=None, batch_size=100, progress=None):
+    """Archive every archivable conversation, returning (conversations, messages) moved"""
+    conversation_ids = archivable_conversations(older_than_days).values_list('pk', flat=True)
+    conversations = moved = 0
+
+    # Archived conversations drop out of the query, so always take the first batch
+    while True:
+        batch = list(conversation_ids[:batch_size])
+        if not batch:
+            break
+        for conversation_id in batch:
+            moved += archive_conversation(conversation_id)
+        conversations += len(batch)
+        if progress:
+            progress(conversations, moved)
+
+    logger.info('Archived %s messages from %s conversations', moved, conversations)
+    return conversations, moved
@@ -0,0 +1,48 @@
+"""
+Preset compression dictionary for Message.user_context.
+
+Each assistant message stores the user context sent to the chatbot: the
+same keys on every row plus the recent conversation history, which is
+mostly earlier chatbot replies built from a fixed set of phrases. Priming
+zlib with these strings lets even a single small document compress well.
+Existing rows depend on these exact bytes: never edit this list.
+"""
+
+_FRAGMENTS = [
+    # Most frequent material goes last, where zlib matches it most cheaply
+    "I'd be happy to help with your skin-related questions. Could you please provide more specific details about your concern?",
+    "I specialize in skin health and skincare advice. What specific aspect of skin care would you like to discuss?",
+    "I can provide information about common skin conditions, skincare routines, and general skin health. What would you like to know more about?",
+    "\\n\\n**I can help with:**\\n• Common skin conditions (acne, eczema, psoriasis, etc.)\\n• Skincare routine advice\\n"
+    "• General skin health information\\n• Product usage guidance\\n",
+    "Always patch test new skincare products before full application.",
+    "Consistency in skincare routines often yields better results than frequent changes.",
+    "Sun protection is crucial for all skin types and conditions.",
+    "A gentle approach to skincare is usually more effective than aggressive treatments.",
+    "Diet, stress, and sleep can all impact skin health.",
+    "\\n\\n**Additional Tips:**\\n",
+    "• Use a gentle cleanser suitable for your skin type.\\n",
+    "• Moisturize daily, especially after cleansing.\\n",
+    "• Apply sunscreen with at least SPF 30 daily.\\n",
+    "• Introduce new products gradually to avoid irritation.\\n",
+    "• Stay hydrated and maintain a balanced diet.\\n",
+    "\\n\\n**Precautions:**\\n",
+    "\\n*This is educational information only and not a substitute for professional medical advice.*",
+    "\\n*Please consult a dermatologist for proper diagnosis and treatment.*",
+    "\\n*If symptoms persist or worsen, seek immediate medical attention.*",
+    "\\n*Individual results may vary, and what works for others may not work for you.*",
+    '"recent_analysis":{"predicted_disease":"',
+    '","confidence_percentage":',
+    ',"analysis_date":"',
+    '{"user_id":"',
+    '","analysis_count":',
+    ',"member_since":"',
+    '","conversation_history":[',
+    '{"message_type":"assistant","content":"',
+    '","created_at":"',
+    '+00:00"},{"message_type":"user","content":"',
+]
+
+
+def user_context_dictionary():
+    return ''.join(_FRAGMENTS).encode('utf-8')
@@ -1,8 +1,9 @@
-import random
 import time
 import re
 from typing import Dict, List, Optional
 
+from skinscan_backend.fake_inference import get_fake_inference
+
 
 class DummyMedicalChatbot:
     """Dummy AI chatbot service for skin-related medical consultation"""
@@ -13,6 +14,11 @@ class DummyMedicalChatbot:
         time.sleep(0.5)
         print("Dummy medical chatbot loaded successfully!")
 
+    @property
+    def random(self):
+        """Seeded random source from settings.DUMMY_AI_SERVICES['chatbot']"""
+        return get_fake_inference('chatbot').random
+
     def load_medical_knowledge(self):
         """Load dummy medical knowledge base"""
 
@@ -99,9 +105,8 @@ class DummyMedicalChatbot:
         """Generate chatbot response to user message"""
         start_time = time.time()
 
-        # Simulate processing time
-        processing_delay = random.uniform(1, 3)
-        time.sleep(processing_delay)
+        # Simulate processing time (settings.DUMMY_AI_SERVICES['chatbot'])
+        get_fake_inference('chatbot').latency.wait()
 
         try:
             # Clean and analyze user message
@@ -182,14 +187,14 @@ class DummyMedicalChatbot:
             "Welcome! I'm your skin health assistant. Feel free to ask me about skincare routines, common skin conditions, or general skin health advice.",
         ]
 
-        base_response = random.choice(greetings)
+        base_response = self.random.choice(greetings)
 
         # Add context if user has recent analysis
         if user_context and user_context.get('recent_analysis'):
             analysis = user_context['recent_analysis']
             base_response += f"\n\nI see you recently had an analysis for {analysis.get('predicted_disease')}. I'd be happy to provide general information about this condition or answer any related questions."
 
-        base_response += f"\n\n*{random.choice(self.disclaimers)}*"
+        base_response += f"\n\n*{self.random.choice(self.disclaimers)}*"
 
         return {
             'content': base_response,
@@ -207,11 +212,11 @@ class DummyMedicalChatbot:
         condition_data = self.skin_conditions[condition]
 
         # Select random response
-        base_response = random.choice(condition_data['responses'])
+        base_response = self.random.choice(condition_data['responses'])
 
         # Add precautions
         if condition_data['precautions']:
-            precautions = random.sample(condition_data['precautions'], min(2, len(condition_data['precautions'])))
+            precautions = self.random.sample(condition_data['precautions'], min(2, len(condition_data['precautions'])))
             base_response += "\n\n**Key Precautions:**\n"
             for precaution in precautions:
                 base_response += f"• {precaution}\n"
@@ -222,11 +227,11 @@ class DummyMedicalChatbot:
             if condition.lower() in analysis.get('predicted_disease', '').lower():
                 base_response += f"\n\nI notice this relates to your recent analysis. The AI detected {analysis.get('predicted_disease')} with {analysis.get('confidence_percentage')}% confidence."
 
-        base_response += f"\n\n*{random.choice(self.disclaimers)}*"
+        base_response += f"\n\n*{self.random.choice(self.disclaimers)}*"
 
         return {
             'content': base_response,
-            'confidence': random.uniform(0.8, 0.95),
+            'confidence': self.random.uniform(0.8, 0.95),
             'type': 'condition_advice',
             'suggestions': [
                 f"Learn more about {condition} management",
@@ -237,7 +242,7 @@ class DummyMedicalChatbot:
 
     def _generate_general_skincare_response(self) -> Dict:
         """Generate general skincare advice"""
-        advice = random.choice(self.general_advice)
+        advice = self.random.choice(self.general_advice)
 
         additional_tips = [
             "Use a gentle cleanser suitable for your skin type.",
@@ -247,17 +252,17 @@ class DummyMedicalChatbot:
             "Stay hydrated and maintain a balanced diet."
         ]
 
-        selected_tips = random.sample(additional_tips, 2)
+        selected_tips = self.random.sample(additional_tips, 2)
 
         response = f"{advice}\n\n**Additional Tips:**\n"
         for tip in selected_tips:
             response += f"• {tip}\n"
 
-        response += f"\n*{random.choice(self.disclaimers)}*"
+        response += f"\n*{self.random.choice(self.disclaimers)}*"
 
         return {
             'content': response,
-            'confidence': random.uniform(0.7, 0.9),
+            'confidence': self.random.uniform(0.7, 0.9),
             'type': 'general_advice',
             'suggestions': [
                 "Ask about specific skin concerns",
@@ -274,18 +279,18 @@ class DummyMedicalChatbot:
             "I can provide information about common skin conditions, skincare routines, and general skin health. What would you like to know more about?",
         ]
 
-        base_response = random.choice(fallback_responses)
+        base_response = self.random.choice(fallback_responses)
         base_response += "\n\n**I can help with:**\n"
         base_response += "• Common skin conditions (acne, eczema, psoriasis, etc.)\n"
         base_response += "• Skincare routine advice\n"
         base_response += "• General skin health information\n"
         base_response += "• Product usage guidance\n"
 
-        base_response += f"\n*{random.choice(self.disclaimers)}*"
+        base_response += f"\n*{self.random.choice(self.disclaimers)}*"
 
         return {
             'content': base_response,
-            'confidence': random.uniform(0.6, 0.8),
+            'confidence': self.random.uniform(0.6, 0.8),
             'type': 'fallback',
             'suggestions': [
                 "Ask about a specific skin condition",
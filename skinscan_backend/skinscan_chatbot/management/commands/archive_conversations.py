@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from skinscan_chatbot.archive import archivable_conversations, archive_conversations
+
+
+class Command(BaseCommand):
+    help = 'Move messages of inactive or idle conversations into compressed conversation archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.MESSAGE_ARCHIVE_AFTER_DAYS,
+            help='Archive conversations without messages for this many days (inactive ones are always archived)'
+        )
+        parser.add_argument('--batch-size', type=int, default=100, help='Conversations archived per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many conversations qualify')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archivable_conversations(options['days']).count()
+            self.stdout.write(f'{count} conversations would be archived')
+            return
+
+        def progress(conversations, messages):
+            self.stdout.write(f'{conversations} conversations archived ({messages} messages)')
+
+        conversations, messages = archive_conversations(
+            options['days'], batch_size=options['batch_size'], progress=progress
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {messages} messages from {conversations} conversations'
+        ))
@@ -0,0 +1,103 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from skinscan_authentication.models import User
+from skinscan_backend.fake_inference import latency_settings
+from skinscan_chatbot.models import ChatbotSession, Conversation
+
+# SQLite's own defaults: rollback journal, fsync on every commit, no busy wait
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': 0,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure chat write throughput under parallel SendMessageView load, '
+        'with SQLite defaults and with SQLITE_PRAGMAS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile', action='append', dest='profiles', choices=['default', 'tuned'],
+            help='Pragma profile to benchmark (repeatable, default: default and tuned)'
+        )
+        parser.add_argument('--messages', type=int, default=200, help='Total number of messages per profile')
+        parser.add_argument('--conversations', type=int, default=20, help='Number of conversations written to')
+        parser.add_argument('--concurrency', type=int, default=8, help='Number of concurrent clients')
+        parser.add_argument(
+            '--ai-delay', action='store_true',
+            help='Keep the simulated chatbot latency (by default it is skipped to isolate database writes)'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark compares SQLite pragma profiles; the default database is not SQLite')
+
+        services = settings.DUMMY_AI_SERVICES if options['ai_delay'] else latency_settings('zero')
+        with override_settings(DUMMY_AI_SERVICES=services):
+            for profile in options['profiles'] or ['default', 'tuned']:
+                pragmas = DEFAULT_SQLITE_PRAGMAS if profile == 'default' else settings.SQLITE_PRAGMAS
+                with override_settings(SQLITE_PRAGMAS=pragmas):
+                    # Reconnect so the journal mode switch happens before the load starts
+                    connection.close()
+                    self._benchmark(profile, options['messages'], options['conversations'], options['concurrency'])
+        connection.close()
+
+    def _benchmark(self, profile, message_count, conversation_count, concurrency):
+        emails = [f'bench-chat-{i}@example.com' for i in range(conversation_count)]
+        User.objects.filter(email__in=emails).delete()
+        users = User.objects.bulk_create([
+            User(email=email, username=email.split('@')[0], password='!')
+            for email in emails
+        ])
+        conversations = Conversation.objects.bulk_create([Conversation(user=user) for user in users])
+        ChatbotSession.objects.bulk_create([
+            ChatbotSession(user=conversation.user, conversation=conversation)
+            for conversation in conversations
+        ])
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+
+        def send(i):
+            client = Client(raise_request_exception=False)
+            started = time.perf_counter()
+            response = client.post(
+                '/api/v1/chatbot/send-message/',
+                {'conversation_id': str(conversations[i % conversation_count].id), 'content': 'My skin is dry and itchy'},
+                content_type='application/json',
+                HTTP_AUTHORIZATION=f'Bearer {tokens[i % conversation_count]}'
+            )
+            elapsed = time.perf_counter() - started
+            close_old_connections()
+            return response.status_code, elapsed
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(send, range(message_count)))
+            wall_time = time.perf_counter() - started
+        finally:
+            User.objects.filter(email__in=emails).delete()
+
+        statuses = Counter(status_code for status_code, _ in results)
+        successes = statuses.pop(200, 0)
+        latencies = sorted(elapsed for _, elapsed in results)
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+        failures = ', '.join(f'{count}x{code}' for code, count in sorted(statuses.items())) or 'none'
+
+        self.stdout.write(
+            f'{profile}: {successes / wall_time:.1f} messages/s, '
+            f'p50 {p50:.1f} ms, p95 {p95:.1f} ms, failures: {failures} '
+            f'(concurrency {concurrency}, {conversation_count} conversations)'
+        )
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from skinscan_chatbot.models import ChatbotSession
+
+
+class Command(BaseCommand):
+    help = 'End chatbot sessions without messages for the idle timeout (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes', type=int, default=settings.CHATBOT_SESSION_IDLE_MINUTES,
+            help='Close sessions idle for this many minutes'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many sessions qualify')
+
+    def handle(self, *args, **options):
+        timeout = timedelta(minutes=options['minutes'])
+        if options['dry_run']:
+            count = ChatbotSession.objects.idle(timeout).count()
+            self.stdout.write(f'{count} sessions would be closed')
+            return
+
+        count = ChatbotSession.objects.close_idle(timeout)
+        self.stdout.write(self.style.SUCCESS(f'Closed {count} idle sessions'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from skinscan_chatbot.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over chat messages (e.g. after a SQLite VACUUM)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to rebuild')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        rebuild_search_index(connection)
+        self.stdout.write(self.style.SUCCESS(f'Message search index rebuilt on {connection.vendor}'))
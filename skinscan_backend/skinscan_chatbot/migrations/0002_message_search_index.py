@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from skinscan_chatbot.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def uninstall_search_index(apps, schema_editor):
+    from skinscan_chatbot.search import uninstall_search_index
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skinscan_chatbot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skinscan_chatbot', '0002_message_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationArchive',
+            fields=[
+                ('conversation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archive', serialize=False, to='skinscan_chatbot.conversation')),
+                ('data', models.BinaryField()),
+                ('message_count', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Conversation Archive',
+                'verbose_name_plural': 'Conversation Archives',
+            },
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='archived_message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
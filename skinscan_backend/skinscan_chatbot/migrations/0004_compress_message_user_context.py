@@ -0,0 +1,62 @@
+from django.db import migrations
+
+import skinscan_backend.fields
+import skinscan_chatbot.compression
+
+BATCH_SIZE = 500
+
+
+def _convert(apps, schema_editor, source, target):
+    """Copy source into target batch by batch, in primary key order"""
+    Message = apps.get_model('skinscan_chatbot', 'Message')
+    queryset = Message.objects.using(schema_editor.connection.alias) \
+        .filter(**{f'{source}__isnull': False}) \
+        .only('pk', source) \
+        .order_by('pk')
+
+    last_pk = None
+    while True:
+        batch_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(batch_queryset[:BATCH_SIZE])
+        if not batch:
+            break
+        for message in batch:
+            setattr(message, target, getattr(message, source))
+        Message.objects.using(schema_editor.connection.alias).bulk_update(batch, [target])
+        last_pk = batch[-1].pk
+
+
+def compress_user_context(apps, schema_editor):
+    _convert(apps, schema_editor, 'user_context', 'user_context_compressed')
+
+
+def decompress_user_context(apps, schema_editor):
+    _convert(apps, schema_editor, 'user_context_compressed', 'user_context')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skinscan_chatbot', '0003_conversation_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='user_context_compressed',
+            field=skinscan_backend.fields.CompressedJSONField(
+                blank=True, dictionary=skinscan_chatbot.compression.user_context_dictionary,
+                help_text="Additional context like user's recent analyses", null=True
+            ),
+        ),
+        migrations.RunPython(compress_user_context, decompress_user_context),
+        migrations.RemoveField(
+            model_name='message',
+            name='user_context',
+        ),
+        migrations.RenameField(
+            model_name='message',
+            old_name='user_context_compressed',
+            new_name='user_context',
+        ),
+    ]
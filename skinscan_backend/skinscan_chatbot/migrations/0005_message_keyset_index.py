@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skinscan_chatbot', '0004_compress_message_user_context'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_at', 'id'], name='chatbot_msg_conv_created_idx'),
+        ),
+    ]
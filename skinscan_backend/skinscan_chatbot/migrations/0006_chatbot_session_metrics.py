@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:49
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_session_metrics(apps, schema_editor):
+    """Compute the new metrics of existing sessions once from their conversation's live messages"""
+    ChatbotSession = apps.get_model('skinscan_chatbot', 'ChatbotSession')
+    Message = apps.get_model('skinscan_chatbot', 'Message')
+    alias = schema_editor.connection.alias
+
+    messages = Message.objects.using(alias).filter(conversation=OuterRef('conversation')).values('conversation')
+    responses = messages.filter(message_type='assistant', response_time__isnull=False)
+    ChatbotSession.objects.using(alias).update(
+        response_count=Coalesce(Subquery(responses.annotate(value=Count('id')).values('value')), 0),
+        average_response_time=Subquery(responses.annotate(value=Avg('response_time')).values('value')),
+        max_response_time=Subquery(responses.annotate(value=Max('response_time')).values('value')),
+        last_activity_at=Coalesce(
+            Subquery(messages.annotate(value=Max('created_at')).values('value')), F('session_start')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skinscan_chatbot', '0005_message_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatbotsession',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='chatbotsession',
+            name='max_response_time',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatbotsession',
+            name='response_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='chatbotsession',
+            index=models.Index(condition=models.Q(('session_end__isnull', True)), fields=['last_activity_at'], name='chatbot_session_open_idx'),
+        ),
+        migrations.RunPython(backfill_session_metrics, migrations.RunPython.noop),
+    ]
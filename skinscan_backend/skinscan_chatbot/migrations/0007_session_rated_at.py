@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:54
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_rated_at(apps, schema_editor):
+    """Existing ratings were submitted when their session ended (feedback ends a session)"""
+    ChatbotSession = apps.get_model('skinscan_chatbot', 'ChatbotSession')
+    ChatbotSession.objects.using(schema_editor.connection.alias).filter(satisfaction_rating__isnull=False).update(
+        rated_at=Coalesce('session_end', 'session_start')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skinscan_chatbot', '0006_chatbot_session_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatbotsession',
+            name='rated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['created_at'], name='chatbot_msg_created_idx'),
+        ),
+        migrations.RunPython(backfill_rated_at, migrations.RunPython.noop),
+    ]
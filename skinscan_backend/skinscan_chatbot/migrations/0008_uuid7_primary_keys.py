@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:04
+
+import skinscan_backend.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skinscan_chatbot', '0007_session_rated_at'),
+    ]
+
+    # The default is applied by Django, not the database, so only the state
+    # changes; altering the field would make SQLite copy every table
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='chatbotsession',
+                    name='id',
+                    field=models.UUIDField(default=skinscan_backend.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='conversation',
+                    name='id',
+                    field=models.UUIDField(default=skinscan_backend.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='message',
+                    name='id',
+                    field=models.UUIDField(default=skinscan_backend.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:12
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollup_rating(apps, schema_editor):
+    """Ratings before the ratings watermark are already in the rollups"""
+    RollupWatermark = apps.get_model('skinscan_analytics', 'RollupWatermark')
+    ChatbotSession = apps.get_model('skinscan_chatbot', 'ChatbotSession')
+    alias = schema_editor.connection.alias
+
+    watermark = RollupWatermark.objects.using(alias).filter(source='ratings').first()
+    if watermark is None:
+        return
+    ChatbotSession.objects.using(alias).filter(
+        rated_at__lt=watermark.processed_until, satisfaction_rating__isnull=False
+    ).update(rollup_rating=F('satisfaction_rating'), rollup_rating_date=TruncDate('rated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skinscan_analytics', '0001_initial'),
+        ('skinscan_chatbot', '0008_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatbotsession',
+            name='rollup_rating',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatbotsession',
+            name='rollup_rating_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_rollup_rating, migrations.RunPython.noop),
+    ]
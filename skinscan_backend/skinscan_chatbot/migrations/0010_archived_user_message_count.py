@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:05
+
+import json
+import zlib
+
+from django.db import migrations, models
+
+
+def backfill_archived_user_message_count(apps, schema_editor):
+    """Count the user messages already in each archive blob"""
+    Conversation = apps.get_model('skinscan_chatbot', 'Conversation')
+    ConversationArchive = apps.get_model('skinscan_chatbot', 'ConversationArchive')
+    alias = schema_editor.connection.alias
+
+    for archive in ConversationArchive.objects.using(alias).iterator(chunk_size=100):
+        rows = json.loads(zlib.decompress(bytes(archive.data)).decode('utf-8'))
+        Conversation.objects.using(alias).filter(pk=archive.conversation_id).update(
+            archived_user_message_count=sum(row.get('message_type') == 'user' for row in rows)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skinscan_chatbot', '0009_session_rollup_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='archived_user_message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_archived_user_message_count, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,20 @@
+from datetime import timedelta
+
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce, Greatest, Length, Substr
 from django.conf import settings
-import uuid
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from skinscan_backend.fields import CompressedJSONField
+from skinscan_backend.uuids import uuid7
+from .compression import user_context_dictionary
 
 
 class Conversation(models.Model):
     """Chatbot conversation model"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='conversations')
 
     # Conversation metadata
@@ -26,6 +35,10 @@ class Conversation(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     last_message_at = models.DateTimeField(auto_now_add=True)
 
+    # Messages moved to ConversationArchive
+    archived_message_count = models.PositiveIntegerField(default=0)
+    archived_user_message_count = models.PositiveIntegerField(default=0)
+
     class Meta:
         ordering = ['-last_message_at']
         verbose_name = 'Conversation'
@@ -36,13 +49,34 @@ class Conversation(models.Model):
 
     @property
     def message_count(self):
-        """Return total number of messages in conversation"""
-        return self.messages.count()
+        """Return total number of messages in conversation, archived ones included"""
+        return self.messages.count() + self.archived_message_count
 
-    @property
+    @cached_property
     def last_message(self):
-        """Return the last message in conversation"""
-        return self.messages.order_by('-created_at').first()
+        """Return the last message in conversation, with only its preview loaded"""
+        message = (
+            self.messages.order_by('-created_at', '-id')
+            .only('id', 'conversation', 'message_type', 'created_at')
+            .with_content_preview()
+            .first()
+        )
+        if message is None and self.archived_message_count:
+            message = self.get_archived_messages()[-1]
+        return message
+
+    def get_archived_messages(self):
+        """Return archived messages as unsaved Message instances, oldest first"""
+        if not self.archived_message_count:
+            return []
+        from .archive import load_archived_messages
+        return load_archived_messages(self)
+
+    def get_all_messages(self, live_messages=None):
+        """Return archived and live messages in chronological order"""
+        if live_messages is None:
+            live_messages = self.messages.order_by('created_at')
+        return self.get_archived_messages() + list(live_messages)
 
     @property
     def conversation_summary(self):
@@ -50,13 +84,22 @@ class Conversation(models.Model):
         if self.title:
             return self.title
         elif self.last_message:
-            return self.last_message.content[:50] + "..." if len(
-                self.last_message.content) > 50 else self.last_message.content
+            return self.last_message.truncated_content(50)
         return f"Conversation started {self.created_at.strftime('%B %d, %Y')}"
 
 
+class MessageQuerySet(models.QuerySet):
+    def with_content_preview(self):
+        """Annotate what content_preview needs, so content itself can be deferred"""
+        return self.annotate(
+            content_head=Substr('content', 1, Message.PREVIEW_LENGTH),
+            content_length=Length('content')
+        )
+
+
 class Message(models.Model):
     """Individual message in a conversation"""
+    PREVIEW_LENGTH = 100
 
     MESSAGE_TYPES = [
         ('user', 'User'),
@@ -64,7 +107,7 @@ class Message(models.Model):
         ('system', 'System'),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
 
     # Message content
@@ -75,10 +118,11 @@ class Message(models.Model):
     response_time = models.FloatField(null=True, blank=True, help_text="AI response time in seconds")
     confidence_score = models.FloatField(null=True, blank=True, help_text="AI confidence in response")
 
-    # Context information
-    user_context = models.JSONField(
+    # Context information (compressed, decoded on first access)
+    user_context = CompressedJSONField(
         null=True,
         blank=True,
+        dictionary=user_context_dictionary,
         help_text="Additional context like user's recent analyses"
     )
 
@@ -90,18 +134,35 @@ class Message(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MessageQuerySet.as_manager()
+
     class Meta:
         ordering = ['created_at']
         verbose_name = 'Message'
         verbose_name_plural = 'Messages'
+        indexes = [
+            # Keyset pagination of a conversation's messages
+            models.Index(fields=['conversation', 'created_at', 'id'], name='chatbot_msg_conv_created_idx'),
+            # Time windows of the analytics rollups
+            models.Index(fields=['created_at'], name='chatbot_msg_created_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.message_type.title()} message in {self.conversation.id}"
+        return f"{self.message_type.title()} message in {self.conversation_id}"
 
     @property
     def content_preview(self):
         """Return shortened content for display"""
-        return self.content[:100] + "..." if len(self.content) > 100 else self.content
+        return self.truncated_content(self.PREVIEW_LENGTH)
+
+    def truncated_content(self, length):
+        """Content cut to length (at most PREVIEW_LENGTH) characters, with "..." if longer"""
+        if 'content' not in self.__dict__ and 'content_head' in self.__dict__:
+            # Loaded through with_content_preview() with content deferred
+            head, total = self.content_head[:length], self.content_length
+        else:
+            head, total = self.content[:length], len(self.content)
+        return head + "..." if total > length else head
 
     @property
     def is_user_message(self):
@@ -114,9 +175,67 @@ class Message(models.Model):
         return self.message_type == 'assistant'
 
 
+class ChatbotSessionQuerySet(models.QuerySet):
+    """
+    Session metrics are maintained with single UPDATE statements built from
+    F-expressions, so concurrent turns of one conversation never overwrite
+    each other's counts and analytics never have to rescan Message.
+    """
+
+    def open(self):
+        return self.filter(session_end__isnull=True)
+
+    def idle(self, timeout=None):
+        """Open sessions without activity for timeout (default CHATBOT_SESSION_IDLE_MINUTES)"""
+        if timeout is None:
+            timeout = timedelta(minutes=settings.CHATBOT_SESSION_IDLE_MINUTES)
+        return self.open().filter(last_activity_at__lt=timezone.now() - timeout)
+
+    def close_idle(self, timeout=None):
+        """End idle sessions at their last activity; returns the number closed"""
+        return self.idle(timeout).update(session_end=F('last_activity_at'))
+
+    def start(self, user, conversation, messages=2, response_time=None):
+        """Open a session whose first turn added messages"""
+        return self.create(
+            user=user,
+            conversation=conversation,
+            total_messages=messages,
+            response_count=0 if response_time is None else 1,
+            average_response_time=response_time,
+            max_response_time=response_time,
+        )
+
+    def record_turn(self, user, conversation, messages=2, response_time=None):
+        """
+        Add a turn to the conversation's open session, or start a new session
+        if there is none or it has been idle longer than the timeout.
+        """
+        now = timezone.now()
+        idle_since = now - timedelta(minutes=settings.CHATBOT_SESSION_IDLE_MINUTES)
+        sessions = self.open().filter(conversation=conversation)
+        # Sessions the sweeper has not reached yet end at their last activity
+        sessions.filter(last_activity_at__lt=idle_since).update(session_end=F('last_activity_at'))
+
+        session_id = sessions.order_by('-session_start').values_list('id', flat=True).first()
+        updates = {'total_messages': F('total_messages') + messages, 'last_activity_at': now}
+        if response_time is not None:
+            # Right-hand sides see the row before the update, so this is the running mean
+            updates.update(
+                response_count=F('response_count') + 1,
+                average_response_time=(
+                    Coalesce(F('average_response_time'), 0.0) * F('response_count') + response_time
+                ) / (F('response_count') + 1),
+                max_response_time=Greatest(Coalesce(F('max_response_time'), response_time), response_time),
+            )
+        # Filtered again in the UPDATE: the sweeper may close the session in between
+        if session_id is None or not sessions.filter(id=session_id, last_activity_at__gte=idle_since).update(**updates):
+            self.start(user, conversation, messages, response_time)
+
+
 class ChatbotSession(models.Model):
     """Track chatbot sessions for analytics"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chatbot_sessions')
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='sessions')
 
@@ -124,7 +243,12 @@ class ChatbotSession(models.Model):
     session_start = models.DateTimeField(auto_now_add=True)
     session_end = models.DateTimeField(null=True, blank=True)
     total_messages = models.IntegerField(default=0)
+    last_activity_at = models.DateTimeField(default=timezone.now)
+
+    # Assistant response times, maintained per turn (see ChatbotSessionQuerySet)
+    response_count = models.PositiveIntegerField(default=0)
     average_response_time = models.FloatField(null=True, blank=True)
+    max_response_time = models.FloatField(null=True, blank=True)
 
     # User satisfaction (optional feedback)
     satisfaction_rating = models.IntegerField(
@@ -134,11 +258,24 @@ class ChatbotSession(models.Model):
         help_text="User satisfaction rating (1-5)"
     )
     feedback_comment = models.TextField(blank=True)
+    rated_at = models.DateTimeField(null=True, blank=True)
+    # Rating and day last added to the daily analytics rollups; a new rating
+    # replaces it there instead of being counted a second time
+    rollup_rating = models.IntegerField(null=True, blank=True, editable=False)
+    rollup_rating_date = models.DateField(null=True, blank=True, editable=False)
+
+    objects = ChatbotSessionQuerySet.as_manager()
 
     class Meta:
         ordering = ['-session_start']
         verbose_name = 'Chatbot Session'
         verbose_name_plural = 'Chatbot Sessions'
+        indexes = [
+            # Open sessions, for the idle sweeper
+            models.Index(
+                fields=['last_activity_at'], name='chatbot_session_open_idx', condition=Q(session_end__isnull=True)
+            ),
+        ]
 
     def __str__(self):
         return f"Session {self.id} - {self.user.email}"
@@ -148,4 +285,26 @@ class ChatbotSession(models.Model):
         """Calculate session duration if ended"""
         if self.session_end:
             return (self.session_end - self.session_start).total_seconds()
-        return None
\ No newline at end of file
+        return None
+
+
+class ConversationArchive(models.Model):
+    """Compressed copy of a conversation's messages, moved out of the Message table"""
+    conversation = models.OneToOneField(
+        Conversation,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='archive'
+    )
+
+    # zlib-compressed JSON list of message rows, oldest first
+    data = models.BinaryField()
+    message_count = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Conversation Archive'
+        verbose_name_plural = 'Conversation Archives'
+
+    def __str__(self):
+        return f"Archive of {self.conversation_id} ({self.message_count} messages)"
\ No newline at end of file
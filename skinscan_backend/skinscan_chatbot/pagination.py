@@ -0,0 +1,141 @@
+"""
+Keyset pagination over the messages of a conversation.
+
+Messages are ordered by (created_at, id). Pages are selected with
+WHERE (created_at, id) < cursor on the (conversation, created_at, id)
+index instead of OFFSET, so every page costs the same however long the
+conversation is, and messages arriving between requests do not shift the
+pages a client is walking through.
+
+Live messages may be model instances or values() rows. Archived messages
+are all older than the live ones (archiving moves every
+live message), so they follow the live messages when paging backwards and
+are only decoded when a page or a sync actually reaches them.
+"""
+import base64
+import binascii
+import datetime
+import uuid
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ConversationArchive, Message
+
+
+def _parse_timestamp(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'Invalid timestamp: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, datetime.timezone.utc)
+    return parsed
+
+
+def message_position(message):
+    """(created_at, id) of a Message or a values() row"""
+    if isinstance(message, dict):
+        return message['created_at'], message['id']
+    return message.created_at, message.id
+
+
+def encode_cursor(message):
+    """Opaque cursor pointing just past message"""
+    created_at, message_id = message_position(message)
+    raw = f'{created_at.isoformat()}|{message_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (created_at, id) position of a cursor; ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.split('|')
+        return _parse_timestamp(created_at), uuid.UUID(message_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+
+def resolve_after(conversation, value):
+    """
+    Return the sync position for ?after=: a message id of this conversation
+    or an ISO 8601 timestamp. Raises ValueError if it is neither.
+    """
+    try:
+        message_id = uuid.UUID(value)
+    except ValueError:
+        return _parse_timestamp(value), None
+
+    created_at = Message.objects.filter(
+        conversation=conversation, id=message_id
+    ).values_list('created_at', flat=True).first()
+    if created_at is None:
+        archived = [m for m in conversation.get_archived_messages() if m.id == message_id]
+        if not archived:
+            raise ValueError('Message not found in this conversation')
+        created_at = archived[0].created_at
+    return created_at, message_id
+
+
+def _is_after(message, position):
+    created_at, message_id = position
+    if message_id is None:
+        return message.created_at > created_at
+    return message_position(message) > position
+
+
+def _after_q(position):
+    created_at, message_id = position
+    if message_id is None:
+        return Q(created_at__gt=created_at)
+    return Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=message_id)
+
+
+def _before_q(position):
+    created_at, message_id = position
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=message_id)
+
+
+def messages_before(conversation, queryset, cursor=None, limit=50):
+    """
+    Return (messages, has_more): up to limit messages older than cursor
+    (the newest ones without a cursor), newest first.
+
+    queryset selects the conversation's live messages and may carry only()
+    or annotations for the serializer.
+    """
+    live = queryset.order_by('-created_at', '-id')
+    if cursor is not None:
+        live = live.filter(_before_q(cursor))
+    messages = list(live[:limit + 1])
+
+    if len(messages) <= limit and conversation.archived_message_count:
+        archived = reversed(conversation.get_archived_messages())
+        if cursor is not None:
+            archived = (m for m in archived if message_position(m) < cursor)
+        for message in archived:
+            if len(messages) > limit:
+                break
+            messages.append(message)
+
+    return messages[:limit], len(messages) > limit
+
+
+def messages_after(conversation, queryset, position, limit=50):
+    """
+    Return (messages, has_more): up to limit messages newer than position,
+    oldest first, so a client can append them and continue from the last one.
+    """
+    messages = []
+    # The archive only needs decoding if it was written after the position
+    if conversation.archived_message_count and ConversationArchive.objects.filter(
+        conversation=conversation, archived_at__gt=position[0]
+    ).exists():
+        messages = [m for m in conversation.get_archived_messages() if _is_after(m, position)][:limit + 1]
+
+    if len(messages) <= limit:
+        live = queryset.filter(_after_q(position)).order_by('created_at', 'id')
+        messages += list(live[:limit + 1 - len(messages)])
+
+    return messages[:limit], len(messages) > limit
@@ -0,0 +1,208 @@
+"""
+Full-text search over chat messages.
+
+SQLite uses an FTS5 external-content table kept in sync with the Message
+table by triggers; PostgreSQL uses a GIN index over to_tsvector(content),
+which the database maintains on every write. Both are ranked (bm25 /
+ts_rank) and return highlighted snippets, so a search only touches the
+matching rows instead of scanning every message with LIKE '%term%'.
+"""
+import html
+import re
+
+from django.db import connections
+
+from .models import Message
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'skinscan_chatbot_message_fts'
+PG_INDEX = 'skinscan_chatbot_message_content_fts'
+SNIPPET_WORDS = 12
+
+# Highlight markers are control characters in SQL and become <mark> tags
+# once the snippet text has been HTML-escaped
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+_FTS_TRIGGERS = {
+    f'{FTS_TABLE}_ai': (
+        'AFTER INSERT ON skinscan_chatbot_message BEGIN '
+        f'INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.rowid, new.content); END'
+    ),
+    f'{FTS_TABLE}_ad': (
+        'AFTER DELETE ON skinscan_chatbot_message BEGIN '
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.rowid, old.content); END"
+    ),
+    f'{FTS_TABLE}_au': (
+        'AFTER UPDATE OF content ON skinscan_chatbot_message BEGIN '
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.rowid, old.content); "
+        f'INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.rowid, new.content); END'
+    ),
+}
+
+
+def install_search_index(connection):
+    """
+    Create the search index for this database if it is missing.
+
+    On SQLite a table rebuild (ALTER TABLE emulation, VACUUM) drops the
+    triggers or renumbers rowids, so the FTS table is rebuilt whenever a
+    trigger had to be recreated. Safe to call repeatedly.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+                "content, content='skinscan_chatbot_message', content_rowid='rowid', "
+                "tokenize='porter unicode61')"
+            )
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+                list(_FTS_TRIGGERS)
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [name for name in _FTS_TRIGGERS if name not in existing]
+            for name in missing:
+                cursor.execute(f'CREATE TRIGGER {name} {_FTS_TRIGGERS[name]}')
+            if missing:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {PG_INDEX} ON skinscan_chatbot_message '
+                f"USING GIN (to_tsvector('{SEARCH_CONFIG}', content))"
+            )
+
+
+def uninstall_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for name in _FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+
+
+def rebuild_search_index(connection):
+    """Re-index every message (SQLite only; PostgreSQL indexes stay in sync)"""
+    install_search_index(connection)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def is_search_supported(using='default'):
+    return connections[using].vendor in ('sqlite', 'postgresql')
+
+
+def _fts5_query(query):
+    """
+    Turn free text into a safe FTS5 expression.
+
+    Every word is quoted so punctuation and FTS5 operators in user input
+    cannot cause syntax errors; the last word is matched as a prefix so
+    results appear while the user is still typing.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _search_sql(connection, query, user_id):
+    """Return (sql, params) selecting matching messages with snippet and rank"""
+    columns = (
+        'm.id, m.conversation_id, m.message_type, m.content, m.created_at, '
+        'c.title AS conversation_title'
+    )
+    user_filter = 'AND c.user_id = %s' if user_id is not None else ''
+    user_params = [user_id] if user_id is not None else []
+
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(query)
+        if match is None:
+            return None, None
+        sql = (
+            f'SELECT {columns}, '
+            f"snippet({FTS_TABLE}, 0, %s, %s, '…', {SNIPPET_WORDS}) AS snippet, "
+            f'-bm25({FTS_TABLE}) AS rank '
+            f'FROM {FTS_TABLE} '
+            f'JOIN skinscan_chatbot_message m ON m.rowid = {FTS_TABLE}.rowid '
+            'JOIN skinscan_chatbot_conversation c ON c.id = m.conversation_id '
+            f'WHERE {FTS_TABLE} MATCH %s {user_filter} '
+            f'ORDER BY bm25({FTS_TABLE})'
+        )
+        return sql, [_MARK_START, _MARK_END, match, *user_params]
+
+    if connection.vendor == 'postgresql':
+        if not re.search(r'\w', query):
+            return None, None
+        vector = f"to_tsvector('{SEARCH_CONFIG}', m.content)"
+        sql = (
+            f'SELECT {columns}, '
+            f"ts_headline('{SEARCH_CONFIG}', m.content, q.query, %s) AS snippet, "
+            f'ts_rank({vector}, q.query) AS rank '
+            'FROM skinscan_chatbot_message m '
+            'JOIN skinscan_chatbot_conversation c ON c.id = m.conversation_id, '
+            f"websearch_to_tsquery('{SEARCH_CONFIG}', %s) AS q(query) "
+            f'WHERE {vector} @@ q.query {user_filter} '
+            'ORDER BY rank DESC'
+        )
+        options = f'StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords={SNIPPET_WORDS * 2}, MinWords={SNIPPET_WORDS // 2}'
+        return sql, [options, query, *user_params]
+
+    raise NotImplementedError(f'Message search is not supported on {connection.vendor}')
+
+
+def highlight(snippet):
+    """HTML-escape a snippet and turn the highlight markers into <mark> tags"""
+    return html.escape(snippet).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+def search_messages(query, user=None, limit=20, offset=0, using='default'):
+    """
+    Return messages matching query, best match first.
+
+    Each Message carries extra ``snippet`` (HTML-escaped, matches wrapped in
+    <mark>), ``rank`` (higher is better) and ``conversation_title``
+    attributes. Pass user to restrict results to their conversations.
+    """
+    connection = connections[using]
+    user_id = None
+    if user is not None:
+        user_id = user._meta.pk.get_db_prep_value(user.pk, connection)
+    sql, params = _search_sql(connection, query, user_id)
+    if sql is None:
+        return []
+
+    sql += ' LIMIT %s OFFSET %s'
+    messages = list(Message.objects.using(using).raw(sql, [*params, limit, offset]))
+    for message in messages:
+        message.snippet = highlight(message.snippet or '')
+    return messages
+
+
+def matching_message_ids(query, using='default'):
+    """Raw SQL (sql, params) selecting the ids of all matching messages, for pk__in filters"""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(query)
+        if match is None:
+            return None, None
+        return (
+            f'SELECT m.id FROM {FTS_TABLE} '
+            f'JOIN skinscan_chatbot_message m ON m.rowid = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s',
+            [match]
+        )
+    if connection.vendor == 'postgresql':
+        if not re.search(r'\w', query):
+            return None, None
+        return (
+            'SELECT id FROM skinscan_chatbot_message '
+            f"WHERE to_tsvector('{SEARCH_CONFIG}', content) @@ websearch_to_tsquery('{SEARCH_CONFIG}', %s)",
+            [query]
+        )
+    raise NotImplementedError(f'Message search is not supported on {connection.vendor}')
@@ -1,9 +1,13 @@
 from rest_framework import serializers
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Length, Substr
 from django.utils import timezone
+
+from skinscan_backend.serializers import SparseFieldsetMixin, ValuesSerializer, nested_fields
 from .models import Conversation, Message, ChatbotSession
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     content_preview = serializers.ReadOnlyField()
     is_user_message = serializers.ReadOnlyField()
     is_assistant_message = serializers.ReadOnlyField()
@@ -16,13 +20,71 @@ class MessageSerializer(serializers.ModelSerializer):
             'is_assistant_message', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'response_time', 'confidence_score', 'created_at', 'updated_at']
+        field_sources = {
+            'content_preview': [],
+            'is_user_message': ['message_type'],
+            'is_assistant_message': ['message_type'],
+        }
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        queryset = super().optimize_queryset(queryset, fields)
+        if fields is not None and 'content_preview' in fields and 'content' not in fields:
+            # Previews come from the database without loading the full content
+            queryset = queryset.with_content_preview()
+        return queryset
+
+
+class MessageValuesSerializer(ValuesSerializer):
+    """values() fast path of MessageSerializer for message pages"""
+    serializer_class = MessageSerializer
+
+    def values(self, queryset, *extra):
+        if 'content_preview' in self.field_names and 'content' not in self.columns:
+            queryset = queryset.with_content_preview()
+            extra += ('content_head', 'content_length')
+        return super().values(queryset, *extra)
+
+    def to_representation(self, row):
+        if isinstance(row, Message):
+            # Archived messages are unsaved instances
+            row = {column: getattr(row, column) for column in self.columns | {'content'}}
+        return super().to_representation(row)
+
+    def represent_content_preview(self, row):
+        if 'content' in row:
+            head, length = row['content'][:Message.PREVIEW_LENGTH], len(row['content'])
+        else:
+            head, length = row['content_head'], row['content_length']
+        return head + "..." if length > Message.PREVIEW_LENGTH else head
+
+    def represent_is_user_message(self, row):
+        return row['message_type'] == 'user'
+
+    def represent_is_assistant_message(self, row):
+        return row['message_type'] == 'assistant'
+
+
+class MessageSearchResultSerializer(serializers.ModelSerializer):
+    """Search hit with its highlighted snippet and relevance rank"""
+    conversation_id = serializers.UUIDField(read_only=True)
+    conversation_title = serializers.ReadOnlyField()
+    snippet = serializers.ReadOnlyField()
+    rank = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Message
+        fields = [
+            'id', 'conversation_id', 'conversation_title', 'message_type',
+            'snippet', 'rank', 'created_at'
+        ]
 
 
-class ConversationSerializer(serializers.ModelSerializer):
+class ConversationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     message_count = serializers.ReadOnlyField()
     last_message = serializers.SerializerMethodField()
     conversation_summary = serializers.ReadOnlyField()
-    messages = MessageSerializer(many=True, read_only=True)
+    messages = serializers.SerializerMethodField()
 
     class Meta:
         model = Conversation
@@ -32,6 +94,26 @@ class ConversationSerializer(serializers.ModelSerializer):
             'last_message_at', 'messages'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'last_message_at']
+        field_sources = {
+            'message_count': ['archived_message_count'],
+            'last_message': ['archived_message_count'],
+            'conversation_summary': ['title', 'created_at', 'archived_message_count'],
+            'messages': ['archived_message_count'],
+        }
+
+    def get_messages(self, obj):
+        fields = nested_fields(self.requested_fields, 'messages')
+        if 'messages' in self.context:
+            # A page of MessageValuesSerializer rows selected by the view
+            return MessageValuesSerializer(fields=fields, context=self.context).serialize(self.context['messages'])
+
+        # Archived messages are merged in ahead of the live ones. Not obj.messages:
+        # the related manager reads conversation_id, which only() may defer
+        live_messages = Message.objects.filter(conversation=obj).order_by('created_at')
+        live_messages = MessageSerializer.optimize_queryset(live_messages, fields)
+        return MessageSerializer(
+            obj.get_all_messages(live_messages), many=True, fields=fields, context=self.context
+        ).data
 
     def get_last_message(self, obj):
         if obj.last_message:
@@ -43,7 +125,7 @@ class ConversationSerializer(serializers.ModelSerializer):
         return None
 
 
-class ConversationListSerializer(serializers.ModelSerializer):
+class ConversationListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Simplified serializer for conversation list view"""
     message_count = serializers.ReadOnlyField()
     last_message = serializers.SerializerMethodField()
@@ -55,6 +137,11 @@ class ConversationListSerializer(serializers.ModelSerializer):
             'id', 'title', 'conversation_summary', 'is_active',
             'message_count', 'last_message', 'created_at', 'last_message_at'
         ]
+        field_sources = {
+            'message_count': ['archived_message_count'],
+            'last_message': ['archived_message_count'],
+            'conversation_summary': ['title', 'created_at', 'archived_message_count'],
+        }
 
     def get_last_message(self, obj):
         if obj.last_message:
@@ -66,6 +153,80 @@ class ConversationListSerializer(serializers.ModelSerializer):
         return None
 
 
+class ConversationListValuesSerializer(ValuesSerializer):
+    """
+    values() fast path of ConversationListSerializer.
+
+    The live message count and the last message are annotated as
+    correlated subqueries, instead of two queries per conversation.
+    """
+    serializer_class = ConversationListSerializer
+
+    def values(self, queryset, *extra):
+        if not {'message_count', 'last_message', 'conversation_summary'} & set(self.field_names):
+            return super().values(queryset, *extra)
+
+        messages = Message.objects.filter(conversation=OuterRef('pk'))
+        # The id breaks timestamp ties, so all four subqueries pick the same row
+        last = messages.order_by('-created_at', '-id')
+        queryset = queryset.annotate(
+            live_message_count=Subquery(
+                messages.order_by().values('conversation').annotate(count=Count('pk')).values('count')
+            ),
+            last_message_type=Subquery(last.values('message_type')[:1]),
+            last_message_created_at=Subquery(last.values('created_at')[:1]),
+            last_message_head=Subquery(last.annotate(head=Substr('content', 1, Message.PREVIEW_LENGTH)).values('head')[:1]),
+            last_message_length=Subquery(last.annotate(length=Length('content')).values('length')[:1]),
+        )
+        extra += (
+            'archived_message_count', 'live_message_count', 'last_message_type',
+            'last_message_created_at', 'last_message_head', 'last_message_length',
+        )
+        return super().values(queryset, *extra)
+
+    def _last_message(self, row):
+        """(preview head, content length, message_type, created_at) or None"""
+        if '_last' not in row:
+            if row['last_message_type'] is not None:
+                row['_last'] = (
+                    row['last_message_head'], row['last_message_length'],
+                    row['last_message_type'], row['last_message_created_at']
+                )
+            elif row['archived_message_count']:
+                conversation = Conversation(id=row['id'], archived_message_count=row['archived_message_count'])
+                message = conversation.get_archived_messages()[-1]
+                row['_last'] = (
+                    message.content[:Message.PREVIEW_LENGTH], len(message.content),
+                    message.message_type, message.created_at
+                )
+            else:
+                row['_last'] = None
+        return row['_last']
+
+    def represent_message_count(self, row):
+        return (row['live_message_count'] or 0) + row['archived_message_count']
+
+    def represent_last_message(self, row):
+        last = self._last_message(row)
+        if last is None:
+            return None
+        head, length, message_type, created_at = last
+        return {
+            'content': head + "..." if length > Message.PREVIEW_LENGTH else head,
+            'message_type': message_type,
+            'created_at': created_at
+        }
+
+    def represent_conversation_summary(self, row):
+        if row['title']:
+            return row['title']
+        last = self._last_message(row)
+        if last is not None:
+            head, length = last[0], last[1]
+            return head[:50] + "..." if length > 50 else head[:50]
+        return f"Conversation started {row['created_at'].strftime('%B %d, %Y')}"
+
+
 class SendMessageSerializer(serializers.Serializer):
     content = serializers.CharField(max_length=2000)
     conversation_id = serializers.UUIDField(required=False)
@@ -129,8 +290,9 @@ class ChatbotSessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ChatbotSession
         fields = [
-            'id', 'user_email', 'session_start', 'session_end',
-            'session_duration', 'total_messages', 'average_response_time',
+            'id', 'user_email', 'session_start', 'session_end', 'last_activity_at',
+            'session_duration', 'total_messages', 'response_count',
+            'average_response_time', 'max_response_time',
             'satisfaction_rating', 'feedback_comment'
         ]
         read_only_fields = ['id', 'session_start', 'session_duration']
@@ -0,0 +1,14 @@
+from django.db import connections
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+
+from .search import install_search_index
+
+
+@receiver(post_migrate)
+def ensure_search_index(sender, app_config, using, plan=None, **kwargs):
+    """Recreate the message search triggers if a migration rebuilt the table"""
+    if app_config.name != 'skinscan_chatbot' or not plan:
+        return
+    if any(migration.app_label == 'skinscan_chatbot' for migration, backwards in plan if not backwards):
+        install_search_index(connections[using])
@@ -1,3 +1,674 @@
-from django.test import TestCase
+import io
+import json
+import zlib
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from skinscan_authentication.models import User
+from skinscan_backend.fake_inference import latency_settings
+from skinscan_backend.testing import AdminChangelistQueryMixin
+from .admin import EstimatedCountPaginator
+from .archive import archive_conversations
+from .models import ChatbotSession, ChatbotSessionQuerySet, Conversation, ConversationArchive, Message
+from .serializers import (
+    ConversationListSerializer,
+    ConversationListValuesSerializer,
+    MessageSerializer,
+    MessageValuesSerializer,
+)
+from .views import ConversationDetailView
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AdminChangelistQueryTests(AdminChangelistQueryMixin, TestCase):
+    def _create_rows(self, count):
+        index = User.objects.count()
+        user = User.objects.create_user(
+            email=f'user{index}@example.com', username=f'user{index}', password='Us3r-pass!'
+        )
+        for i in range(count):
+            conversation = Conversation.objects.create(user=user, title='' if i % 2 else f'Chat {i}')
+            Message.objects.create(conversation=conversation, message_type='user', content='Itchy rash')
+            Message.objects.create(conversation=conversation, message_type='assistant', content='Moisturize')
+            ChatbotSession.objects.create(user=user, conversation=conversation, total_messages=2)
+
+    def test_conversation_changelist(self):
+        self._assert_bounded('/admin/skinscan_chatbot/conversation/')
+
+    def test_message_changelist(self):
+        self._assert_bounded('/admin/skinscan_chatbot/message/')
+
+    def test_chatbot_session_changelist(self):
+        self._assert_bounded('/admin/skinscan_chatbot/chatbotsession/')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='paginator@example.com', username='paginator', password='Us3r-pass!')
+        conversation = Conversation.objects.create(user=user)
+        Message.objects.bulk_create([Message(conversation=conversation, content=str(i)) for i in range(30)])
+
+    def _paginator(self):
+        paginator = EstimatedCountPaginator(Message.objects.order_by('created_at'), 10)
+        paginator.exact_count_threshold = 5
+        return paginator
+
+    def test_exact_count_without_statistics(self):
+        Message.objects.filter(content__in=['0', '1']).delete()
+        self.assertEqual(self._paginator().count, 28)
+
+    def test_stale_estimate_does_not_serve_phantom_pages(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(self._paginator().count, 30)
+
+        # Deleted after ANALYZE: the estimate still says 30
+        Message.objects.filter(content__in=[str(i) for i in range(15)]).delete()
+        paginator = self._paginator()
+        self.assertEqual(paginator.num_pages, 3)
+        self.assertEqual(len(paginator.page(2).object_list), 5)
+        with self.assertRaises(EmptyPage):
+            paginator.page(3)
+        self.assertEqual((paginator.count, paginator.num_pages), (15, 2))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class MessageSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='search@example.com', username='search', password='Us3r-pass!')
+        cls.other = User.objects.create_user(email='other@example.com', username='other', password='Us3r-pass!')
+        cls.conversation = Conversation.objects.create(user=cls.user, title='Eczema')
+        cls.rash = Message.objects.create(
+            conversation=cls.conversation, message_type='user',
+            content='I have an itchy rash on my <b>elbows</b> after swimming'
+        )
+        cls.advice = Message.objects.create(
+            conversation=cls.conversation, message_type='assistant',
+            content='A rash can be eczema. Keep the rash moisturized and avoid chlorine rash triggers.'
+        )
+        Message.objects.create(conversation=cls.conversation, message_type='user', content='Thanks for the advice')
+        other_conversation = Conversation.objects.create(user=cls.other)
+        Message.objects.create(conversation=other_conversation, message_type='user', content='Rash on my hands')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_search_is_ranked_and_scoped_to_user(self):
+        response = self.client.get('/api/v1/chatbot/search/', {'q': 'rash'})
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['data']['results']
+        self.assertEqual([r['id'] for r in results], [str(self.advice.id), str(self.rash.id)])
+        self.assertEqual(results[0]['conversation_title'], 'Eczema')
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        results = self.client.get('/api/v1/chatbot/search/', {'q': 'itchy elbows'}).json()['data']['results']
+
+        self.assertEqual(len(results), 1)
+        self.assertIn('<mark>itchy</mark>', results[0]['snippet'])
+        self.assertIn('&lt;b&gt;', results[0]['snippet'])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.rash.content = 'Dry patches on my knees'
+        self.rash.save()
+        self.advice.delete()
+
+        self.assertEqual(self.client.get('/api/v1/chatbot/search/', {'q': 'rash'}).json()['data']['results'], [])
+        results = self.client.get('/api/v1/chatbot/search/', {'q': 'knee'}).json()['data']['results']
+        self.assertEqual([r['id'] for r in results], [str(self.rash.id)])
+
+    def test_query_syntax_is_not_interpreted(self):
+        response = self.client.get('/api/v1/chatbot/search/', {'q': 'rash" OR NEAR(*'})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get('/api/v1/chatbot/search/', {'q': ''}).status_code, 400)
+
+    def test_admin_search_uses_index(self):
+        admin_user = User.objects.create_superuser(email='admin@example.com', username='admin', password='Adm1n-pass!')
+        self.client.force_login(admin_user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/skinscan_chatbot/message/', {'q': 'rash'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 3)
+        self.assertFalse(any('LIKE' in query['sql'] and '"content"' in query['sql'] for query in queries.captured_queries))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SparseFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='sparse@example.com', username='sparse', password='Us3r-pass!')
+        cls.conversation = Conversation.objects.create(user=cls.user, title='Acne')
+        cls.message = Message.objects.create(
+            conversation=cls.conversation, message_type='user', content='x' * 500,
+            user_context={'skin_type': 'oily'}
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_detail_returns_only_requested_fields(self):
+        url = f'/api/v1/chatbot/conversation/{self.conversation.id}/'
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'id,messages.id,messages.content_preview'})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['conversation']
+        self.assertEqual(set(data), {'id', 'messages'})
+        self.assertEqual(data['messages'], [{'id': str(self.message.id), 'content_preview': 'x' * 100 + '...'}])
+
+        message_sql = [q['sql'] for q in queries.captured_queries if 'FROM "skinscan_chatbot_message"' in q['sql']]
+        self.assertEqual(len(message_sql), 1)
+        # content is only read through SUBSTR()/LENGTH(), never selected whole
+        self.assertNotRegex(message_sql[0], r'(SELECT |, )"skinscan_chatbot_message"\."content"')
+        self.assertNotIn('"user_context"', message_sql[0])
+
+    def test_list_fields(self):
+        response = self.client.get('/api/v1/chatbot/conversations/', {'fields': 'id,title'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['conversations'], [{'id': str(self.conversation.id), 'title': 'Acne'}])
+
+    def test_without_fields_returns_everything(self):
+        data = self.client.get(f'/api/v1/chatbot/conversation/{self.conversation.id}/').json()['conversation']
+
+        self.assertIn('conversation_summary', data)
+        self.assertEqual(data['messages'][0]['content'], 'x' * 500)
+
+    def test_last_message_preview_skips_large_columns(self):
+        untitled = Conversation.objects.create(user=self.user)
+        Message.objects.create(conversation=untitled, message_type='user', content='y' * 500, user_context={'a': 1})
+
+        for url in (f'/api/v1/chatbot/conversation/{untitled.id}/', '/api/v1/chatbot/conversations/'):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {'fields': 'id,last_message,conversation_summary'})
+            self.assertEqual(response.status_code, 200)
+
+            message_sql = [q['sql'] for q in queries.captured_queries if 'FROM "skinscan_chatbot_message"' in q['sql']]
+            for sql in message_sql:
+                self.assertNotRegex(sql, r'(SELECT |, )"skinscan_chatbot_message"\."content"')
+                self.assertNotIn('"user_context"', sql)
+
+        data = self.client.get(
+            f'/api/v1/chatbot/conversation/{untitled.id}/', {'fields': 'last_message,conversation_summary'}
+        ).json()['conversation']
+        self.assertEqual(data['last_message']['content'], 'y' * 100 + '...')
+        self.assertEqual(data['conversation_summary'], 'y' * 50 + '...')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class MessagePaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='pages@example.com', username='pages', password='Us3r-pass!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.conversation = Conversation.objects.create(user=self.user)
+        self.url = f'/api/v1/chatbot/conversation/{self.conversation.id}/'
+        start = timezone.now() - timedelta(hours=1)
+        for i in range(7):
+            self._message(f'Message {i}', start + timedelta(minutes=i))
+
+    def _message(self, content, created_at):
+        message = Message.objects.create(conversation=self.conversation, message_type='user', content=content)
+        Message.objects.filter(pk=message.pk).update(created_at=created_at)
+        return message
+
+    def _contents(self, response):
+        return [m['content'] for m in response.json()['conversation']['messages']]
+
+    def _walk(self):
+        contents, params = [], {'limit': 3}
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            contents += self._contents(response)
+            pagination = response.json()['messages_pagination']
+            if not pagination['has_more']:
+                return contents
+            params['before'] = pagination['next_cursor']
+
+    def test_pages_newest_first(self):
+        response = self.client.get(self.url, {'limit': 3})
+
+        self.assertEqual(self._contents(response), ['Message 6', 'Message 5', 'Message 4'])
+        self.assertEqual(self._walk(), [f'Message {i}' for i in range(6, -1, -1)])
+
+    def test_new_messages_do_not_shift_pages(self):
+        first = self.client.get(self.url, {'limit': 3}).json()['messages_pagination']
+        self._message('Newest', timezone.now())
+
+        response = self.client.get(self.url, {'limit': 3, 'before': first['next_cursor']})
+        self.assertEqual(self._contents(response), ['Message 3', 'Message 2', 'Message 1'])
+
+    def test_sync_after_message_id_and_timestamp(self):
+        last = Message.objects.get(content='Message 4')
+
+        response = self.client.get(self.url, {'after': str(last.id)})
+        self.assertEqual(self._contents(response), ['Message 5', 'Message 6'])
+        self.assertEqual(response.json()['messages_pagination']['next_after'], str(Message.objects.get(content='Message 6').id))
+
+        response = self.client.get(self.url, {'after': last.created_at.isoformat(), 'limit': 1})
+        self.assertEqual(self._contents(response), ['Message 5'])
+        self.assertTrue(response.json()['messages_pagination']['has_more'])
+
+    def test_pages_continue_into_archive(self):
+        Conversation.objects.filter(pk=self.conversation.pk).update(is_active=False)
+        archive_conversations()
+        Conversation.objects.filter(pk=self.conversation.pk).update(is_active=True)
+        self._message('Back again', timezone.now())
+
+        self.assertEqual(self._walk(), ['Back again'] + [f'Message {i}' for i in range(6, -1, -1)])
+
+        self.conversation.refresh_from_db()
+        archived = self.conversation.get_archived_messages()[4]
+        response = self.client.get(self.url, {'after': str(archived.id)})
+        self.assertEqual(self._contents(response), ['Message 5', 'Message 6', 'Back again'])
+
+    def test_page_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url, {'limit': 3})
+        start = timezone.now()
+        for i in range(50):
+            self._message(f'More {i}', start + timedelta(seconds=i))
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url, {'limit': 3})
+
+        self.assertEqual(len(response.json()['conversation']['messages']), 3)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {'before': 'not-a-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'after': 'yesterday'}).status_code, 400)
+        response = self.client.get(self.url, {'limit': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'success': False, 'error': 'limit must be an integer'})
+
+    def test_update_returns_first_page(self):
+        with mock.patch.object(ConversationDetailView, 'page_size', 3):
+            response = self.client.put(self.url, {'title': 'Renamed'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['conversation']['title'], 'Renamed')
+        self.assertEqual(self._contents(response), ['Message 6', 'Message 5', 'Message 4'])
+        self.assertTrue(response.json()['messages_pagination']['has_more'])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ValuesSerializerTests(TestCase):
+    """The values() fast paths must render exactly like the ModelSerializers"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='values@example.com', username='values', password='Us3r-pass!')
+        titled = Conversation.objects.create(user=self.user, title='Acne')
+        Message.objects.create(conversation=titled, message_type='user', content='Short')
+        untitled = Conversation.objects.create(user=self.user)
+        Message.objects.create(conversation=untitled, message_type='user', content='Hi')
+        Message.objects.create(
+            conversation=untitled, message_type='assistant', content='Lang erklärt ' * 20,
+            response_time=1.25, confidence_score=0.8
+        )
+        Conversation.objects.create(user=self.user)
+        archived = Conversation.objects.create(user=self.user, is_active=False)
+        Message.objects.create(conversation=archived, message_type='user', content='Archived question ' * 5)
+        archive_conversations()
+        self.conversations = Conversation.objects.filter(user=self.user).order_by('-last_message_at')
+
+    def _assert_identical(self, expected, actual):
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_conversation_list(self):
+        for fields in (None, {'id', 'conversation_summary'}, {'id', 'title'}):
+            expected = ConversationListSerializer(self.conversations, many=True, fields=fields).data
+            serializer = ConversationListValuesSerializer(fields=fields)
+            self._assert_identical(expected, serializer.serialize(serializer.values(self.conversations)))
+
+    def test_messages(self):
+        messages = Message.objects.filter(conversation__user=self.user).order_by('created_at')
+        for fields in (None, {'id', 'content_preview', 'is_user_message'}):
+            expected = MessageSerializer(messages, many=True, fields=fields).data
+            serializer = MessageValuesSerializer(fields=fields)
+            self._assert_identical(expected, serializer.serialize(serializer.values(messages)))
+
+    def test_conversation_list_query_count_is_constant(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as small:
+            client.get('/api/v1/chatbot/conversations/', {'limit': 50})
+        for i in range(10):
+            conversation = Conversation.objects.create(user=self.user)
+            Message.objects.create(conversation=conversation, message_type='user', content=f'Message {i}')
+        with CaptureQueriesContext(connection) as large:
+            client.get('/api/v1/chatbot/conversations/', {'limit': 50})
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_last_message_with_equal_timestamps(self):
+        conversation = Conversation.objects.create(user=self.user, title='Tie')
+        first = Message.objects.create(conversation=conversation, message_type='user', content='Question ' * 20)
+        second = Message.objects.create(conversation=conversation, message_type='assistant', content='Answer')
+        Message.objects.filter(pk=second.pk).update(created_at=first.created_at)
+
+        conversations = Conversation.objects.filter(pk=conversation.pk)
+        expected = ConversationListSerializer(conversations, many=True).data
+        serializer = ConversationListValuesSerializer()
+        actual = serializer.serialize(serializer.values(conversations))
+
+        self._assert_identical(expected, actual)
+        self.assertEqual(actual[0]['last_message']['content'], 'Answer')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ConversationArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='archive@example.com', username='archive', password='Us3r-pass!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _conversation(self, count, **kwargs):
+        conversation = Conversation.objects.create(user=self.user, **kwargs)
+        for i in range(count):
+            Message.objects.create(
+                conversation=conversation,
+                message_type='user' if i % 2 == 0 else 'assistant',
+                content=f'Message {i}',
+                user_context={'turn': i} if i % 2 else None
+            )
+        return conversation
+
+    def test_inactive_and_idle_conversations_are_archived(self):
+        inactive = self._conversation(4, is_active=False)
+        idle = self._conversation(2)
+        Conversation.objects.filter(pk=idle.pk).update(last_message_at=timezone.now() - timedelta(days=200))
+        active = self._conversation(2)
+
+        conversations, messages = archive_conversations(older_than_days=90)
+
+        self.assertEqual((conversations, messages), (2, 6))
+        self.assertEqual(Message.objects.filter(conversation=active).count(), 2)
+        self.assertFalse(Message.objects.filter(conversation__in=[inactive, idle]).exists())
+        self.assertEqual(ConversationArchive.objects.get(conversation=inactive).message_count, 4)
+
+    def test_detail_view_reads_archive(self):
+        conversation = self._conversation(4, is_active=False)
+        before = self.client.get(f'/api/v1/chatbot/conversation/{conversation.id}/').json()['conversation']
+
+        archive_conversations()
+        after = self.client.get(f'/api/v1/chatbot/conversation/{conversation.id}/').json()['conversation']
+
+        self.assertEqual(after['messages'], before['messages'])
+        self.assertEqual(after['message_count'], 4)
+        self.assertEqual(after['last_message'], before['last_message'])
+
+    def test_rearchiving_keeps_earlier_messages(self):
+        conversation = self._conversation(2, is_active=False)
+        archive_conversations()
+        Message.objects.create(conversation=conversation, message_type='user', content='Back again')
+        archive_conversations()
+
+        conversation.refresh_from_db()
+        messages = conversation.get_all_messages()
+        self.assertEqual([m.content for m in messages], ['Message 0', 'Message 1', 'Back again'])
+        self.assertEqual(conversation.message_count, 3)
+
+    def test_user_message_totals_include_archived_messages(self):
+        self._conversation(4, is_active=False)
+        self._conversation(3)
+
+        def totals():
+            self.user.refresh_from_db()
+            dashboard = self.client.get('/api/v1/auth/dashboard/').json()['dashboard']
+            return (
+                self.user.total_messages_sent,
+                dashboard['chatbot_statistics']['total_messages'],
+                self.client.get('/api/v1/chatbot/stats/').json()['statistics']['total_messages'],
+            )
+
+        self.assertEqual(totals(), (4, 4, 7))
+        archive_conversations()
+        self.assertEqual(Conversation.objects.get(is_active=False).archived_user_message_count, 2)
+        self.assertEqual(totals(), (4, 4, 7))
+
+    def test_account_deletion_removes_archives(self):
+        from skinscan_authentication.deletion import delete_user_account
+
+        self._conversation(2, is_active=False)
+        archive_conversations()
+        counts = delete_user_account(self.user.pk, progress=lambda label, deleted: None)
+
+        self.assertEqual(counts['conversation_archives'], 1)
+        self.assertFalse(ConversationArchive.objects.exists())
+
+
+class CompressedUserContextTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(email='context@example.com', username='context')
+        self.conversation = Conversation.objects.create(user=user)
+        reply = (
+            'Sun protection is crucial for all skin types and conditions.\n\n**Additional Tips:**\n'
+            '• Moisturize daily, especially after cleansing.\n• Apply sunscreen with at least SPF 30 daily.\n'
+            '\n*Please consult a dermatologist for proper diagnosis and treatment.*'
+        )
+        self.context = {
+            'user_id': str(user.id),
+            'analysis_count': 3,
+            'member_since': 'July 2025',
+            'conversation_history': [
+                {
+                    'message_type': 'user' if i % 2 == 0 else 'assistant',
+                    'content': f'My skin is dry after showering, question {i}' if i % 2 == 0 else reply,
+                    'created_at': timezone.now().isoformat(),
+                }
+                for i in range(10)
+            ],
+        }
+
+    def _raw_column(self, message):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT user_context FROM skinscan_chatbot_message WHERE id = %s', [message.id.hex])
+            return bytes(cursor.fetchone()[0])
+
+    def test_context_is_compressed_with_dictionary(self):
+        message = Message.objects.create(
+            conversation=self.conversation, message_type='assistant', content='Hi', user_context=self.context
+        )
+
+        stored = self._raw_column(message)
+        self.assertTrue(stored[1] & 0x20)  # zlib preset dictionary flag
+        self.assertLess(len(stored), len(json.dumps(self.context)) / 4)
+
+    def test_context_is_decoded_lazily(self):
+        Message.objects.create(
+            conversation=self.conversation, message_type='assistant', content='Hi', user_context=self.context
+        )
+        message = Message.objects.get()
+
+        self.assertIsInstance(message.__dict__['user_context'], bytes)
+        self.assertEqual(message.user_context, self.context)
+        self.assertEqual(message.__dict__['user_context'], self.context)
+
+    def test_unread_context_is_saved_unchanged(self):
+        created = Message.objects.create(
+            conversation=self.conversation, message_type='assistant', content='Hi', user_context=self.context
+        )
+        stored = self._raw_column(created)
+
+        message = Message.objects.get()
+        message.is_flagged = True
+        with mock.patch.object(zlib, 'compressobj', side_effect=AssertionError('recompressed')):
+            message.save()
+
+        self.assertEqual(self._raw_column(message), stored)
+        self.assertIsNone(Message.objects.create(conversation=self.conversation, message_type='user', content='x').user_context)
+
+
+class CompressUserContextMigrationTests(TransactionTestCase):
+    migrate_from = [('skinscan_chatbot', '0003_conversation_archive')]
+    migrate_to = [('skinscan_chatbot', '0004_compress_message_user_context')]
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_existing_rows_are_converted(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+        old_user = apps.get_model('skinscan_authentication', 'User').objects.create(email='old@example.com', username='old')
+        old_conversation = apps.get_model('skinscan_chatbot', 'Conversation').objects.create(user=old_user)
+        OldMessage = apps.get_model('skinscan_chatbot', 'Message')
+        for i in range(3):
+            OldMessage.objects.create(
+                conversation=old_conversation, message_type='assistant', content=str(i),
+                user_context={'turn': i, 'member_since': 'July 2025'}
+            )
+        OldMessage.objects.create(conversation=old_conversation, message_type='user', content='no context')
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+
+        contexts = {message.content: message.user_context for message in Message.objects.all()}
+        self.assertEqual(contexts, {
+            '0': {'turn': 0, 'member_since': 'July 2025'},
+            '1': {'turn': 1, 'member_since': 'July 2025'},
+            '2': {'turn': 2, 'member_since': 'July 2025'},
+            'no context': None,
+        })
+
+
+class ArchivedUserMessageCountMigrationTests(TransactionTestCase):
+    migrate_from = [('skinscan_chatbot', '0009_session_rollup_rating')]
+    migrate_to = [('skinscan_chatbot', '0010_archived_user_message_count')]
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_archived_user_messages_are_counted(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+        old_user = apps.get_model('skinscan_authentication', 'User').objects.create(email='old@example.com', username='old')
+        old_conversation = apps.get_model('skinscan_chatbot', 'Conversation').objects.create(
+            user=old_user, archived_message_count=3
+        )
+        rows = [{'message_type': message_type} for message_type in ('user', 'assistant', 'user')]
+        apps.get_model('skinscan_chatbot', 'ConversationArchive').objects.create(
+            conversation=old_conversation, data=zlib.compress(json.dumps(rows).encode()), message_count=3
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+
+        self.assertEqual(Conversation.objects.get().archived_user_message_count, 2)
+
+
+@override_settings(DUMMY_AI_SERVICES=latency_settings('zero'), CHATBOT_SESSION_IDLE_MINUTES=30)
+class ChatbotSessionMetricsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='sessions@example.com', username='sessions', password='Us3r-pass!')
+        self.conversation = Conversation.objects.create(user=self.user)
+
+    def test_turns_maintain_running_mean_and_max(self):
+        ChatbotSession.objects.start(self.user, self.conversation, response_time=1.0)
+        for response_time in [3.0, None, 2.0, 6.0]:
+            ChatbotSession.objects.record_turn(self.user, self.conversation, response_time=response_time)
+
+        session = ChatbotSession.objects.get()
+        self.assertEqual((session.total_messages, session.response_count), (10, 4))
+        self.assertAlmostEqual(session.average_response_time, 3.0)
+        self.assertEqual(session.max_response_time, 6.0)
+
+    def test_turn_is_a_single_update_without_reading_counters(self):
+        ChatbotSession.objects.start(self.user, self.conversation, response_time=1.0)
+        with CaptureQueriesContext(connection) as queries:
+            ChatbotSession.objects.record_turn(self.user, self.conversation, response_time=2.0)
+
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertRegex(updates[-1], r'"total_messages" = \("skinscan_chatbot_chatbotsession"."total_messages" \+ 2\)')
+        selects = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertFalse([sql for sql in selects if 'total_messages' in sql or 'average_response_time' in sql])
+
+    def test_idle_session_is_closed_and_next_turn_starts_a_new_one(self):
+        ChatbotSession.objects.start(self.user, self.conversation, response_time=1.0)
+        idle_since = timezone.now() - timedelta(minutes=45)
+        ChatbotSession.objects.update(last_activity_at=idle_since)
+
+        out = io.StringIO()
+        call_command('close_idle_sessions', stdout=out)
+        self.assertIn('Closed 1 idle sessions', out.getvalue())
+        self.assertEqual(ChatbotSession.objects.get().session_end, idle_since)
+
+        ChatbotSession.objects.record_turn(self.user, self.conversation, response_time=2.0)
+        latest = ChatbotSession.objects.open().get()
+        self.assertEqual((latest.total_messages, latest.average_response_time), (2, 2.0))
+
+    def test_turn_after_unswept_idle_period_starts_a_new_session(self):
+        ChatbotSession.objects.start(self.user, self.conversation)
+        ChatbotSession.objects.update(last_activity_at=timezone.now() - timedelta(hours=2))
+
+        ChatbotSession.objects.record_turn(self.user, self.conversation)
+        self.assertEqual(ChatbotSession.objects.count(), 2)
+        self.assertEqual(ChatbotSession.objects.open().count(), 1)
+
+    def test_views_record_turns_and_stats_read_sessions(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/v1/chatbot/start-chat/', {'initial_message': 'I have eczema'}, format='json')
+        conversation_id = response.data['conversation']['id']
+        client.post('/api/v1/chatbot/send-message/', {
+            'conversation_id': conversation_id, 'content': 'What about moisturizer?'
+        }, format='json')
+
+        session = ChatbotSession.objects.get(conversation_id=conversation_id)
+        self.assertEqual((session.total_messages, session.response_count), (4, 2))
+        self.assertIsNotNone(session.max_response_time)
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = client.get('/api/v1/chatbot/stats/').data['statistics']
+        self.assertEqual(stats['total_sessions'], 1)
+        self.assertFalse([q for q in queries.captured_queries if 'response_time' in q['sql'] and 'message' in q['sql']])
+
+    def test_feedback_keeps_concurrent_turn(self):
+        ChatbotSession.objects.start(self.user, self.conversation, response_time=1.0)
+        first = ChatbotSessionQuerySet.first
+        concurrent = [True]
+
+        def first_then_turn(queryset):
+            session = first(queryset)
+            if concurrent:
+                # Another request records a turn after the view read the session
+                concurrent.pop()
+                ChatbotSession.objects.record_turn(self.user, self.conversation, response_time=5.0)
+            return session
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with mock.patch.object(ChatbotSessionQuerySet, 'first', first_then_turn):
+            response = client.post('/api/v1/chatbot/feedback/', {
+                'conversation_id': str(self.conversation.id), 'satisfaction_rating': 4
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        session = ChatbotSession.objects.get()
+        self.assertEqual(session.satisfaction_rating, 4)
+        self.assertEqual((session.total_messages, session.response_count), (4, 2))
+        self.assertEqual(session.max_response_time, 5.0)
 
-# Create your tests here.
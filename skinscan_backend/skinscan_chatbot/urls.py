@@ -4,6 +4,7 @@ from .views import (
     SendMessageView,
     ConversationListView,
     ConversationDetailView,
+    MessageSearchView,
     ChatbotStatsView,
     SessionFeedbackView,
     SystemStatusView
@@ -17,6 +18,7 @@ urlpatterns = [
     path('send-message/', SendMessageView.as_view(), name='send-message'),
     path('conversations/', ConversationListView.as_view(), name='conversation-list'),
     path('conversation/<uuid:conversation_id>/', ConversationDetailView.as_view(), name='conversation-detail'),
+    path('search/', MessageSearchView.as_view(), name='message-search'),
 
     # Statistics and feedback
     path('stats/', ChatbotStatsView.as_view(), name='chatbot-stats'),
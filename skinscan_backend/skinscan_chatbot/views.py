@@ -3,15 +3,20 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, F, Max, Q, Sum
 from django.utils import timezone
 from datetime import datetime, timedelta
 
+from skinscan_backend.routers import ReplicaReadMixin
+from skinscan_backend.serializers import nested_fields, parse_fields
+
 from .models import Conversation, Message, ChatbotSession
 from .serializers import (
     ConversationSerializer,
-    ConversationListSerializer,
+    ConversationListValuesSerializer,
     MessageSerializer,
+    MessageValuesSerializer,
+    MessageSearchResultSerializer,
     SendMessageSerializer,
     StartConversationSerializer,
     ConversationUpdateSerializer,
@@ -20,6 +25,15 @@ from .serializers import (
     UserChatHistorySerializer
 )
 from .dummy_ai_service import dummy_medical_chatbot
+from .pagination import (
+    decode_cursor,
+    encode_cursor,
+    message_position,
+    messages_after,
+    messages_before,
+    resolve_after
+)
+from .search import search_messages
 from skin_analysis.models import SkinAnalysis
 
 
@@ -88,10 +102,10 @@ class StartConversationView(APIView):
                     conversation.save()
 
                     # Create session tracking
-                    ChatbotSession.objects.create(
-                        user=user,
-                        conversation=conversation,
-                        total_messages=2
+                    ChatbotSession.objects.start(
+                        user,
+                        conversation,
+                        response_time=ai_response.get('response_time')
                     )
 
                     # Serialize conversation with messages
@@ -226,13 +240,11 @@ class SendMessageView(APIView):
                     conversation.save()
 
                     # Update session statistics
-                    session = ChatbotSession.objects.filter(
-                        conversation=conversation
-                    ).order_by('-session_start').first()
-
-                    if session:
-                        session.total_messages += 2
-                        session.save()
+                    ChatbotSession.objects.record_turn(
+                        user,
+                        conversation,
+                        response_time=ai_response.get('response_time')
+                    )
 
                     # Serialize messages
                     user_msg_serializer = MessageSerializer(user_message)
@@ -282,7 +294,7 @@ class SendMessageView(APIView):
         return context
 
 
-class ConversationListView(APIView):
+class ConversationListView(ReplicaReadMixin, APIView):
     """Get list of user's conversations"""
     permission_classes = [IsAuthenticated]
 
@@ -294,6 +306,7 @@ class ConversationListView(APIView):
         page = int(request.GET.get('page', 1))
         limit = int(request.GET.get('limit', 10))
         is_active = request.GET.get('is_active')
+        fields = parse_fields(request)
 
         # Calculate offset
         offset = (page - 1) * limit
@@ -309,20 +322,14 @@ class ConversationListView(APIView):
         # Get total count
         total_count = conversations.count()
 
-        # Get paginated results
-        paginated_conversations = conversations[offset:offset + limit]
-
-        # Serialize conversations
-        serializer = ConversationListSerializer(
-            paginated_conversations,
-            many=True,
-            context={'request': request}
-        )
+        # Serialize the page from values() rows
+        serializer = ConversationListValuesSerializer(fields=fields, context={'request': request})
+        data = serializer.serialize(serializer.values(conversations)[offset:offset + limit])
 
         return Response({
             'success': True,
             'data': {
-                'conversations': serializer.data,
+                'conversations': data,
                 'pagination': {
                     'current_page': page,
                     'total_pages': (total_count + limit - 1) // limit,
@@ -334,27 +341,84 @@ class ConversationListView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+class MessageSearchView(APIView):
+    """Full-text search across the user's conversations"""
+    permission_classes = [IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request):
+        """Return ranked messages matching ?q= with highlighted snippets"""
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return Response({
+                'success': False,
+                'error': 'Search query is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        page = max(int(request.GET.get('page', 1)), 1)
+        limit = min(max(int(request.GET.get('limit', 20)), 1), self.max_limit)
+        offset = (page - 1) * limit
+
+        # Fetch one extra row to know whether another page exists
+        results = search_messages(query, user=request.user, limit=limit + 1, offset=offset)
+        serializer = MessageSearchResultSerializer(results[:limit], many=True)
+
+        return Response({
+            'success': True,
+            'data': {
+                'query': query,
+                'results': serializer.data,
+                'pagination': {
+                    'current_page': page,
+                    'has_next': len(results) > limit,
+                    'has_previous': page > 1
+                }
+            }
+        }, status=status.HTTP_200_OK)
+
+
 class ConversationDetailView(APIView):
     """Get, update, or delete specific conversation"""
     permission_classes = [IsAuthenticated]
+    page_size = 50
+    max_limit = 200
 
     def get(self, request, conversation_id):
-        """Get conversation details with messages"""
-        try:
-            conversation = Conversation.objects.get(id=conversation_id, user=request.user)
-            serializer = ConversationSerializer(conversation, context={'request': request})
-
-            return Response({
-                'success': True,
-                'conversation': serializer.data
-            }, status=status.HTTP_200_OK)
+        """
+        Get conversation details with a page of messages.
 
+        Messages come newest first; pass ?before=<next_cursor> for older
+        ones. ?after=<message_id|timestamp> instead returns only messages
+        newer than that, oldest first, for incremental sync.
+        """
+        try:
+            fields = parse_fields(request)
+            conversations = ConversationSerializer.optimize_queryset(Conversation.objects.all(), fields)
+            conversation = conversations.get(id=conversation_id, user=request.user)
         except Conversation.DoesNotExist:
             return Response({
                 'success': False,
                 'error': 'Conversation not found or access denied'
             }, status=status.HTTP_404_NOT_FOUND)
 
+        context = {'request': request}
+        pagination = None
+        if fields is None or 'messages' in {name.split('.', 1)[0] for name in fields}:
+            try:
+                context['messages'], pagination = self._message_page(conversation, fields, request.GET)
+            except ValueError as e:
+                return Response({
+                    'success': False,
+                    'error': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = ConversationSerializer(conversation, fields=fields, context=context)
+        return Response({
+            'success': True,
+            'conversation': serializer.data,
+            'messages_pagination': pagination
+        }, status=status.HTTP_200_OK)
+
     def put(self, request, conversation_id):
         """Update conversation (title, active status)"""
         try:
@@ -368,16 +432,18 @@ class ConversationDetailView(APIView):
             if serializer.is_valid():
                 serializer.save()
 
-                # Return updated conversation
+                # Return updated conversation with the first page of messages, as GET does
+                messages, pagination = self._message_page(conversation, None, {})
                 conversation_serializer = ConversationSerializer(
                     conversation,
-                    context={'request': request}
+                    context={'request': request, 'messages': messages}
                 )
 
                 return Response({
                     'success': True,
                     'message': 'Conversation updated successfully',
-                    'conversation': conversation_serializer.data
+                    'conversation': conversation_serializer.data,
+                    'messages_pagination': pagination
                 }, status=status.HTTP_200_OK)
 
             return Response({
@@ -391,6 +457,30 @@ class ConversationDetailView(APIView):
                 'error': 'Conversation not found or access denied'
             }, status=status.HTTP_404_NOT_FOUND)
 
+    def _message_page(self, conversation, fields, params):
+        """(messages, pagination) for the limit/before/after params; ValueError if invalid"""
+        try:
+            limit = min(max(int(params.get('limit', self.page_size)), 1), self.max_limit)
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        message_serializer = MessageValuesSerializer(fields=nested_fields(fields, 'messages'))
+        queryset = message_serializer.values(Message.objects.filter(conversation=conversation), 'created_at')
+        after = params.get('after')
+        before = params.get('before')
+
+        if after:
+            position = resolve_after(conversation, after)
+            messages, has_more = messages_after(conversation, queryset, position, limit)
+            last = message_position(messages[-1])[1] if messages else after
+            pagination = {'mode': 'after', 'has_more': has_more, 'next_after': str(last)}
+        else:
+            cursor = decode_cursor(before) if before else None
+            messages, has_more = messages_before(conversation, queryset, cursor, limit)
+            next_cursor = encode_cursor(messages[-1]) if has_more else None
+            pagination = {'mode': 'before', 'has_more': has_more, 'next_cursor': next_cursor}
+        pagination['limit'] = limit
+        return messages, pagination
+
     def delete(self, request, conversation_id):
         """Delete conversation and all messages"""
         try:
@@ -410,7 +500,7 @@ class ConversationDetailView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
 
-class ChatbotStatsView(APIView):
+class ChatbotStatsView(ReplicaReadMixin, APIView):
     """Get user's chatbot usage statistics"""
     permission_classes = [IsAuthenticated]
 
@@ -422,6 +512,9 @@ class ChatbotStatsView(APIView):
         total_conversations = Conversation.objects.filter(user=user).count()
         active_conversations = Conversation.objects.filter(user=user, is_active=True).count()
         total_messages = Message.objects.filter(conversation__user=user).count()
+        total_messages += Conversation.objects.filter(user=user).aggregate(
+            archived=Sum('archived_message_count')
+        )['archived'] or 0
 
         # Recent activity (last 30 days)
         thirty_days_ago = timezone.now() - timedelta(days=30)
@@ -435,12 +528,16 @@ class ChatbotStatsView(APIView):
             created_at__gte=thirty_days_ago
         ).count()
 
-        # Average response time
-        avg_response_time = Message.objects.filter(
-            conversation__user=user,
-            message_type='assistant',
-            response_time__isnull=False
-        ).aggregate(avg_time=Avg('response_time'))['avg_time']
+        # Response times from the per-session running means, weighted by responses
+        sessions = ChatbotSession.objects.filter(user=user).aggregate(
+            total_sessions=Count('id'),
+            responses=Sum('response_count'),
+            weighted_time=Sum(F('average_response_time') * F('response_count')),
+            max_time=Max('max_response_time')
+        )
+        avg_response_time = None
+        if sessions['responses']:
+            avg_response_time = sessions['weighted_time'] / sessions['responses']
 
         # Most active day
         most_recent_conversation = Conversation.objects.filter(user=user).order_by('-created_at').first()
@@ -454,6 +551,8 @@ class ChatbotStatsView(APIView):
                 'recent_conversations_30_days': recent_conversations,
                 'recent_messages_30_days': recent_messages,
                 'average_response_time_seconds': round(avg_response_time, 2) if avg_response_time else 0,
+                'max_response_time_seconds': round(sessions['max_time'], 2) if sessions['max_time'] else 0,
+                'total_sessions': sessions['total_sessions'],
                 'most_recent_conversation': most_recent_conversation.last_message_at.isoformat() if most_recent_conversation else None,
                 'member_since': user.created_at.strftime('%B %Y')
             }
@@ -477,22 +576,23 @@ class SessionFeedbackView(APIView):
             try:
                 conversation = Conversation.objects.get(id=conversation_id, user=user)
 
-                # Get or create session
-                session, created = ChatbotSession.objects.get_or_create(
-                    user=user,
-                    conversation=conversation,
-                    defaults={
-                        'total_messages': conversation.message_count,
-                        'session_end': timezone.now()
-                    }
-                )
+                # Latest session of the conversation, or a new one
+                session = ChatbotSession.objects.filter(user=user, conversation=conversation).first()
+                if session is None:
+                    session = ChatbotSession.objects.create(
+                        user=user,
+                        conversation=conversation,
+                        total_messages=conversation.message_count,
+                        session_end=timezone.now()
+                    )
 
-                # Update feedback
+                # Update feedback; the turn counters are left to record_turn
                 session.satisfaction_rating = satisfaction_rating
                 session.feedback_comment = feedback_comment
+                session.rated_at = timezone.now()
                 if not session.session_end:
                     session.session_end = timezone.now()
-                session.save()
+                session.save(update_fields=['satisfaction_rating', 'feedback_comment', 'rated_at', 'session_end'])
 
                 return Response({
                     'success': True,